@@ -0,0 +1,284 @@
+"""
+知识图谱规模基准测试
+
+在合成图上逐项计时 Knowledge_Graph 的各个操作，输出吞吐量、延迟分位数与内存峰值：
+
+    uv run backend/benchmarks/knowledge_graph_bench.py --sizes 10000 100000 --output baseline.json
+    uv run backend/benchmarks/knowledge_graph_bench.py --sizes 10000 100000 --compare baseline.json
+
+合成图（同一 seed 下完全可复现）：
+- scale_free: Barabási–Albert 优先连接，每个新节点连 3 条边
+- chain: 单链
+- tree: 每个节点 4 个后继的课程树，另有 5% 的跨分支先修边
+
+--compare 模式读取之前保存的结果，逐项对比 p50 延迟，变慢超过 --threshold 时以退出码 1 结束。
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compact_graph import Compact_Knowledge_Graph  # noqa: E402
+from knowledge_graph import Knowledge_Edge, Knowledge_Graph, Knowledge_Node  # noqa: E402
+from sqlite_graph import SQLite_Knowledge_Graph  # noqa: E402
+
+EdgeList = List[Tuple[int, int]]
+
+
+# ---------- 合成图 ----------
+
+def scale_free(n: int, rng: random.Random, m: int = 3) -> EdgeList:
+    edges: EdgeList = []
+    targets: List[int] = []  # 每条边的两个端点各记一次，按度数加权抽样
+    for v in range(n):
+        if v <= m:
+            chosen = set(range(v))
+        else:
+            chosen = set()
+            while len(chosen) < m:
+                chosen.add(targets[rng.randrange(len(targets))])
+        for u in chosen:
+            edges.append((v, u))
+            targets.extend((u, v))
+    return edges
+
+
+def chain(n: int, rng: random.Random) -> EdgeList:
+    return [(i, i + 1) for i in range(n - 1)]
+
+
+def tree(n: int, rng: random.Random, branching: int = 4, cross_ratio: float = 0.05) -> EdgeList:
+    edges = [((child - 1) // branching, child) for child in range(1, n)]
+    for _ in range(int(n * cross_ratio)):
+        # 跨分支先修边只从编号小的节点指向编号大的节点，保持无环
+        a, b = rng.randrange(n), rng.randrange(n)
+        if a != b:
+            edges.append((min(a, b), max(a, b)))
+    return edges
+
+
+GENERATORS: Dict[str, Callable[[int, random.Random], EdgeList]] = {
+    "scale_free": scale_free,
+    "chain": chain,
+    "tree": tree,
+}
+
+
+def make_backend(name: str, workdir: Path):
+    if name == "knowledge":
+        return Knowledge_Graph()
+    if name == "compact":
+        return Compact_Knowledge_Graph()
+    if name == "sqlite":
+        path = workdir / "bench.sqlite3"
+        for suffix in ("", "-wal", "-shm"):
+            Path(str(path) + suffix).unlink(missing_ok=True)
+        return SQLite_Knowledge_Graph(str(path), synchronous="OFF")
+    raise ValueError(f"未知的存储后端: {name}")
+
+
+BACKENDS = ("knowledge", "compact", "sqlite")
+
+
+# ---------- 计时 ----------
+
+def _percentile(sorted_ns: List[int], q: float) -> float:
+    index = min(len(sorted_ns) - 1, int(round(q * (len(sorted_ns) - 1))))
+    return sorted_ns[index] / 1000.0
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    samples = sorted(samples_ns)
+    total = sum(samples) / 1e9
+    return {
+        "count": len(samples),
+        "total_s": round(total, 6),
+        "throughput": round(len(samples) / total, 1) if total else float("inf"),
+        "p50_us": round(_percentile(samples, 0.50), 3),
+        "p95_us": round(_percentile(samples, 0.95), 3),
+        "p99_us": round(_percentile(samples, 0.99), 3),
+    }
+
+
+def time_calls(fn: Callable, args: Sequence) -> List[int]:
+    """逐次调用 fn(*arg) 并记录每次耗时（纳秒）"""
+    clock = time.perf_counter_ns
+    samples = []
+    for arg in args:
+        start = clock()
+        fn(*arg)
+        samples.append(clock() - start)
+    return samples
+
+
+def build(graph, n: int, edges: EdgeList) -> Tuple[List[int], List[int]]:
+    nodes = [Knowledge_Node(id=f"n{i}", name=f"概念{i}", description=f"第 {i} 个知识点的说明") for i in range(n)]
+    edge_objs = [
+        Knowledge_Edge(id=f"e{i}", start_node=nodes[u], end_node=nodes[v], weight=1.0 + (u + v) % 5)
+        for i, (u, v) in enumerate(edges)
+    ]
+    add_node = time_calls(graph.add_node, [(node,) for node in nodes])
+    add_edge = time_calls(graph.add_edge, [(edge,) for edge in edge_objs])
+    return add_node, add_edge
+
+
+def measure_memory(backend: str, n: int, edges: EdgeList, workdir: Path) -> Dict[str, float]:
+    """单独构建一次图，记录构建过程的内存峰值与构建完成后的常驻量（MB）"""
+    gc.collect()
+    tracemalloc.start()
+    graph = make_backend(backend, workdir)
+    build(graph, n, edges)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if hasattr(graph, "close"):
+        graph.close()
+    return {"graph_mb": round(current / 2 ** 20, 2), "build_peak_mb": round(peak / 2 ** 20, 2)}
+
+
+def run_case(
+    backend: str,
+    generator: str,
+    n: int,
+    queries: int,
+    path_queries: int,
+    seed: int,
+    workdir: Path,
+    memory: bool = True,
+) -> Dict:
+    rng = random.Random(seed)
+    edges = GENERATORS[generator](n, rng)
+    graph = make_backend(backend, workdir)
+    samples: Dict[str, List[int]] = {}
+    samples["add_node"], samples["add_edge"] = build(graph, n, edges)
+
+    node_ids = [f"n{rng.randrange(n)}" for _ in range(queries)]
+    pairs = [(f"n{rng.randrange(n)}", f"n{rng.randrange(n)}") for _ in range(path_queries)]
+    samples["get_node"] = time_calls(graph.get_node, [(node_id,) for node_id in node_ids])
+    samples["get_out_edge"] = time_calls(graph.get_out_edge, [(node_id,) for node_id in node_ids])
+    samples["get_neighbours"] = time_calls(graph.get_neighbours, [(node_id,) for node_id in node_ids])
+    samples["find_path"] = time_calls(graph.find_path, pairs)
+    if isinstance(graph, Knowledge_Graph):
+        samples["find_path_dijkstra"] = time_calls(lambda s, g: graph.find_path(s, g, method="dijkstra"), pairs)
+        samples["k_hop_2"] = time_calls(lambda node_id: list(graph.k_hop(node_id, 2, limit=1000)), [(i,) for i in node_ids])
+        samples["search_nodes"] = time_calls(graph.search_nodes, [(f"知识点 {i}",) for i in range(min(queries, 100))])
+
+    removed_edges = rng.sample(range(len(edges)), min(queries, len(edges)))
+    samples["remove_edge"] = time_calls(graph.remove_edge, [(f"e{i}",) for i in removed_edges])
+    removed_nodes = rng.sample(range(n), min(queries, n))
+    samples["remove_node"] = time_calls(graph.remove_node, [(f"n{i}",) for i in removed_nodes])
+    if hasattr(graph, "close"):
+        graph.close()
+    del graph
+    gc.collect()
+
+    result = {
+        "backend": backend,
+        "generator": generator,
+        "nodes": n,
+        "edges": len(edges),
+        "ops": {op: summarize(values) for op, values in samples.items()},
+    }
+    if memory:
+        result.update(measure_memory(backend, n, edges, workdir))
+    return result
+
+
+# ---------- 报告与对比 ----------
+
+def case_key(result: Dict) -> Tuple[str, str, int]:
+    return result["backend"], result["generator"], result["nodes"]
+
+
+def print_report(results: List[Dict]):
+    for result in results:
+        memory = ""
+        if "graph_mb" in result:
+            memory = f"  内存 {result['graph_mb']} MB（峰值 {result['build_peak_mb']} MB）"
+        print(f"\n== {result['backend']} / {result['generator']} / {result['nodes']} 节点 {result['edges']} 边{memory}")
+        print(f"{'操作':<20}{'次数':>8}{'吞吐/s':>14}{'p50 µs':>12}{'p95 µs':>12}{'p99 µs':>12}")
+        for op, stats in result["ops"].items():
+            print(f"{op:<20}{stats['count']:>8}{stats['throughput']:>14.1f}{stats['p50_us']:>12.2f}{stats['p95_us']:>12.2f}{stats['p99_us']:>12.2f}")
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """返回 p50 延迟变慢超过 threshold 的条目描述"""
+    previous = {case_key(result): result for result in baseline}
+    regressions = []
+    print(f"\n== 与基线对比（p50 延迟，阈值 {threshold:.0%}）")
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is None:
+            print(f"{'/'.join(map(str, case_key(result)))}: 基线中没有对应条目，跳过")
+            continue
+        for op, stats in result["ops"].items():
+            if op not in old["ops"]:
+                continue
+            before, after = old["ops"][op]["p50_us"], stats["p50_us"]
+            ratio = after / before if before else float("inf")
+            mark = ""
+            if ratio > 1 + threshold:
+                mark = "  <- 退化"
+                regressions.append(f"{'/'.join(map(str, case_key(result)))} {op}: {before:.2f} -> {after:.2f} µs")
+            print(f"{'/'.join(map(str, case_key(result)))} {op:<20}{before:>10.2f}{after:>10.2f}  x{ratio:.2f}{mark}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="知识图谱规模基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000], help="节点数，可给多个")
+    parser.add_argument("--generators", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["knowledge"])
+    parser.add_argument("--queries", type=int, default=1000, help="单点查询与删除的次数")
+    parser.add_argument("--path-queries", type=int, default=200, help="路径查询的次数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="跳过 tracemalloc 内存测量")
+    parser.add_argument("--workdir", type=Path, default=Path("."), help="SQLite 后端的数据库目录")
+    parser.add_argument("--output", type=Path, help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", type=Path, help="与之前保存的 JSON 结果对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定退化的 p50 变慢比例")
+    args = parser.parse_args(argv)
+
+    results = []
+    for backend in args.backends:
+        for generator in args.generators:
+            for n in args.sizes:
+                results.append(run_case(
+                    backend, generator, n, args.queries, args.path_queries, args.seed,
+                    args.workdir, memory=not args.no_memory,
+                ))
+                print_report(results[-1:])
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "args": {key: str(value) for key, value in vars(args).items()},
+            },
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n发现性能退化：")
+            for line in regressions:
+                print("  " + line)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
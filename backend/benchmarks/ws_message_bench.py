@@ -0,0 +1,179 @@
+"""
+WebSocket 消息编解码基准测试
+
+对比旧的消息处理路径与当前路径处理单条消息的 CPU 时间：
+
+    uv run backend/benchmarks/ws_message_bench.py
+    uv run backend/benchmarks/ws_message_bench.py --iterations 50000 --codecs orjson json
+
+旧路径（与改动前的 websocket_server 相同）：
+- 接收：json.loads，WebSocketMessage 按 payload 联合类型逐个尝试校验，处理函数再校验一次 payload
+- 发送：构造 WebSocketMessage（payload 为字典，再次按联合类型校验），model_dump()，
+  json.dumps(ensure_ascii=False)，并格式化一条包含完整 JSON 的日志（只格式化，不输出）
+
+新路径：
+- 接收：parse_inbound_message 按 type 一次完成 JSON 解析与校验
+- 发送：payload 模型由 json_codec 直接编码；固定消息使用预先编码的 Static_Frame
+
+每个场景输出每条消息的平均耗时与相对旧路径的加速比。
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import BaseModel  # noqa: E402
+
+from models import (  # noqa: E402
+    AuthRequestPayload, AuthResponsePayload, ChatRequestPayload, ChatResponsePayload, GraphQueryRequestPayload,
+    ImageUploadRequestPayload, ImageUploadResponsePayload, WebSocketMessage, parse_inbound_message,
+)
+from utils import json_codec  # noqa: E402
+from utils.json_codec import Static_Frame  # noqa: E402
+from utils.message_utils import STOP_MSG, THINKING_MSG, send_delta_msg, send_text_msg  # noqa: E402
+
+
+class Legacy_Message(BaseModel):
+    """改动前的 WebSocketMessage"""
+    type: str
+    request_id: Optional[str] = None
+    payload: Union[
+        AuthRequestPayload,
+        AuthResponsePayload,
+        ChatRequestPayload,
+        ChatResponsePayload,
+        ImageUploadRequestPayload,
+        ImageUploadResponsePayload,
+        Dict[str, Any],
+    ]
+
+
+# ---------- 样例消息 ----------
+
+def chat_request_frame() -> str:
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": {"text": f"第 {i} 轮：二叉搜索树的删除操作怎么处理有两个子节点的情况？"}}
+        for i in range(8)
+    ]
+    return json.dumps({
+        "type": "chat_request",
+        "request_id": "req-42",
+        "payload": {
+            "history": history,
+            "current_text": "请结合红黑树解释旋转操作",
+            "current_image_paths": ["/temp/images/a.png"],
+            "thread_id": "thread-1",
+        },
+    }, ensure_ascii=False)
+
+
+def graph_query_frame() -> str:
+    return json.dumps({
+        "type": "graph_query",
+        "request_id": "req-43",
+        "payload": {"query_id": "q1", "op": "k_hop", "params": {"node_id": "二叉树", "k": 2}, "page_size": 50},
+    }, ensure_ascii=False)
+
+
+# ---------- 两条路径 ----------
+
+def legacy_receive(frame: str):
+    data = json.loads(frame)
+    message = Legacy_Message.model_validate(data)
+    validator = {"chat_request": ChatRequestPayload, "graph_query": GraphQueryRequestPayload}.get(message.type)
+    if validator is not None:
+        return validator.model_validate(message.payload)
+    return message.payload
+
+
+def current_receive(frame: str):
+    return parse_inbound_message(frame).payload
+
+
+def legacy_send(type: str, payload: BaseModel) -> str:
+    message = Legacy_Message(type=type, payload=payload.model_dump(), request_id="req-42")
+    message_json = json.dumps(message.model_dump(), ensure_ascii=False)
+    _ = f"Emitting {type}: {payload.model_dump()}"
+    _ = f"Sending message to ('127.0.0.1', 50000): {message_json}"
+    return message_json
+
+
+def current_send(type: str, payload: BaseModel) -> bytes:
+    message = WebSocketMessage(type=type, payload=payload, request_id="req-42")
+    return json_codec.encode_frame(message.type, message.payload, message.request_id)
+
+
+# ---------- 计时 ----------
+
+def per_call_us(fn: Callable[[], Any], iterations: int, repeat: int) -> float:
+    """重复 repeat 轮取最快的一轮，返回每次调用的平均微秒数"""
+    for _ in range(min(iterations, 1000)):
+        fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter_ns() - start)
+    return best / iterations / 1000
+
+
+def scenarios(codec: str) -> Dict[str, Dict[str, Callable[[], Any]]]:
+    json_codec.set_codec(codec)
+    chat_frame = chat_request_frame()
+    query_frame = graph_query_frame()
+    delta = send_delta_msg("红黑树通过左旋和右旋保持平衡，")
+    text = send_text_msg("红黑树的插入" * 200)
+    stop_frame = Static_Frame("chat_response", STOP_MSG)
+    thinking_frame = Static_Frame("chat_response", THINKING_MSG)
+    return {
+        "recv chat_request": {
+            "legacy": lambda: legacy_receive(chat_frame),
+            "current": lambda: current_receive(chat_frame),
+        },
+        "recv graph_query": {
+            "legacy": lambda: legacy_receive(query_frame),
+            "current": lambda: current_receive(query_frame),
+        },
+        "send text_delta": {
+            "legacy": lambda: legacy_send("chat_response", delta),
+            "current": lambda: current_send("chat_response", delta),
+        },
+        "send text (1.2k 字)": {
+            "legacy": lambda: legacy_send("chat_response", text),
+            "current": lambda: current_send("chat_response", text),
+        },
+        "send stop": {
+            "legacy": lambda: legacy_send("chat_response", STOP_MSG),
+            "current": lambda: stop_frame.render("req-42"),
+        },
+        "send agent_status": {
+            "legacy": lambda: legacy_send("chat_response", THINKING_MSG),
+            "current": lambda: thinking_frame.render("req-42"),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="WebSocket 消息编解码基准测试")
+    parser.add_argument("--iterations", type=int, default=20000, help="每轮处理的消息数")
+    parser.add_argument("--repeat", type=int, default=5, help="计时轮数，取最快的一轮")
+    parser.add_argument("--codecs", nargs="+", choices=json_codec.AVAILABLE_CODECS, default=list(json_codec.AVAILABLE_CODECS))
+    args = parser.parse_args(argv)
+
+    for codec in args.codecs:
+        print(f"\n== 编解码器: {codec}")
+        print(f"{'场景':<22}{'旧 µs/条':>12}{'新 µs/条':>12}{'加速比':>10}")
+        for name, paths in scenarios(codec).items():
+            legacy = per_call_us(paths["legacy"], args.iterations, args.repeat)
+            current = per_call_us(paths["current"], args.iterations, args.repeat)
+            print(f"{name:<22}{legacy:>12.2f}{current:>12.2f}{legacy / current:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
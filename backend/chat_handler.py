@@ -13,11 +13,13 @@ from langplatform.agents.main_agent import MainAgentGraph, create_main_agent_gra
 from utils.message_utils import send_text_msg, send_agent_msg, send_stop_msg, debug_output
 
 main_agent_instance: Optional[MainAgentGraph] = None
+_init_lock = asyncio.Lock() # 多个并发聊天同时到达时只初始化一次
 
 async def initialize_main_agent():
     global main_agent_instance
-    if main_agent_instance is None:
-        main_agent_instance = await create_main_agent_graph()
+    async with _init_lock:
+        if main_agent_instance is None:
+            main_agent_instance = await create_main_agent_graph()
 
 async def route_chat(
         history: List[ChatMessage],
@@ -35,7 +37,7 @@ async def route_chat(
         if main_agent_instance is None:
             await initialize_main_agent()
         
-        for response_payload in main_agent_instance.process_chat_request(history, current_text, current_image_paths, thread_id, resume_data): # type: ignore
+        async for response_payload in main_agent_instance.process_chat_request(history, current_text, current_image_paths, thread_id, resume_data): # type: ignore
             yield response_payload
         
     except Exception as e:
@@ -0,0 +1,267 @@
+"""
+分块二进制图片上传
+
+比 image_upload_request（整张图片 base64 编码放在一条 JSON 消息里）节省约三分之一的带宽，
+服务端也不需要把整个文件放在内存中，文件大小不再受单条消息大小的限制。
+
+协议：
+1. 客户端发送 image_upload_begin {"filename", "size", "sha256"}，声明文件大小与 SHA-256。
+   服务端返回 image_upload_ready {"upload_id", "offset", "chunk_size"}，
+   offset 为服务端已经收到的字节数，新上传为 0。
+2. 客户端从 offset 开始按 chunk_size 切块，每块以一个二进制帧发送：
+       upload_id（16 字节） | offset（8 字节无符号大端整数） | 数据
+   每块写入后服务端返回 image_upload_progress {"upload_id", "offset"}；
+   偏移量不连续时返回 status 为 "error" 的 progress，offset 为服务端期望的位置，客户端从那里重发。
+3. 收齐 size 字节后服务端校验 SHA-256，通过后返回 image_upload_response。
+   image_upload_ready 或出错后的 progress 中 offset 已等于 size 时，发送一个数据为空的块即可完成上传。
+
+写入的数据先保存在 <sha256>.part 中，连接断开时保留。客户端重新连接后用相同的
+size 与 sha256 再次发送 image_upload_begin，即可从已写入的位置续传。
+超过 part_ttl 未续传的 .part 文件会被清理。
+
+文件写入与哈希计算都经 asyncio.to_thread 在线程中执行，不阻塞事件循环。
+同时进行的上传总数与单个连接的上传数都有上限。
+"""
+import asyncio
+import hashlib
+import os
+import re
+import struct
+import time
+import uuid
+from typing import Any, BinaryIO, Dict, Hashable, List, Optional, Tuple, Union
+
+# 二进制帧头：upload_id + offset
+CHUNK_HEADER = struct.Struct(">16sQ")
+
+CHUNK_SIZE = 256 * 1024  # 建议客户端使用的块大小
+MAX_CHUNK_BYTES = 512 * 1024  # 单块数据上限，需小于 websockets 的 max_size（默认 1 MiB）
+MAX_UPLOAD_BYTES = 32 * 1024 * 1024
+MAX_ACTIVE_UPLOADS = 32
+MAX_UPLOADS_PER_OWNER = 4
+PART_TTL = 24 * 3600  # .part 文件的保留时间（秒）
+
+# 重新计算已写入部分的哈希时每次读取的字节数
+_HASH_READ_BYTES = 1024 * 1024
+
+_SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def encode_chunk(upload_id: bytes, offset: int, data: bytes) -> bytes:
+    """按协议编码一个数据块帧，供客户端与测试使用"""
+    return CHUNK_HEADER.pack(upload_id, offset) + data
+
+
+class Upload_State:
+    """一个进行中的上传，写入与关闭文件时持有 _lock"""
+
+    def __init__(self, owner: Hashable, filename: str, size: int, sha256: str, part_path: str, final_path: str):
+        self.upload_id = uuid.uuid4().bytes
+        self.owner = owner
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.part_path = part_path
+        self.final_path = final_path
+        self.received = 0
+        self.context: Any = None  # 调用方附加的信息，例如发起上传的请求 ID
+        self._hasher = hashlib.sha256()
+        self._file: Optional[BinaryIO] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def upload_id_hex(self) -> str:
+        return self.upload_id.hex()
+
+    # 以下方法在线程中执行
+
+    def _open(self):
+        """打开 .part 文件并重新计算已写入部分的哈希"""
+        mode = "r+b" if os.path.exists(self.part_path) else "w+b"
+        self._file = open(self.part_path, mode)
+        self._file.seek(0, os.SEEK_END)
+        length = self._file.tell()
+        if length > self.size:
+            self._file.truncate(0)
+            length = 0
+        self._file.seek(0)
+        while self.received < length:
+            block = self._file.read(min(_HASH_READ_BYTES, length - self.received))
+            if not block:
+                break
+            self._hasher.update(block)
+            self.received += len(block)
+        self._file.seek(self.received)
+        self._file.truncate()
+
+    def _write(self, data: Union[bytes, memoryview]):
+        try:
+            self._file.write(data)
+        except OSError:
+            # 写入失败（如磁盘已满）时丢弃本块写入的部分，客户端可以从 received 重发
+            self._file.seek(self.received)
+            self._file.truncate()
+            raise
+        self._hasher.update(data)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _finish(self):
+        self._close()
+        if self._hasher.hexdigest() != self.sha256:
+            os.remove(self.part_path)
+            raise ValueError("文件校验失败：SHA-256 与声明的不一致，请重新上传")
+        os.replace(self.part_path, self.final_path)
+
+
+class Upload_Manager:
+    """
+    管理 directory 下的分块上传。owner 标识上传所属的连接，用于限制单个连接的上传数，
+    以及连接断开时由 release 关闭其文件。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = MAX_UPLOAD_BYTES,
+        max_active: int = MAX_ACTIVE_UPLOADS,
+        max_per_owner: int = MAX_UPLOADS_PER_OWNER,
+        part_ttl: float = PART_TTL,
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_active = max_active
+        self.max_per_owner = max_per_owner
+        self.part_ttl = part_ttl
+        self._uploads: Dict[bytes, Upload_State] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._uploads)
+
+    def get(self, upload_id: bytes) -> Optional[Upload_State]:
+        return self._uploads.get(upload_id)
+
+    def owned_by(self, owner: Hashable) -> List[Upload_State]:
+        return [state for state in self._uploads.values() if state.owner == owner]
+
+    async def begin(self, owner: Hashable, filename: str, size: int, sha256: str) -> Upload_State:
+        """
+        开始或续传一个上传，返回的状态中 received 为已经写入的字节数。
+        filename 应当已经过清理（不含路径），保存的文件名为 "<sha256 前 12 位>_<filename>"。
+        """
+        sha256 = sha256.lower()
+        if not filename or os.path.basename(filename) != filename:
+            raise ValueError("无效的文件名")
+        if not _SHA256_PATTERN.fullmatch(sha256):
+            raise ValueError("sha256 必须是 64 位十六进制字符串")
+        if not 0 < size <= self.max_size:
+            raise ValueError(f"文件大小必须在 1 到 {self.max_size} 字节之间")
+        for state in self._uploads.values():
+            if state.sha256 == sha256:
+                raise ValueError("该文件正在上传中")
+        if len(self._uploads) >= self.max_active:
+            raise ValueError(f"服务器上传数已满，最多同时进行 {self.max_active} 个上传，请稍后重试")
+        if len(self.owned_by(owner)) >= self.max_per_owner:
+            raise ValueError(f"每个连接最多同时进行 {self.max_per_owner} 个上传")
+
+        part_path = os.path.join(self.directory, f"{sha256}.part")
+        final_path = os.path.join(self.directory, f"{sha256[:12]}_{filename}")
+        state = Upload_State(owner, filename, size, sha256, part_path, final_path)
+        self._uploads[state.upload_id] = state  # 先登记，打开文件期间同一文件的并发请求会被拒绝
+        try:
+            await asyncio.to_thread(self._prepare, state)
+        except BaseException:
+            self._uploads.pop(state.upload_id, None)
+            raise
+        return state
+
+    def _prepare(self, state: Upload_State):
+        self._purge_stale()
+        state._open()
+
+    def _purge_stale(self):
+        """删除超过 part_ttl 未修改、且不属于进行中上传的 .part 文件"""
+        active = {state.part_path for state in self._uploads.values()}
+        deadline = time.time() - self.part_ttl
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".part") and entry.path not in active:
+                    try:
+                        if entry.stat().st_mtime < deadline:
+                            os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    @staticmethod
+    def parse_chunk(frame: bytes) -> Tuple[bytes, int, memoryview]:
+        """拆分二进制帧，返回 (upload_id, offset, 数据)"""
+        if len(frame) < CHUNK_HEADER.size:
+            raise ValueError("数据块帧过短")
+        upload_id, offset = CHUNK_HEADER.unpack_from(frame)
+        return upload_id, offset, memoryview(frame)[CHUNK_HEADER.size:]
+
+    async def write_chunk(self, upload_id: bytes, offset: int, data: Union[bytes, memoryview]) -> bool:
+        """
+        写入一个数据块，收齐全部数据并校验通过时返回 True，文件已移动到 final_path。
+        偏移量不连续或数据超出声明的大小时抛出 ValueError，已写入的数据不受影响；
+        校验失败、或等待写盘期间上传被取消 / 释放时同样抛出 ValueError，上传已被移除。
+        写盘失败时抛出 OSError，上传保持登记，客户端可以从 received 重发。
+        """
+        state = self._uploads.get(upload_id)
+        if state is None:
+            raise ValueError("上传不存在或已结束")
+        async with state._lock:
+            self._check_registered(state)
+            if offset != state.received:
+                raise ValueError(f"数据块偏移量不连续：期望 {state.received}，收到 {offset}")
+            if len(data) > MAX_CHUNK_BYTES:
+                raise ValueError(f"数据块不能超过 {MAX_CHUNK_BYTES} 字节")
+            if state.received + len(data) > state.size:
+                raise ValueError("数据超出声明的文件大小")
+            if data:
+                await asyncio.to_thread(state._write, data)
+                state.received += len(data)
+                self._check_registered(state)
+            if state.received < state.size:
+                return False
+            try:
+                await asyncio.to_thread(state._finish)
+            except ValueError:
+                self._uploads.pop(upload_id, None)
+                raise
+            self._uploads.pop(upload_id, None)
+            return True
+
+    def _check_registered(self, state: Upload_State):
+        if self._uploads.get(state.upload_id) is not state:
+            raise ValueError("上传已取消或已结束")
+
+    async def release(self, owner: Hashable):
+        """连接断开时调用：关闭该连接的上传，保留 .part 文件以便续传"""
+        for state in self.owned_by(owner):
+            self._uploads.pop(state.upload_id, None)
+            async with state._lock:
+                await asyncio.to_thread(state._close)
+
+    async def abort(self, upload_id: bytes, owner: Hashable):
+        """放弃上传并删除已写入的数据"""
+        state = self._uploads.get(upload_id)
+        if state is None or state.owner != owner:
+            raise ValueError("上传不存在或已结束")
+        # 等待正在进行的写入完成；其间上传可能已经完成或被释放
+        async with state._lock:
+            self._check_registered(state)
+            del self._uploads[upload_id]
+            await asyncio.to_thread(self._discard, state)
+
+    @staticmethod
+    def _discard(state: Upload_State):
+        state._close()
+        try:
+            os.remove(state.part_path)
+        except FileNotFoundError:
+            pass
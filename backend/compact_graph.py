@@ -0,0 +1,636 @@
+import threading
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, Callable, List, Iterator, Iterable, Tuple
+
+import graph_paths
+import graph_traversal
+from graph_index import Attribute_Index, Text_Index, node_text
+from knowledge_graph import (
+    EDGE_UPDATABLE_FIELDS, NODE_UPDATABLE_FIELDS, Knowledge_Node, Knowledge_Edge, Knowledge_Graph,
+)
+
+
+class _Node_View(Mapping):
+    """按需物化节点的只读映射，用于兼容 Knowledge_Graph.nodes 的用法"""
+
+    def __init__(self, graph: "Compact_Knowledge_Graph"):
+        self._graph = graph
+
+    def __getitem__(self, node_id: str) -> Knowledge_Node:
+        node = self._graph.get_node(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._graph._node_index
+
+    def __iter__(self) -> Iterator[str]:
+        return (node_id for node_id in self._graph._node_ids if node_id is not None)
+
+    def __len__(self) -> int:
+        return len(self._graph._node_index)
+
+
+class _Edge_View(Mapping):
+    """按需物化边的只读映射，用于兼容 Knowledge_Graph.edges 的用法"""
+
+    def __init__(self, graph: "Compact_Knowledge_Graph"):
+        self._graph = graph
+
+    def __getitem__(self, edge_id: str) -> Knowledge_Edge:
+        edge = self._graph.get_edge(edge_id)
+        if edge is None:
+            raise KeyError(edge_id)
+        return edge
+
+    def __contains__(self, edge_id) -> bool:
+        return edge_id in self._graph._edge_index
+
+    def __iter__(self) -> Iterator[str]:
+        return (edge_id for edge_id in self._graph._edge_ids if edge_id is not None)
+
+    def __len__(self) -> int:
+        return len(self._graph._edge_index)
+
+
+class Compact_Knowledge_Graph:
+    """
+    基于数组的紧凑知识图谱存储
+
+    与 Knowledge_Graph 提供相同的接口，但内部不保存 pydantic 对象：
+    - 节点 / 边的字符串 ID 驻留为连续整数序号
+    - 节点与边的属性按列存储
+    - 邻接关系以 CSR（offsets + indices）数组保存，新增边先进入增量区，
+      增量积累到一定规模后再统一重建 CSR
+    - 删除采用墓碑标记，墓碑过多时在重建 CSR 时顺带压缩
+    - 重建只由写入触发，读取不会改变节点序号
+    - name / title / 全文索引与监听器的行为与 Knowledge_Graph 相同，
+      遍历与路径查询委托给 graph_traversal / graph_paths
+
+    读取接口返回的 Knowledge_Node / Knowledge_Edge 均为按需物化的副本，
+    修改它们不会影响图本身，需要修改时使用 update_node / update_edge。
+    """
+
+    # 增量区（新增边与墓碑）超过 max(该值, 边数 / 8) 时触发 CSR 重建
+    REBUILD_MIN_PENDING = 1024
+
+    def __init__(self):
+        # 节点列
+        self._node_index: Dict[str, int] = {}
+        self._node_ids: List[Optional[str]] = []  # None 表示已删除
+        self._node_name: List[Optional[str]] = []
+        self._node_title: List[Optional[str]] = []
+        self._node_description: List[Optional[str]] = []
+        self._node_content: List[Any] = []
+
+        # 边列
+        self._edge_index: Dict[str, int] = {}
+        self._edge_ids: List[Optional[str]] = []  # None 表示已删除
+        self._edge_src = array("q")
+        self._edge_dst = array("q")
+        self._edge_title: List[Optional[str]] = []
+        self._edge_description: List[Optional[str]] = []
+        self._edge_weight = array("d")
+
+        # CSR 邻接：offsets 长度为 (CSR 覆盖的节点数 + 1)，indices 存放边序号
+        self._out_offsets = array("q", [0])
+        self._out_indices = array("q")
+        self._in_offsets = array("q", [0])
+        self._in_indices = array("q")
+
+        # 尚未并入 CSR 的新增边
+        self._pending_out: Dict[int, List[int]] = {}
+        self._pending_in: Dict[int, List[int]] = {}
+        self._pending_count = 0
+
+        # 二级索引，以节点 ID 为键，不受压缩改变序号的影响。
+        # 全文索引同 Knowledge_Graph：新节点先记入 _text_pending，首次检索时在锁内统一建索引
+        self._name_index = Attribute_Index()
+        self._title_index = Attribute_Index()
+        self._text_index = Text_Index()
+        self._text_pending: Dict[str, None] = {}
+        self._text_lock = threading.Lock()
+
+        # 变更监听器，见 subscribe
+        self._listeners: List[Callable[[str, Any], None]] = []
+
+        # 每次增删改加一，供分析结果等缓存判断图是否发生变化；CSR 重建不改变版本
+        self.version = 0
+
+        self.nodes = _Node_View(self)
+        self.edges = _Edge_View(self)
+
+    # ---------- 与 pydantic 模型互转 ----------
+
+    @classmethod
+    def from_graph(cls, graph: Knowledge_Graph) -> "Compact_Knowledge_Graph":
+        """从 Knowledge_Graph 构建紧凑存储"""
+        compact = cls()
+        for node in graph.nodes.values():
+            compact.add_node(node)
+        for edge in graph.edges.values():
+            compact.add_edge(edge)
+        compact._rebuild()
+        return compact
+
+    def to_graph(self) -> Knowledge_Graph:
+        """导出为 Knowledge_Graph，节点与边均为新的 pydantic 对象"""
+        graph = Knowledge_Graph()
+        node_objs: Dict[int, Knowledge_Node] = {}
+        for ordinal, node_id in enumerate(self._node_ids):
+            if node_id is None:
+                continue
+            node = Knowledge_Node.model_construct(
+                id=node_id,
+                name=self._node_name[ordinal],
+                title=self._node_title[ordinal],
+                description=self._node_description[ordinal],
+                content=self._node_content[ordinal],
+                in_edge=[],
+                out_edge=[],
+            )
+            node_objs[ordinal] = node
+            graph.add_node(node)
+        for ordinal, edge_id in enumerate(self._edge_ids):
+            if edge_id is None:
+                continue
+            graph.add_edge(Knowledge_Edge.model_construct(
+                id=edge_id,
+                title=self._edge_title[ordinal],
+                start_node=node_objs[self._edge_src[ordinal]],
+                end_node=node_objs[self._edge_dst[ordinal]],
+                description=self._edge_description[ordinal],
+                weight=self._edge_weight[ordinal],
+            ))
+        return graph
+
+    def fork(self) -> "Compact_Knowledge_Graph":
+        """复制出互不影响的新图。各列都是扁平数组，直接整体复制；新图不继承监听器"""
+        self._flush_text_index()
+        graph = type(self)()
+        for key, value in self.__dict__.items():
+            if key in ("nodes", "edges", "_text_lock", "_listeners"):
+                continue
+            if isinstance(value, array):
+                value = array(value.typecode, value)
+            elif hasattr(value, "copy"):
+                value = value.copy()
+            graph.__dict__[key] = value
+        graph._pending_out = {ordinal: list(edges) for ordinal, edges in self._pending_out.items()}
+        graph._pending_in = {ordinal: list(edges) for ordinal, edges in self._pending_in.items()}
+        return graph
+
+    def subscribe(self, listener: Callable[[str, Any], None]):
+        """注册变更监听器，事件与参数同 Knowledge_Graph.subscribe，传入的节点与边为物化的副本"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, Any], None]):
+        self._listeners.remove(listener)
+
+    def _notify(self, event: str, obj: Any):
+        for listener in self._listeners:
+            listener(event, obj)
+
+    # ---------- 写入 ----------
+
+    def add_node(self, node: Knowledge_Node):
+        if node.id in self._node_index:
+            raise ValueError(f"节点 ID {node.id} 已存在")
+        ordinal = self._node_index[node.id] = len(self._node_ids)
+        self._node_ids.append(node.id)
+        self._node_name.append(node.name)
+        self._node_title.append(node.title)
+        self._node_description.append(node.description)
+        self._node_content.append(node.content)
+        self._name_index.add(node.name, node.id)
+        self._title_index.add(node.title, node.id)
+        self._text_pending[node.id] = None
+        self.version += 1
+        if self._listeners:
+            self._notify("add_node", self._materialize_node(ordinal))
+
+    def add_edge(self, edge: Knowledge_Edge):
+        if edge.start_node.id not in self._node_index:
+            raise ValueError(f"节点 ID {edge.start_node.id} 不存在")
+        elif edge.end_node.id not in self._node_index:
+            raise ValueError(f"节点 ID {edge.end_node.id} 不存在")
+        if edge.id in self._edge_index:
+            raise ValueError(f"节点 ID {edge.id} 已存在")
+
+        self._append_edge(
+            edge.id, edge.title, self._node_index[edge.start_node.id], self._node_index[edge.end_node.id],
+            edge.description, edge.weight,
+        )
+        self._maybe_rebuild()
+
+    def _append_edge(self, edge_id: str, title: Optional[str], src: int, dst: int, description: Optional[str], weight: float):
+        ordinal = len(self._edge_ids)
+        self._edge_index[edge_id] = ordinal
+        self._edge_ids.append(edge_id)
+        self._edge_src.append(src)
+        self._edge_dst.append(dst)
+        self._edge_title.append(title)
+        self._edge_description.append(description)
+        self._edge_weight.append(weight)
+
+        self._pending_out.setdefault(src, []).append(ordinal)
+        self._pending_in.setdefault(dst, []).append(ordinal)
+        self._pending_count += 1
+        self.version += 1
+        if self._listeners:
+            self._notify("add_edge", self._materialize_edge(ordinal))
+
+    def add_nodes(self, nodes: Iterable[Knowledge_Node]):
+        for node in nodes:
+            self.add_node(node)
+
+    def update_node(self, node_id: str, **changes) -> Knowledge_Node:
+        """修改节点的 name / title / description / content，同步维护索引，返回修改后的节点"""
+        if node_id not in self._node_index:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        unknown = set(changes) - NODE_UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"不能修改的节点字段: {sorted(unknown)}")
+        ordinal = self._node_index[node_id]
+        if "name" in changes:
+            self._name_index.remove(self._node_name[ordinal], node_id)
+            self._node_name[ordinal] = changes["name"]
+            self._name_index.add(changes["name"], node_id)
+        if "title" in changes:
+            self._title_index.remove(self._node_title[ordinal], node_id)
+            self._node_title[ordinal] = changes["title"]
+            self._title_index.add(changes["title"], node_id)
+        if "description" in changes or "content" in changes:
+            if self._text_pending.pop(node_id, 0) is not None:
+                self._text_index.remove(node_id)
+            self._node_description[ordinal] = changes.get("description", self._node_description[ordinal])
+            self._node_content[ordinal] = changes.get("content", self._node_content[ordinal])
+            self._text_pending[node_id] = None
+        self.version += 1
+        node = self._materialize_node(ordinal)
+        if self._listeners:
+            self._notify("update_node", node)
+        return node
+
+    def update_edge(self, edge_id: str, **changes) -> Knowledge_Edge:
+        """修改边的 title / description / weight，返回修改后的边"""
+        if edge_id not in self._edge_index:
+            raise ValueError(f"边 ID {edge_id} 不存在")
+        unknown = set(changes) - EDGE_UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"不能修改的边字段: {sorted(unknown)}")
+        ordinal = self._edge_index[edge_id]
+        if "title" in changes:
+            self._edge_title[ordinal] = changes["title"]
+        if "description" in changes:
+            self._edge_description[ordinal] = changes["description"]
+        if "weight" in changes:
+            self._edge_weight[ordinal] = changes["weight"]
+        self.version += 1
+        edge = self._materialize_edge(ordinal)
+        if self._listeners:
+            self._notify("update_edge", edge)
+        return edge
+
+    def add_edge_records(self, records: Iterable[Any]):
+        """按端点 ID 批量添加边，records 的字段约定见 Knowledge_Graph.add_edge_records"""
+        for record in records:
+            for node_id in (record.start_id, record.end_id):
+                if node_id not in self._node_index:
+                    raise ValueError(f"节点 ID {node_id} 不存在")
+            if record.id in self._edge_index:
+                raise ValueError(f"节点 ID {record.id} 已存在")
+            self._append_edge(
+                record.id, record.title, self._node_index[record.start_id], self._node_index[record.end_id],
+                record.description, record.weight,
+            )
+        self._maybe_rebuild()
+
+    def remove_node(self, node_id: str):
+        if node_id not in self._node_index:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        ordinal = self._node_index[node_id]
+        node = self._materialize_node(ordinal) if self._listeners else None
+        # 与 Knowledge_Graph.remove_nodes 相同，先入边后出边，删除通知的顺序一致
+        for edge_ordinal in self._in_edge_ordinals(ordinal) + self._out_edge_ordinals(ordinal):
+            self._drop_edge(edge_ordinal)
+
+        del self._node_index[node_id]
+        self._name_index.remove(self._node_name[ordinal], node_id)
+        self._title_index.remove(self._node_title[ordinal], node_id)
+        if self._text_pending.pop(node_id, 0) is not None:
+            self._text_index.remove(node_id)
+        self._node_ids[ordinal] = None
+        self._node_name[ordinal] = None
+        self._node_title[ordinal] = None
+        self._node_content[ordinal] = None
+        self._node_description[ordinal] = None
+        self.version += 1
+        if node is not None:
+            self._notify("remove_node", node)
+        self._maybe_rebuild()
+
+    def remove_nodes(self, node_ids: Iterable[str]):
+        node_ids = list(dict.fromkeys(node_ids))
+        for node_id in node_ids:
+            if node_id not in self._node_index:
+                raise ValueError(f"节点 ID {node_id} 不存在")
+        for node_id in node_ids:
+            self.remove_node(node_id)
+
+    def remove_edge(self, edge_id: str):
+        if edge_id not in self._edge_index:
+            raise ValueError(f'节点 ID {edge_id} 不存在')
+        self._drop_edge(self._edge_index[edge_id])
+        self._maybe_rebuild()
+
+    def remove_edges(self, edge_ids: Iterable[str]):
+        edge_ids = list(dict.fromkeys(edge_ids))
+        for edge_id in edge_ids:
+            if edge_id not in self._edge_index:
+                raise ValueError(f'节点 ID {edge_id} 不存在')
+        for edge_id in edge_ids:
+            self._drop_edge(self._edge_index[edge_id])
+        self._maybe_rebuild()
+
+    def _drop_edge(self, ordinal: int):
+        edge_id = self._edge_ids[ordinal]
+        if edge_id is None:
+            return
+        edge = self._materialize_edge(ordinal) if self._listeners else None
+        del self._edge_index[edge_id]
+        self._edge_ids[ordinal] = None
+        self._edge_title[ordinal] = None
+        self._edge_description[ordinal] = None
+        # 墓碑同样计入待合并的变更，避免长期累积
+        self._pending_count += 1
+        self.version += 1
+        if edge is not None:
+            self._notify("remove_edge", edge)
+
+    # ---------- CSR 维护 ----------
+
+    def _maybe_rebuild(self):
+        threshold = max(self.REBUILD_MIN_PENDING, len(self._edge_index) // 8)
+        if self._pending_count > threshold:
+            self._rebuild()
+
+    def _rebuild(self):
+        """压缩墓碑并把增量区合并进 CSR，复杂度 O(V + E)"""
+        if len(self._node_index) < len(self._node_ids) or len(self._edge_index) < len(self._edge_ids):
+            self._compact()
+
+        node_count = len(self._node_ids)
+        edge_count = len(self._edge_ids)
+        self._out_offsets, self._out_indices = self._build_csr(self._edge_src, node_count, edge_count)
+        self._in_offsets, self._in_indices = self._build_csr(self._edge_dst, node_count, edge_count)
+        self._pending_out = {}
+        self._pending_in = {}
+        self._pending_count = 0
+
+    @staticmethod
+    def _build_csr(keys: array, node_count: int, edge_count: int):
+        # 计数排序，同一节点内保持边的插入顺序
+        offsets = array("q", bytes(8 * (node_count + 1)))
+        for i in range(edge_count):
+            offsets[keys[i] + 1] += 1
+        for v in range(node_count):
+            offsets[v + 1] += offsets[v]
+        cursor = array("q", offsets)
+        indices = array("q", bytes(8 * edge_count))
+        for i in range(edge_count):
+            key = keys[i]
+            indices[cursor[key]] = i
+            cursor[key] += 1
+        return offsets, indices
+
+    def _compact(self):
+        """删除墓碑并重新分配连续序号"""
+        remap = array("q", [-1]) * len(self._node_ids)
+        node_ids, names, titles, descriptions, contents = [], [], [], [], []
+        for ordinal, node_id in enumerate(self._node_ids):
+            if node_id is None:
+                continue
+            remap[ordinal] = len(node_ids)
+            node_ids.append(node_id)
+            names.append(self._node_name[ordinal])
+            titles.append(self._node_title[ordinal])
+            descriptions.append(self._node_description[ordinal])
+            contents.append(self._node_content[ordinal])
+
+        edge_ids, edge_titles, edge_descriptions = [], [], []
+        src, dst, weights = array("q"), array("q"), array("d")
+        for ordinal, edge_id in enumerate(self._edge_ids):
+            if edge_id is None:
+                continue
+            edge_ids.append(edge_id)
+            edge_titles.append(self._edge_title[ordinal])
+            edge_descriptions.append(self._edge_description[ordinal])
+            weights.append(self._edge_weight[ordinal])
+            src.append(remap[self._edge_src[ordinal]])
+            dst.append(remap[self._edge_dst[ordinal]])
+
+        self._node_ids, self._node_name, self._node_title = node_ids, names, titles
+        self._node_description, self._node_content = descriptions, contents
+        self._node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self._edge_ids, self._edge_title, self._edge_description = edge_ids, edge_titles, edge_descriptions
+        self._edge_src, self._edge_dst, self._edge_weight = src, dst, weights
+        self._edge_index = {edge_id: i for i, edge_id in enumerate(edge_ids)}
+
+    def _adjacent(self, ordinal: int, offsets: array, indices: array, pending: Dict[int, List[int]]) -> List[int]:
+        result = []
+        if ordinal + 1 < len(offsets):
+            for i in range(offsets[ordinal], offsets[ordinal + 1]):
+                edge_ordinal = indices[i]
+                if self._edge_ids[edge_ordinal] is not None:
+                    result.append(edge_ordinal)
+        for edge_ordinal in pending.get(ordinal, ()):
+            if self._edge_ids[edge_ordinal] is not None:
+                result.append(edge_ordinal)
+        return result
+
+    # 重建可能压缩并改变序号，因此只在公开的写入方法末尾调用 _maybe_rebuild()，
+    # 读取接口与遍历过程中序号保持不变；增量区与墓碑由 _adjacent 直接处理
+    def _out_edge_ordinals(self, ordinal: int) -> List[int]:
+        return self._adjacent(ordinal, self._out_offsets, self._out_indices, self._pending_out)
+
+    def _in_edge_ordinals(self, ordinal: int) -> List[int]:
+        return self._adjacent(ordinal, self._in_offsets, self._in_indices, self._pending_in)
+
+    # ---------- 物化 ----------
+
+    def _materialize_node(self, ordinal: int) -> Knowledge_Node:
+        return Knowledge_Node.model_construct(
+            id=self._node_ids[ordinal],
+            name=self._node_name[ordinal],
+            title=self._node_title[ordinal],
+            description=self._node_description[ordinal],
+            content=self._node_content[ordinal],
+            in_edge=[self._edge_ids[e] for e in self._in_edge_ordinals(ordinal)],
+            out_edge=[self._edge_ids[e] for e in self._out_edge_ordinals(ordinal)],
+        )
+
+    def _materialize_edge(self, ordinal: int) -> Knowledge_Edge:
+        return Knowledge_Edge.model_construct(
+            id=self._edge_ids[ordinal],
+            title=self._edge_title[ordinal],
+            start_node=self._materialize_node(self._edge_src[ordinal]),
+            end_node=self._materialize_node(self._edge_dst[ordinal]),
+            description=self._edge_description[ordinal],
+            weight=self._edge_weight[ordinal],
+        )
+
+    # ---------- 读取 ----------
+
+    @property
+    def ordinal_capacity(self) -> int:
+        """节点序号的上界；序号只在写入触发压缩时改变"""
+        return len(self._node_ids)
+
+    def node_ordinal(self, node_id: str) -> Optional[int]:
+        return self._node_index.get(node_id)
+
+    def get_node(self, node_id: str):
+        ordinal = self._node_index.get(node_id)
+        if ordinal is None:
+            return None
+        return self._materialize_node(ordinal)
+
+    def get_edge(self, edge_id: str):
+        ordinal = self._edge_index.get(edge_id)
+        if ordinal is None:
+            return None
+        return self._materialize_edge(ordinal)
+
+    def get_all_node(self):
+        return [self._materialize_node(i) for i, node_id in enumerate(self._node_ids) if node_id is not None]
+
+    def get_all_edge(self):
+        return [self._materialize_edge(i) for i, edge_id in enumerate(self._edge_ids) if edge_id is not None]
+
+    def get_out_edge(self, node_id: str):
+        if node_id not in self._node_index:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        return [self._materialize_edge(e) for e in self._out_edge_ordinals(self._node_index[node_id])]
+
+    def get_in_edge(self, node_id: str):
+        if node_id not in self._node_index:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        return [self._materialize_edge(e) for e in self._in_edge_ordinals(self._node_index[node_id])]
+
+    def get_neighbours(self, node_id: str):
+        if node_id not in self._node_index:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        ordinal = self._node_index[node_id]
+        neighbours = {}
+        for e in self._out_edge_ordinals(ordinal):
+            neighbours[self._edge_dst[e]] = None
+        for e in self._in_edge_ordinals(ordinal):
+            neighbours[self._edge_src[e]] = None
+        neighbours.pop(ordinal, None)
+        return [self._materialize_node(v) for v in neighbours]
+
+    def get_out_neighbours(self, node_id: str):
+        if node_id not in self._node_index:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        ordinal = self._node_index[node_id]
+        return list(dict.fromkeys(self._node_ids[self._edge_dst[e]] for e in self._out_edge_ordinals(ordinal)))
+
+    def find_nodes_by_name(self, name: str) -> List[Knowledge_Node]:
+        """按 name 精确查找节点"""
+        return [self._materialize_node(self._node_index[node_id]) for node_id in self._name_index.get(name)]
+
+    def find_nodes_by_title(self, title: str) -> List[Knowledge_Node]:
+        """按 title 精确查找节点"""
+        return [self._materialize_node(self._node_index[node_id]) for node_id in self._title_index.get(title)]
+
+    def _flush_text_index(self):
+        with self._text_lock:
+            for node_id in self._text_pending:
+                ordinal = self._node_index[node_id]
+                self._text_index.add(node_id, node_text(self._node_description[ordinal], self._node_content[ordinal]))
+            self._text_pending.clear()
+
+    def search_nodes(self, query: str, limit: int = 10) -> List[Tuple[Knowledge_Node, float]]:
+        """在 description / content 中全文检索，返回按相关度降序排列的 (节点, 分数)"""
+        self._flush_text_index()
+        return [
+            (self._materialize_node(self._node_index[node_id]), score)
+            for node_id, score in self._text_index.search(query, limit)
+        ]
+
+    def k_hop(
+        self,
+        node_id: str,
+        k: int,
+        direction: str = "out",
+        edge_filter: Optional[graph_traversal.EdgeFilter] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[graph_traversal.Hop]:
+        """惰性产出 k 跳邻域内的 (节点, 到达边, 跳数)，详见 graph_traversal.k_hop"""
+        return graph_traversal.k_hop(self, node_id, k, direction, edge_filter, limit)
+
+    def subgraph(self, node_ids: Iterable[str]) -> Iterator[Tuple[Knowledge_Node, List[Knowledge_Edge]]]:
+        """惰性产出 node_ids 导出子图中的 (节点, 集合内出边)"""
+        return graph_traversal.subgraph(self, node_ids)
+
+    def find_path(
+        self,
+        start_node_id: str,
+        goal_node_id: str,
+        method: str = "bfs",
+        weight: graph_paths.WeightFn = graph_paths.default_weight,
+        heuristic: Optional[graph_paths.HeuristicFn] = None,
+    ) -> List[str]:
+        """与 Knowledge_Graph.find_path 相同；method 为 "bfs" 时使用基于序号数组的 BFS"""
+        return graph_paths.find_path(self, start_node_id, goal_node_id, method, weight, heuristic, self._bfs_path)
+
+    def _bfs_path(self, start_node_id: str, goal_node_id: str) -> List[str]:
+        if start_node_id not in self._node_index or goal_node_id not in self._node_index:
+            raise ValueError("起始或终止节点不存在")
+
+        if start_node_id == goal_node_id:
+            return [start_node_id]
+
+        start = self._node_index[start_node_id]
+        goal = self._node_index[goal_node_id]
+        parent = array("q", [-1]) * len(self._node_ids)
+        parent[start] = start
+        queue = deque([start])
+
+        while queue:
+            current = queue.popleft()
+            for e in self._out_edge_ordinals(current):
+                neighbour = self._edge_dst[e]
+                if parent[neighbour] != -1:
+                    continue
+                parent[neighbour] = current
+                if neighbour == goal:
+                    path = [goal]
+                    while path[-1] != start:
+                        path.append(parent[path[-1]])
+                    return [self._node_ids[v] for v in reversed(path)]
+                queue.append(neighbour)
+
+        return []
+
+    def find_k_shortest_paths(
+        self,
+        start_node_id: str,
+        goal_node_id: str,
+        k: int,
+        weight: graph_paths.WeightFn = graph_paths.default_weight,
+    ) -> List[Tuple[List[str], float]]:
+        """Yen 算法求前 k 条无环最短路径，返回 (路径, 总权重) 列表"""
+        return graph_paths.k_shortest_paths(self, start_node_id, goal_node_id, k, weight)
+
+    def find_paths(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        weight: Optional[graph_paths.WeightFn] = None,
+    ) -> List[List[str]]:
+        """批量查找最短路径，起点相同的查询共享搜索；weight 为空时按跳数计算"""
+        return graph_paths.batch_shortest_paths(self, pairs, weight)
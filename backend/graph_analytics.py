@@ -0,0 +1,305 @@
+"""
+知识图谱分析
+
+把图导出为稀疏邻接矩阵（COO 三元组 + 按起点排序的 CSR），在其上计算：
+- PageRank：矩阵向量乘由 np.bincount 向量化完成
+- 度中心性、基于采样源点的介数中心性近似
+- 弱连通分量
+- 先修关系的环检测与拓扑排序
+
+Graph_Analytics 会缓存计算结果，图的 version 变化后自动失效；
+没有 version 属性的图（如 SQLite_Knowledge_Graph）每次都重新计算。
+安装了 SciPy 时可用 Adjacency.to_scipy() 得到 csr_matrix 做进一步分析。
+"""
+import random
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 边过滤函数：返回 True 的边参与计算，例如只保留 title 为“先修”的边
+EdgeFilter = Callable[[Any], bool]
+
+
+class Adjacency:
+    """
+    稀疏邻接矩阵。节点按 node_ids 的顺序编号，第 i 条边为 src[i] -> dst[i]，权重 weight[i]。
+    out_offsets / out_targets 为按起点分组的 CSR，in_offsets / in_sources 为按终点分组的 CSR。
+    """
+
+    def __init__(self, node_ids: List[str], src: np.ndarray, dst: np.ndarray, weight: np.ndarray):
+        self.node_ids = node_ids
+        self.index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.src = src
+        self.dst = dst
+        self.weight = weight
+        n = len(node_ids)
+        self.out_offsets, self.out_targets = self._csr(src, dst, n)
+        self.in_offsets, self.in_sources = self._csr(dst, src, n)
+
+    @staticmethod
+    def _csr(keys: np.ndarray, values: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(keys, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=n), out=offsets[1:])
+        return offsets, values[order]
+
+    @classmethod
+    def from_graph(cls, graph, edge_filter: Optional[EdgeFilter] = None) -> "Adjacency":
+        node_ids = list(graph.nodes)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        src, dst, weight = [], [], []
+        for edge in graph.edges.values():
+            if edge_filter is not None and not edge_filter(edge):
+                continue
+            src.append(index[edge.start_node.id])
+            dst.append(index[edge.end_node.id])
+            weight.append(edge.weight)
+        return cls(
+            node_ids,
+            np.array(src, dtype=np.int64),
+            np.array(dst, dtype=np.int64),
+            np.array(weight, dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.src)
+
+    def to_scipy(self):
+        """转换为 scipy.sparse.csr_matrix，需要安装 SciPy"""
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("to_scipy 需要安装 scipy")
+        n = len(self.node_ids)
+        return csr_matrix((self.weight, (self.src, self.dst)), shape=(n, n))
+
+
+class Graph_Analytics:
+    """
+    图分析入口，按 (方法, 参数) 缓存结果，最多保留 max_entries 个，超出时按 LRU 淘汰。
+    edge_filter 按对象身份参与缓存键，需要复用结果时应传入同一个函数对象（而不是每次新建 lambda）。
+    返回的字典与列表为缓存本身，调用方不应修改。
+    """
+
+    def __init__(self, graph, max_entries: int = 32):
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须为正数")
+        self.graph = graph
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._cache_version = None
+
+    def _cached(self, key: Tuple, compute: Callable[[], Any]):
+        version = getattr(self.graph, "version", None)
+        if version is None:
+            return compute()
+        if version != self._cache_version:
+            self._cache.clear()
+            self._cache_version = version
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        result = self._cache[key] = compute()
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result
+
+    def adjacency(self, edge_filter: Optional[EdgeFilter] = None) -> Adjacency:
+        return self._cached(("adjacency", edge_filter), lambda: Adjacency.from_graph(self.graph, edge_filter))
+
+    def pagerank(
+        self,
+        damping: float = 0.85,
+        weighted: bool = False,
+        tol: float = 1e-6,
+        max_iter: int = 100,
+        edge_filter: Optional[EdgeFilter] = None,
+    ) -> Dict[str, float]:
+        """
+        幂迭代求 PageRank，结果之和为 1。
+        weighted 为 True 时按边权分配出链概率；出度为 0 的节点把得分均分给所有节点。
+        """
+        def compute():
+            adj = self.adjacency(edge_filter)
+            n = len(adj)
+            if n == 0:
+                return {}
+            w = adj.weight if weighted else np.ones(adj.edge_count)
+            out_weight = np.bincount(adj.src, weights=w, minlength=n)
+            dangling = out_weight == 0
+            # 每条边的转移概率 = 边权 / 起点出边权重之和
+            transition = w / np.where(dangling, 1.0, out_weight)[adj.src]
+            rank = np.full(n, 1.0 / n)
+            for _ in range(max_iter):
+                spread = np.bincount(adj.dst, weights=rank[adj.src] * transition, minlength=n)
+                new_rank = damping * (spread + rank[dangling].sum() / n) + (1 - damping) / n
+                converged = np.abs(new_rank - rank).sum() < tol
+                rank = new_rank
+                if converged:
+                    break
+            return dict(zip(adj.node_ids, rank.tolist()))
+
+        return self._cached(("pagerank", damping, weighted, tol, max_iter, edge_filter), compute)
+
+    def degree_centrality(self, direction: str = "both", edge_filter: Optional[EdgeFilter] = None) -> Dict[str, float]:
+        """度中心性，除以 n - 1 归一化；direction 取 "out" / "in" / "both" """
+        if direction not in ("out", "in", "both"):
+            raise ValueError(f"未知的度方向: {direction}")
+
+        def compute():
+            adj = self.adjacency(edge_filter)
+            n = len(adj)
+            degree = np.zeros(n, dtype=np.float64)
+            if direction != "in":
+                degree += np.bincount(adj.src, minlength=n)
+            if direction != "out":
+                degree += np.bincount(adj.dst, minlength=n)
+            if n > 1:
+                degree /= n - 1
+            return dict(zip(adj.node_ids, degree.tolist()))
+
+        return self._cached(("degree", direction, edge_filter), compute)
+
+    def betweenness_centrality(
+        self,
+        samples: Optional[int] = None,
+        seed: int = 0,
+        edge_filter: Optional[EdgeFilter] = None,
+    ) -> Dict[str, float]:
+        """
+        有向无权图的介数中心性（Brandes 算法），按 (n-1)(n-2) 归一化。
+        samples 给定时只从随机抽取的 samples 个源点出发，再按 n / samples 放大，得到近似值。
+        """
+        if samples is not None and samples < 1:
+            raise ValueError("samples 必须为正整数")
+
+        def compute():
+            adj = self.adjacency(edge_filter)
+            n = len(adj)
+            centrality = np.zeros(n, dtype=np.float64)
+            if n < 3:
+                return dict(zip(adj.node_ids, centrality.tolist()))
+            sources = range(n)
+            if samples is not None and samples < n:
+                sources = random.Random(seed).sample(range(n), samples)
+            offsets = adj.out_offsets.tolist()
+            targets = adj.out_targets.tolist()
+
+            for s in sources:
+                sigma = [0] * n
+                dist = [-1] * n
+                preds: List[List[int]] = [[] for _ in range(n)]
+                sigma[s], dist[s] = 1, 0
+                order = []
+                queue = deque([s])
+                while queue:
+                    v = queue.popleft()
+                    order.append(v)
+                    for w in targets[offsets[v]:offsets[v + 1]]:
+                        if dist[w] < 0:
+                            dist[w] = dist[v] + 1
+                            queue.append(w)
+                        if dist[w] == dist[v] + 1:
+                            sigma[w] += sigma[v]
+                            preds[w].append(v)
+                delta = [0.0] * n
+                for w in reversed(order):
+                    for v in preds[w]:
+                        delta[v] += sigma[v] / sigma[w] * (1 + delta[w])
+                    if w != s:
+                        centrality[w] += delta[w]
+
+            scale = 1.0 / ((n - 1) * (n - 2))
+            if samples is not None and samples < n:
+                scale *= n / samples
+            return dict(zip(adj.node_ids, (centrality * scale).tolist()))
+
+        return self._cached(("betweenness", samples, seed, edge_filter), compute)
+
+    def connected_components(self, edge_filter: Optional[EdgeFilter] = None) -> List[List[str]]:
+        """弱连通分量，按大小降序排列；分量内节点保持图中的插入顺序"""
+        def compute():
+            adj = self.adjacency(edge_filter)
+            n = len(adj)
+            labels = np.arange(n)
+            # 标签传播：每轮让每条边两端取较小标签，再做指针跳跃压缩
+            while True:
+                previous = labels.copy()
+                low = np.minimum(labels[adj.src], labels[adj.dst])
+                np.minimum.at(labels, adj.src, low)
+                np.minimum.at(labels, adj.dst, low)
+                labels = labels[labels]
+                if np.array_equal(labels, previous):
+                    break
+            groups: Dict[int, List[str]] = {}
+            for node_id, label in zip(adj.node_ids, labels.tolist()):
+                groups.setdefault(label, []).append(node_id)
+            return sorted(groups.values(), key=len, reverse=True)
+
+        return self._cached(("components", edge_filter), compute)
+
+    def _kahn(self, adj: Adjacency) -> Tuple[List[int], np.ndarray]:
+        """分层 Kahn 算法，返回 (已排序的节点编号, 剩余入度)；剩余入度非零的节点位于环上或环的下游"""
+        indegree = np.bincount(adj.dst, minlength=len(adj))
+        offsets = adj.out_offsets
+        targets = adj.out_targets
+        frontier = np.flatnonzero(indegree == 0)
+        order: List[int] = []
+        while len(frontier):
+            order.extend(frontier.tolist())
+            # 一次取出整层节点的全部出边
+            starts, ends = offsets[frontier], offsets[frontier + 1]
+            lengths = ends - starts
+            if not lengths.sum():
+                break
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            released = targets[positions]
+            np.subtract.at(indegree, released, 1)
+            frontier = np.unique(released[indegree[released] == 0])
+        return order, indegree
+
+    def topological_order(self, edge_filter: Optional[EdgeFilter] = None) -> List[str]:
+        """
+        按先修关系（边的起点先于终点）给出学习顺序，同一层内按图中的插入顺序排列。
+        存在环时抛出 ValueError。
+        """
+        def compute():
+            adj = self.adjacency(edge_filter)
+            order, _ = self._kahn(adj)
+            if len(order) < len(adj):
+                cycle = self.find_cycle(edge_filter)
+                raise ValueError(f"先修关系中存在环: {' -> '.join(cycle)}")
+            return [adj.node_ids[i] for i in order]
+
+        return self._cached(("topological_order", edge_filter), compute)
+
+    def find_cycle(self, edge_filter: Optional[EdgeFilter] = None) -> List[str]:
+        """返回一个环上的节点（首尾相同），无环时返回空列表"""
+        def compute():
+            adj = self.adjacency(edge_filter)
+            _, indegree = self._kahn(adj)
+            remaining = indegree > 0
+            if not remaining.any():
+                return []
+            # 剩余节点都至少有一个剩余前驱，沿前驱回溯必然进入环
+            node = int(np.flatnonzero(remaining)[0])
+            seen: Dict[int, int] = {}
+            walk: List[int] = []
+            while node not in seen:
+                seen[node] = len(walk)
+                walk.append(node)
+                sources = adj.in_sources[adj.in_offsets[node]:adj.in_offsets[node + 1]]
+                node = int(sources[remaining[sources]][0])
+            cycle = walk[seen[node]:][::-1]
+            cycle.append(cycle[0])
+            return [adj.node_ids[i] for i in cycle]
+
+        return self._cached(("find_cycle", edge_filter), compute)
+
+    def has_cycle(self, edge_filter: Optional[EdgeFilter] = None) -> bool:
+        return bool(self.find_cycle(edge_filter))
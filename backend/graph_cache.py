@@ -0,0 +1,161 @@
+"""
+知识图谱查询缓存
+
+Cached_Graph 包装任意提供 version 属性的图，对邻居、路径、检索等只读查询做记忆化：
+- 缓存按 (方法, 参数) 索引，图的 version 变化时整体失效
+- 条目数超过 max_entries、或结果总规模（列表长度之和）超过 max_items 时按 LRU 淘汰
+- cache_info() 返回命中 / 未命中 / 淘汰 / 失效次数
+
+命中时返回缓存结果的浅拷贝，修改返回的列表不会影响缓存；节点与边对象本身仍是共享的。
+没有 version 属性的图每次都直接查询，不做缓存。未列出的属性与方法原样转发给被包装的图。
+
+缓存的读写由一把锁保护，可以在多个线程（例如 Agent 的工具线程池）中共用；
+查询本身在锁外执行，计算期间图的 version 变化时结果不写入缓存。
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import graph_paths
+import graph_traversal
+
+
+class Cache_Info(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    entries: int
+    items: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _result_size(result: Any) -> int:
+    return len(result) if isinstance(result, (list, tuple, dict)) else 1
+
+
+class Cached_Graph:
+    """带 LRU 查询缓存的图包装，见模块说明"""
+
+    def __init__(self, graph, max_entries: int = 1024, max_items: Optional[int] = None):
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须为正数")
+        self.graph = graph
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._items = 0
+        self._version = getattr(graph, "version", None)
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        return getattr(self.graph, name)
+
+    def cache_info(self) -> Cache_Info:
+        with self._lock:
+            return Cache_Info(self._hits, self._misses, self._evictions, self._invalidations, len(self._entries), self._items)
+
+    def cache_clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._items = 0
+
+    def _sync_version(self, version):
+        """在 _lock 内调用：图的 version 变化时清空缓存"""
+        if version != self._version:
+            if self._entries:
+                self._invalidations += 1
+            self._clear()
+            self._version = version
+
+    def _lookup(self, key: Tuple[Hashable, ...], compute: Callable[[], Any]):
+        version = getattr(self.graph, "version", None)
+        if version is None:
+            return compute()
+        try:
+            hash(key)
+        except TypeError:
+            # 参数不可哈希（例如传入了列表），直接查询
+            return compute()
+
+        with self._lock:
+            self._sync_version(version)
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+            else:
+                self._misses += 1
+        if cached is not None:
+            result = cached[0]
+        else:
+            result = compute()
+            with self._lock:
+                # 计算期间图被修改时结果可能已经过期，不写入缓存
+                if getattr(self.graph, "version", None) == version == self._version:
+                    size = _result_size(result)
+                    previous = self._entries.get(key)
+                    if previous is not None:
+                        self._items -= previous[1]
+                    self._entries[key] = (result, size)
+                    self._items += size
+                    self._evict()
+        return list(result) if isinstance(result, list) else result
+
+    def _evict(self):
+        # 在 _lock 内调用；至少保留刚写入的一条，单个超大结果也能被缓存
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or (self.max_items is not None and self._items > self.max_items)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._items -= size
+            self._evictions += 1
+
+    # ---------- 被缓存的只读查询 ----------
+
+    def get_out_edge(self, node_id: str):
+        return self._lookup(("get_out_edge", node_id), lambda: self.graph.get_out_edge(node_id))
+
+    def get_in_edge(self, node_id: str):
+        return self._lookup(("get_in_edge", node_id), lambda: self.graph.get_in_edge(node_id))
+
+    def get_neighbours(self, node_id: str):
+        return self._lookup(("get_neighbours", node_id), lambda: self.graph.get_neighbours(node_id))
+
+    def get_out_neighbours(self, node_id: str):
+        return self._lookup(("get_out_neighbours", node_id), lambda: self.graph.get_out_neighbours(node_id))
+
+    def find_path(self, start_node_id: str, goal_node_id: str, *args, **kwargs) -> List[str]:
+        key = ("find_path", start_node_id, goal_node_id, args, tuple(sorted(kwargs.items())))
+        return self._lookup(key, lambda: self.graph.find_path(start_node_id, goal_node_id, *args, **kwargs))
+
+    def find_k_shortest_paths(
+        self,
+        start_node_id: str,
+        goal_node_id: str,
+        k: int,
+        weight: graph_paths.WeightFn = graph_paths.default_weight,
+    ):
+        key = ("find_k_shortest_paths", start_node_id, goal_node_id, k, weight)
+        return self._lookup(key, lambda: graph_paths.k_shortest_paths(self.graph, start_node_id, goal_node_id, k, weight))
+
+    def find_paths(self, pairs: Iterable[Tuple[str, str]], weight: Optional[graph_paths.WeightFn] = None):
+        pairs = tuple(pairs)
+        return self._lookup(("find_paths", pairs, weight), lambda: graph_paths.batch_shortest_paths(self.graph, pairs, weight))
+
+    def search_nodes(self, query: str, limit: int = 10):
+        return self._lookup(("search_nodes", query, limit), lambda: self.graph.search_nodes(query, limit))
+
+    def k_hop(self, node_id: str, k: int, direction: str = "out", edge_filter=None, limit: Optional[int] = None):
+        """缓存完整的 k 跳结果列表；需要提前终止的惰性遍历请直接使用 graph.k_hop"""
+        key = ("k_hop", node_id, k, direction, edge_filter, limit)
+        return self._lookup(key, lambda: list(graph_traversal.k_hop(self.graph, node_id, k, direction, edge_filter, limit)))
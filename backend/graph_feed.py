@@ -0,0 +1,161 @@
+"""
+知识图谱变更推送
+
+Graph_Feed 通过 Knowledge_Graph.subscribe 监听修改，把每次修改转换为紧凑的增量（delta），
+分发给各个订阅者（Feed_Subscriber）。每个订阅者独立合并与限流：
+
+- 合并：待发送的增量按对象（节点 / 边 ID）去重，同一对象只保留最后一次的状态；
+  upsert 总是携带对象的完整可见字段，因此合并后的结果与逐条应用一致。
+  一批增量按 节点写入、边写入、边删除、节点删除 的顺序输出，保证边引用的节点已经存在。
+- 背压：订阅者在 interval 时间窗内攒批；发送跟不上时待发送增量继续合并，
+  超过 max_pending 个对象后丢弃全部待发送增量，改为发送一条 resync 通知，
+  客户端收到后重新拉取整张图。每个客户端占用的内存因此有上限。
+
+增量格式：
+    {"op": "upsert_node", "id", "name", "title", "description"}
+    {"op": "upsert_edge", "id", "start", "end", "title", "weight"}
+    {"op": "remove_node", "id"}
+    {"op": "remove_edge", "id"}
+"""
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+# 合并键：(对象类别, ID)，类别为 "node" 或 "edge"
+_Key = Tuple[str, str]
+
+# 一批增量中各操作的输出顺序
+_OP_ORDER = ("upsert_node", "upsert_edge", "remove_edge", "remove_node")
+
+
+def to_delta(event: str, obj) -> Tuple[_Key, Dict[str, Any]]:
+    """把 (事件, 对象) 转换为 (合并键, 增量)"""
+    if event in ("add_node", "update_node"):
+        return ("node", obj.id), {
+            "op": "upsert_node", "id": obj.id, "name": obj.name, "title": obj.title, "description": obj.description,
+        }
+    if event in ("add_edge", "update_edge"):
+        return ("edge", obj.id), {
+            "op": "upsert_edge", "id": obj.id, "start": obj.start_node.id, "end": obj.end_node.id,
+            "title": obj.title, "weight": obj.weight,
+        }
+    if event == "remove_node":
+        return ("node", obj.id), {"op": "remove_node", "id": obj.id}
+    if event == "remove_edge":
+        return ("edge", obj.id), {"op": "remove_edge", "id": obj.id}
+    raise ValueError(f"未知的图变更事件: {event}")
+
+
+class Feed_Subscriber:
+    """单个订阅者的待发送队列，通过 batches() 异步读取合并后的增量批次"""
+
+    def __init__(self, feed: "Graph_Feed", interval: float, max_pending: int):
+        self.feed = feed
+        self.interval = interval
+        self.max_pending = max_pending
+        self.dropped = 0  # 因背压触发 resync 的次数
+        self._pending: Dict[_Key, Dict[str, Any]] = {}
+        self._overflow = False
+        self._closed = False
+        self._ready = asyncio.Event()
+
+    def _push(self, key: _Key, delta: Dict[str, Any]):
+        if self._overflow:
+            return
+        self._pending[key] = delta
+        if len(self._pending) > self.max_pending:
+            self._pending.clear()
+            self._overflow = True
+            self.dropped += 1
+        self._ready.set()
+
+    def _take(self) -> Dict[str, Any]:
+        version = self.feed.graph.version
+        if self._overflow:
+            self._overflow = False
+            return {"version": version, "resync": True, "deltas": []}
+        groups: Dict[str, List[Dict[str, Any]]] = {op: [] for op in _OP_ORDER}
+        for delta in self._pending.values():
+            groups[delta["op"]].append(delta)
+        self._pending.clear()
+        return {"version": version, "resync": False, "deltas": [delta for op in _OP_ORDER for delta in groups[op]]}
+
+    def close(self):
+        """取消订阅，正在等待的 batches() 随即结束"""
+        if not self._closed:
+            self._closed = True
+            self.feed._remove(self)
+            self._ready.set()
+
+    async def batches(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐批产出 {"version", "resync", "deltas"}，没有变更时挂起等待。
+        调用方处理一批（例如发送到网络）期间到达的变更会合并进下一批。
+        """
+        while not self._closed:
+            await self._ready.wait()
+            if self._closed:
+                return
+            if self.interval > 0:
+                await asyncio.sleep(self.interval)
+            self._ready.clear()
+            if self._pending or self._overflow:
+                yield self._take()
+
+
+class Graph_Feed:
+    """
+    图变更的分发器，整张图只注册一个监听器，增量只生成一次后分发给全部订阅者。
+    必须在事件循环中创建；在其他线程中修改图时，增量会经 call_soon_threadsafe 转交给事件循环。
+    """
+
+    def __init__(self, graph, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.graph = graph
+        self._loop = loop or asyncio.get_running_loop()
+        self._subscribers: Set[Feed_Subscriber] = set()
+        self._lock = threading.Lock()
+        graph.subscribe(self._on_change)
+
+    def close(self):
+        self.graph.unsubscribe(self._on_change)
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, interval: float = 0.05, max_pending: int = 10000) -> Feed_Subscriber:
+        """新增订阅者；interval 为攒批的时间窗（秒），max_pending 为触发 resync 的待发送对象数"""
+        if interval < 0:
+            raise ValueError("interval 不能为负数")
+        if max_pending < 1:
+            raise ValueError("max_pending 必须为正整数")
+        subscriber = Feed_Subscriber(self, interval, max_pending)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def _remove(self, subscriber: Feed_Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _dispatch(self, key: _Key, delta: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber._push(key, delta)
+
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _on_change(self, event: str, obj):
+        if not self._subscribers:
+            return
+        key, delta = to_delta(event, obj)
+        if self._in_loop():
+            self._dispatch(key, delta)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, key, delta)
@@ -0,0 +1,93 @@
+"""
+节点 / 边 ID 的分配与驻留
+
+- ID_Allocator: 从随机起点开始单调递增的计数器，编码为 8 位 base36 字符串。
+  同一进程内 36^8（约 2.8 万亿）个 ID 之内保证不重复。计数器只在进程内唯一，
+  不同进程的随机起点使区间重叠的概率很低但不为零；分配器不读取已有数据，
+  冲突在写入时检测：各存储按 ID 去重并拒绝重复写入（ValueError），
+  由存储自行分配 ID 的写入（例如未指定 ID 的跨分片边）遇到冲突时重新分配。
+- Id_Interner: 把字符串 ID 映射为稠密整数序号，释放的序号会被复用，
+  供位图等按整数下标访问的热点路径使用。
+"""
+import secrets
+import threading
+from typing import Dict, List, Optional
+
+ID_LENGTH = 8
+_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+_ID_SPACE = len(_ALPHABET) ** ID_LENGTH
+
+
+class ID_Allocator:
+    """生成定长 base36 ID，可调用对象，适合作为 pydantic 的 default_factory；可在多个线程中共用"""
+
+    def __init__(self, start: Optional[int] = None):
+        if start is None:
+            start = secrets.randbelow(_ID_SPACE)
+        self._next = start % _ID_SPACE
+        self._lock = threading.Lock()
+
+    def __call__(self) -> str:
+        with self._lock:
+            value = self._next
+            self._next = (value + 1) % _ID_SPACE
+        chars = []
+        for _ in range(ID_LENGTH):
+            value, digit = divmod(value, len(_ALPHABET))
+            chars.append(_ALPHABET[digit])
+        return "".join(reversed(chars))
+
+
+new_id = ID_Allocator()
+
+
+class Id_Interner:
+    """字符串 ID 与稠密整数序号的双向映射"""
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = []  # None 表示序号空闲
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    @property
+    def capacity(self) -> int:
+        """当前分配过的最大序号 + 1，按序号开辟位图时使用"""
+        return len(self._keys)
+
+    def intern(self, key: str) -> int:
+        ordinal = self._index.get(key)
+        if ordinal is not None:
+            return ordinal
+        if self._free:
+            ordinal = self._free.pop()
+            self._keys[ordinal] = key
+        else:
+            ordinal = len(self._keys)
+            self._keys.append(key)
+        self._index[key] = ordinal
+        return ordinal
+
+    def release(self, key: str):
+        ordinal = self._index.pop(key, None)
+        if ordinal is not None:
+            self._keys[ordinal] = None
+            self._free.append(ordinal)
+
+    def copy(self) -> "Id_Interner":
+        interner = Id_Interner()
+        interner._index = dict(self._index)
+        interner._keys = list(self._keys)
+        interner._free = list(self._free)
+        return interner
+
+    def get(self, key: str) -> Optional[int]:
+        return self._index.get(key)
+
+    def key(self, ordinal: int) -> Optional[str]:
+        return self._keys[ordinal]
@@ -0,0 +1,145 @@
+"""
+知识图谱二级索引
+
+- Attribute_Index: 属性值 -> 节点 ID 的哈希索引，用于按 name / title 精确查找
+- Text_Index: 面向中英文混合文本的倒排索引，使用 BM25 打分
+
+中文不依赖分词词典：连续的中日韩字符同时切分为单字与相邻二字组，
+英文与数字按单词切分并转为小写。
+"""
+import heapq
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[㐀-䶿一-鿿豈-﫿぀-ヿ가-힯]+")
+_CJK_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿぀-ヿ가-힯]")
+
+
+def tokenize(text: str) -> List[str]:
+    """把文本切分为检索词：英文单词、中文单字以及中文二字组"""
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if not _CJK_PATTERN.match(run):
+            tokens.append(run)
+            continue
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def content_to_text(content: Any) -> str:
+    """把任意类型的节点 content 转为可检索的文本"""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    try:
+        return json.dumps(content, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return str(content)
+
+
+class Attribute_Index:
+    """属性值到节点 ID 的哈希索引，同一取值下保持插入顺序"""
+
+    def __init__(self):
+        self._index: Dict[Hashable, Dict[str, None]] = {}
+
+    def add(self, value: Hashable, node_id: str):
+        if value is None:
+            return
+        self._index.setdefault(value, {})[node_id] = None
+
+    def remove(self, value: Hashable, node_id: str):
+        ids = self._index.get(value)
+        if ids is None:
+            return
+        ids.pop(node_id, None)
+        if not ids:
+            del self._index[value]
+
+    def get(self, value: Hashable) -> List[str]:
+        return list(self._index.get(value, ()))
+
+    def copy(self) -> "Attribute_Index":
+        index = Attribute_Index()
+        index._index = {value: dict(ids) for value, ids in self._index.items()}
+        return index
+
+
+class Text_Index:
+    """
+    倒排索引，按 BM25 对文档排序。
+    文档以 ID 标识，重复 add 同一 ID 会先移除旧内容。
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}  # 检索词 -> {文档 ID: 词频}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}  # 文档 ID -> {检索词: 词频}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: str, text: str):
+        if doc_id in self._doc_len:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        if length == 0:
+            return
+        self._doc_terms[doc_id] = dict(terms)
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[term]
+
+    def copy(self) -> "Text_Index":
+        """复制倒排表，单个文档的词频字典不会被原地修改，可以直接共享"""
+        index = Text_Index(self.k1, self.b)
+        index._postings = {term: dict(posting) for term, posting in self._postings.items()}
+        index._doc_terms = dict(self._doc_terms)
+        index._doc_len = dict(self._doc_len)
+        index._total_len = self._total_len
+        return index
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """返回按相关度降序排列的 (文档 ID, 分数)"""
+        doc_count = len(self._doc_len)
+        if doc_count == 0 or limit <= 0:
+            return []
+        avg_len = self._total_len / doc_count
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def node_text(description: Any, content: Any) -> str:
+    """拼接节点参与全文检索的字段"""
+    parts: Iterable[str] = (description or "", content_to_text(content))
+    return "\n".join(part for part in parts if part)
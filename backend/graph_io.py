@@ -0,0 +1,160 @@
+"""
+知识图谱批量导入 / 导出
+
+节点与边分别存放在两个文件中，支持 JSONL 与 CSV 两种格式（按扩展名判断）：
+- 节点字段：id, name, title, description, content
+- 边字段：id, title, start_id, end_id, description, weight
+
+文件以生成器逐行读取，每 batch_size 条记录做一次批量校验后写入图，
+内存占用只与批大小有关。边只通过 start_id / end_id 引用已导入的节点。
+CSV 中 content 列保存 JSON 文本，空字符串视为缺失。
+"""
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+from graph_ids import new_id
+from knowledge_graph import Knowledge_Node
+
+NODE_FIELDS = ["id", "name", "title", "description", "content"]
+EDGE_FIELDS = ["id", "title", "start_id", "end_id", "description", "weight"]
+
+
+class Edge_Record(BaseModel):
+    """以端点 ID 表示的边，用于批量导入"""
+    id: str = Field(default_factory=new_id)
+    title: Optional[str] = None
+    start_id: str
+    end_id: str
+    description: Optional[str] = None
+    weight: float = 1.0
+
+
+_node_batch_adapter = TypeAdapter(List[Knowledge_Node])
+_edge_batch_adapter = TypeAdapter(List[Edge_Record])
+
+
+def _detect_format(path, format: Optional[str]) -> str:
+    if format is None:
+        format = Path(path).suffix.lstrip(".").lower()
+    if format not in ("jsonl", "csv"):
+        raise ValueError(f"不支持的文件格式: {format}")
+    return format
+
+
+def _read_records(path, format: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if format == "jsonl":
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path} 第 {line_no} 行不是合法的 JSON: {e}")
+        else:
+            for row in csv.DictReader(f):
+                record = {key: value for key, value in row.items() if value != ""}
+                if "content" in record:
+                    record["content"] = json.loads(record["content"])
+                yield record
+
+
+def _batched(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _validate(adapter: TypeAdapter, batch: List[Dict[str, Any]], path, offset: int) -> list:
+    try:
+        return adapter.validate_python(batch)
+    except ValidationError as e:
+        first = e.errors()[0]
+        record_no = offset + first["loc"][0] + 1
+        raise ValueError(f"{path} 第 {record_no} 条记录校验失败: {first['msg']} ({first['loc'][1:]})")
+
+
+def bulk_load(graph, nodes_path, edges_path=None, format: Optional[str] = None, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    从文件流式导入节点与边，返回导入数量 {"nodes": n, "edges": m}。
+    出错时抛出 ValueError，出错批次之前的数据已经写入图中。
+    """
+    counts = {"nodes": 0, "edges": 0}
+
+    node_format = _detect_format(nodes_path, format)
+    for batch in _batched(_read_records(nodes_path, node_format), batch_size):
+        for record in batch:
+            # 邻接列表由边重建，忽略文件中可能存在的旧值
+            record.pop("in_edge", None)
+            record.pop("out_edge", None)
+        nodes = _validate(_node_batch_adapter, batch, nodes_path, counts["nodes"])
+        graph.add_nodes(nodes)
+        counts["nodes"] += len(nodes)
+
+    if edges_path is not None:
+        edge_format = _detect_format(edges_path, format)
+        for batch in _batched(_read_records(edges_path, edge_format), batch_size):
+            records = _validate(_edge_batch_adapter, batch, edges_path, counts["edges"])
+            graph.add_edge_records(records)
+            counts["edges"] += len(records)
+
+    return counts
+
+
+def _node_row(node) -> Dict[str, Any]:
+    return {
+        "id": node.id,
+        "name": node.name,
+        "title": node.title,
+        "description": node.description,
+        "content": node.content,
+    }
+
+
+def _edge_row(edge) -> Dict[str, Any]:
+    return {
+        "id": edge.id,
+        "title": edge.title,
+        "start_id": edge.start_node.id,
+        "end_id": edge.end_node.id,
+        "description": edge.description,
+        "weight": edge.weight,
+    }
+
+
+def _write_records(path, format: str, fields: List[str], rows: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if format == "jsonl":
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write("\n")
+                count += 1
+        else:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in rows:
+                if row.get("content") is not None:
+                    row["content"] = json.dumps(row["content"], ensure_ascii=False)
+                writer.writerow({key: "" if value is None else value for key, value in row.items()})
+                count += 1
+    return count
+
+
+def bulk_dump(graph, nodes_path, edges_path, format: Optional[str] = None) -> Dict[str, int]:
+    """把图逐条写出到节点 / 边文件，返回导出数量 {"nodes": n, "edges": m}"""
+    return {
+        "nodes": _write_records(
+            nodes_path, _detect_format(nodes_path, format), NODE_FIELDS,
+            (_node_row(node) for node in graph.nodes.values()),
+        ),
+        "edges": _write_records(
+            edges_path, _detect_format(edges_path, format), EDGE_FIELDS,
+            (_edge_row(edge) for edge in graph.edges.values()),
+        ),
+    }
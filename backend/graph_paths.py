@@ -0,0 +1,320 @@
+"""
+知识图谱路径算法
+
+所有函数只依赖图对象的公开接口（nodes / get_out_edge / get_in_edge），
+因此同样适用于 Knowledge_Graph、Compact_Knowledge_Graph 与 SQLite_Knowledge_Graph。
+"""
+import heapq
+from itertools import count
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# 边权函数：接收一条边，返回非负权重；默认读取 Knowledge_Edge.weight
+WeightFn = Callable[[object], float]
+# 启发函数：接收 (当前节点 ID, 目标节点 ID)，返回不高估真实代价的下界
+HeuristicFn = Callable[[str, str], float]
+
+
+def default_weight(edge) -> float:
+    return getattr(edge, "weight", 1.0)
+
+
+def _check_nodes(graph, *node_ids: str):
+    for node_id in node_ids:
+        if node_id not in graph.nodes:
+            raise ValueError("起始或终止节点不存在")
+
+
+def _edge_weight(weight: WeightFn, edge) -> float:
+    w = weight(edge)
+    if w < 0:
+        raise ValueError(f"边 {edge.id} 的权重为负数，无法计算最短路径")
+    return w
+
+
+def bidirectional_bfs(graph, start_node_id: str, goal_node_id: str) -> List[str]:
+    """
+    双向 BFS 求无权最短路径，每轮扩展当前较小的一侧前沿。
+    找不到路径时返回空列表。
+    """
+    _check_nodes(graph, start_node_id, goal_node_id)
+    if start_node_id == goal_node_id:
+        return [start_node_id]
+
+    forward_parent: Dict[str, Optional[str]] = {start_node_id: None}
+    backward_parent: Dict[str, Optional[str]] = {goal_node_id: None}
+    forward_frontier = [start_node_id]
+    backward_frontier = [goal_node_id]
+
+    while forward_frontier and backward_frontier:
+        forward = len(forward_frontier) <= len(backward_frontier)
+        if forward:
+            frontier, parent, other = forward_frontier, forward_parent, backward_parent
+        else:
+            frontier, parent, other = backward_frontier, backward_parent, forward_parent
+
+        next_frontier = []
+        meeting = None
+        # 遇到第一个相遇点即可结束：此前两侧已访问的节点没有交集，说明最短路径长于两侧已扩展的层数之和，
+        # 而经过相遇点的路径至多比两侧层数之和多一步，因此已是最短
+        for current_id in frontier:
+            edges = graph.get_out_edge(current_id) if forward else graph.get_in_edge(current_id)
+            for edge in edges:
+                neighbour_id = edge.end_node.id if forward else edge.start_node.id
+                if neighbour_id in parent:
+                    continue
+                parent[neighbour_id] = current_id
+                if neighbour_id in other:
+                    meeting = neighbour_id
+                    break
+                next_frontier.append(neighbour_id)
+            if meeting is not None:
+                break
+
+        if meeting is not None:
+            path = []
+            node_id = meeting
+            while node_id is not None:
+                path.append(node_id)
+                node_id = forward_parent[node_id]
+            path.reverse()
+            node_id = backward_parent[meeting]
+            while node_id is not None:
+                path.append(node_id)
+                node_id = backward_parent[node_id]
+            return path
+
+        if forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return []
+
+
+def _best_first(
+    graph,
+    start_node_id: str,
+    goal_node_id: str,
+    weight: WeightFn,
+    heuristic: Optional[HeuristicFn] = None,
+    blocked_nodes: Set[str] = frozenset(),
+    blocked_edges: Set[str] = frozenset(),
+) -> Tuple[List[str], List[str], float]:
+    """A* 搜索（heuristic 为空时即 Dijkstra），返回 (节点路径, 边路径, 总代价)"""
+    tie = count()
+    dist: Dict[str, float] = {start_node_id: 0.0}
+    parent: Dict[str, Tuple[Optional[str], Optional[str]]] = {start_node_id: (None, None)}
+    h = heuristic or (lambda node_id, goal_id: 0.0)
+    heap = [(h(start_node_id, goal_node_id), next(tie), start_node_id)]
+    settled: Set[str] = set()
+
+    while heap:
+        _, _, current_id = heapq.heappop(heap)
+        if current_id in settled:
+            continue
+        if current_id == goal_node_id:
+            nodes, edges = [current_id], []
+            while parent[nodes[-1]][0] is not None:
+                prev_id, edge_id = parent[nodes[-1]]
+                edges.append(edge_id)
+                nodes.append(prev_id)
+            return nodes[::-1], edges[::-1], dist[current_id]
+        settled.add(current_id)
+
+        for edge in graph.get_out_edge(current_id):
+            neighbour_id = edge.end_node.id
+            if edge.id in blocked_edges or neighbour_id in blocked_nodes or neighbour_id in settled:
+                continue
+            new_dist = dist[current_id] + _edge_weight(weight, edge)
+            if new_dist < dist.get(neighbour_id, float("inf")):
+                dist[neighbour_id] = new_dist
+                parent[neighbour_id] = (current_id, edge.id)
+                heapq.heappush(heap, (new_dist + h(neighbour_id, goal_node_id), next(tie), neighbour_id))
+
+    return [], [], float("inf")
+
+
+def dijkstra(graph, start_node_id: str, goal_node_id: str, weight: WeightFn = default_weight) -> Tuple[List[str], float]:
+    """带权最短路径，返回 (节点路径, 总代价)；不可达时返回 ([], inf)"""
+    _check_nodes(graph, start_node_id, goal_node_id)
+    nodes, _, cost = _best_first(graph, start_node_id, goal_node_id, weight)
+    return nodes, cost
+
+
+def astar(
+    graph,
+    start_node_id: str,
+    goal_node_id: str,
+    heuristic: HeuristicFn,
+    weight: WeightFn = default_weight,
+) -> Tuple[List[str], float]:
+    """A* 最短路径，heuristic 需为可采纳的下界估计"""
+    _check_nodes(graph, start_node_id, goal_node_id)
+    nodes, _, cost = _best_first(graph, start_node_id, goal_node_id, weight, heuristic)
+    return nodes, cost
+
+
+def find_path(
+    graph,
+    start_node_id: str,
+    goal_node_id: str,
+    method: str = "bfs",
+    weight: WeightFn = default_weight,
+    heuristic: Optional[HeuristicFn] = None,
+    bfs: Optional[Callable[[str, str], List[str]]] = None,
+) -> List[str]:
+    """
+    按 method（"bfs" / "dijkstra" / "astar"）查找最短路径，找不到时返回空列表。
+    bfs 为图自身更快的无权搜索实现，为空时使用 bidirectional_bfs。
+    """
+    if method == "bfs":
+        if bfs is not None:
+            return bfs(start_node_id, goal_node_id)
+        return bidirectional_bfs(graph, start_node_id, goal_node_id)
+    elif method == "dijkstra":
+        return dijkstra(graph, start_node_id, goal_node_id, weight)[0]
+    elif method == "astar":
+        if heuristic is None:
+            raise ValueError("A* 搜索需要提供 heuristic")
+        return astar(graph, start_node_id, goal_node_id, heuristic, weight)[0]
+    raise ValueError(f"未知的路径算法: {method}")
+
+
+def k_shortest_paths(
+    graph,
+    start_node_id: str,
+    goal_node_id: str,
+    k: int,
+    weight: WeightFn = default_weight,
+) -> List[Tuple[List[str], float]]:
+    """Yen 算法求前 k 条无环最短路径，按总代价升序返回 (节点路径, 总代价)"""
+    _check_nodes(graph, start_node_id, goal_node_id)
+    if k <= 0:
+        return []
+
+    nodes, edges, cost = _best_first(graph, start_node_id, goal_node_id, weight)
+    if not nodes:
+        return []
+    accepted = [(nodes, edges, cost)]
+    candidates: List[Tuple[float, int, List[str], List[str]]] = []
+    seen = {tuple(edges)}
+    tie = count()
+    edge_cost: Dict[str, float] = {}
+
+    def path_cost(edge_ids: List[str]) -> float:
+        total = 0.0
+        for edge_id in edge_ids:
+            if edge_id not in edge_cost:
+                edge_cost[edge_id] = _edge_weight(weight, graph.get_edge(edge_id))
+            total += edge_cost[edge_id]
+        return total
+
+    while len(accepted) < k:
+        last_nodes, last_edges, _ = accepted[-1]
+        for i in range(len(last_nodes) - 1):
+            spur_id = last_nodes[i]
+            root_nodes, root_edges = last_nodes[: i + 1], last_edges[:i]
+
+            # 屏蔽与已有路径共享同一前缀时的下一条边，以及前缀上的节点
+            blocked_edges = {
+                path_edges[i]
+                for path_nodes, path_edges, _ in accepted
+                if len(path_edges) > i and path_nodes[: i + 1] == root_nodes and path_edges[:i] == root_edges
+            }
+            blocked_nodes = set(root_nodes[:-1])
+
+            spur_nodes, spur_edges, _ = _best_first(
+                graph, spur_id, goal_node_id, weight, None, blocked_nodes, blocked_edges
+            )
+            if not spur_nodes:
+                continue
+            total_edges = root_edges + spur_edges
+            if tuple(total_edges) in seen:
+                continue
+            seen.add(tuple(total_edges))
+            heapq.heappush(candidates, (path_cost(total_edges), next(tie), root_nodes[:-1] + spur_nodes, total_edges))
+
+        if not candidates:
+            break
+        cost, _, nodes, edges = heapq.heappop(candidates)
+        accepted.append((nodes, edges, cost))
+
+    return [(nodes, cost) for nodes, _, cost in accepted]
+
+
+def batch_shortest_paths(
+    graph,
+    pairs: Iterable[Tuple[str, str]],
+    weight: Optional[WeightFn] = None,
+) -> List[List[str]]:
+    """
+    批量求最短路径，结果与 pairs 顺序一致。
+    起点相同的查询共享一次单源搜索：搜索在该起点的所有终点都确定后停止，
+    之后各终点直接沿同一棵父节点树回溯。
+    weight 为空时按跳数（BFS），否则按边权（Dijkstra）。
+    """
+    pairs = list(pairs)
+    goals_by_start: Dict[str, Set[str]] = {}
+    for start_node_id, goal_node_id in pairs:
+        _check_nodes(graph, start_node_id, goal_node_id)
+        goals_by_start.setdefault(start_node_id, set()).add(goal_node_id)
+
+    trees: Dict[str, Dict[str, Optional[str]]] = {}
+    for start_node_id, goals in goals_by_start.items():
+        trees[start_node_id] = _single_source_tree(graph, start_node_id, goals, weight)
+
+    results = []
+    for start_node_id, goal_node_id in pairs:
+        parent = trees[start_node_id]
+        if goal_node_id not in parent:
+            results.append([])
+            continue
+        path = [goal_node_id]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        results.append(path[::-1])
+    return results
+
+
+def _single_source_tree(graph, start_node_id: str, goals: Set[str], weight: Optional[WeightFn]) -> Dict[str, Optional[str]]:
+    """从起点出发搜索，直到 goals 全部确定或图被遍历完，返回父节点树"""
+    remaining = set(goals)
+    remaining.discard(start_node_id)
+    parent: Dict[str, Optional[str]] = {start_node_id: None}
+
+    if weight is None:
+        frontier = [start_node_id]
+        while frontier and remaining:
+            next_frontier = []
+            for current_id in frontier:
+                for edge in graph.get_out_edge(current_id):
+                    neighbour_id = edge.end_node.id
+                    if neighbour_id in parent:
+                        continue
+                    parent[neighbour_id] = current_id
+                    remaining.discard(neighbour_id)
+                    next_frontier.append(neighbour_id)
+            frontier = next_frontier
+        return parent
+
+    tie = count()
+    dist: Dict[str, float] = {start_node_id: 0.0}
+    heap = [(0.0, next(tie), start_node_id)]
+    settled: Set[str] = set()
+    while heap and remaining:
+        d, _, current_id = heapq.heappop(heap)
+        if current_id in settled:
+            continue
+        settled.add(current_id)
+        remaining.discard(current_id)
+        for edge in graph.get_out_edge(current_id):
+            neighbour_id = edge.end_node.id
+            if neighbour_id in settled:
+                continue
+            new_dist = d + _edge_weight(weight, edge)
+            if new_dist < dist.get(neighbour_id, float("inf")):
+                dist[neighbour_id] = new_dist
+                parent[neighbour_id] = current_id
+                heapq.heappush(heap, (new_dist, next(tie), neighbour_id))
+    # 只保留已确定的节点，未确定节点的父指针可能不是最优
+    return {node_id: p for node_id, p in parent.items() if node_id in settled or node_id == start_node_id}
@@ -0,0 +1,144 @@
+"""
+知识图谱的分页查询
+
+run_query 把一个查询（op + params）展开为逐条产出的结果，paginate 再按 page_size 切成若干页。
+遍历类查询（k_hop / subgraph）本身是惰性的，只计算实际取到的那些页。
+
+每页附带一个游标，记录查询摘要、图版本与已产出的条数。游标不在服务端保存任何状态，
+续查时重新执行查询并跳过已产出的部分；图在此期间发生变更时游标失效，
+分页过程中图发生变更也会中止，调用方需要从头查询。
+
+支持的查询：
+- lookup:   {"ids": [...]} 按 ID 取节点，不存在的 ID 产出 {"id", "missing": true}
+- search:   {"query", "limit"} 全文检索，产出 {"node", "score"}
+- k_hop:    {"node_id", "k", "direction", "limit"} k 跳邻域，产出 {"node", "edge", "depth"}
+- path:     {"start", "goal", "method"} 最短路径，按顺序产出节点
+- subgraph: {"node_ids": [...]} 节点集合的诱导子图，产出 {"node", "edges"}
+"""
+import base64
+import hashlib
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+# 查询类型 -> 必填参数
+QUERY_OPS = {
+    "lookup": ("ids",),
+    "search": ("query",),
+    "k_hop": ("node_id",),
+    "path": ("start", "goal"),
+    "subgraph": ("node_ids",),
+}
+
+MAX_PAGE_SIZE = 1000
+
+
+class Page(NamedTuple):
+    items: List[Dict[str, Any]]
+    cursor: Optional[str]  # 取下一页用的游标，最后一页为 None
+    done: bool
+
+
+def node_item(node) -> Dict[str, Any]:
+    return {"id": node.id, "name": node.name, "title": node.title, "description": node.description}
+
+
+def edge_item(edge) -> Dict[str, Any]:
+    return {"id": edge.id, "start": edge.start_node.id, "end": edge.end_node.id, "title": edge.title, "weight": edge.weight}
+
+
+def run_query(graph, op: str, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """按 op 执行查询并逐条产出结果，参数错误时抛出 ValueError"""
+    if op not in QUERY_OPS:
+        raise ValueError(f"未知的查询类型: {op}")
+    for name in QUERY_OPS[op]:
+        if name not in params:
+            raise ValueError(f"查询 {op} 缺少参数: {name}")
+    if op == "lookup":
+        for node_id in params["ids"]:
+            node = graph.get_node(node_id)
+            yield node_item(node) if node is not None else {"id": node_id, "missing": True}
+    elif op == "search":
+        for node, score in graph.search_nodes(params["query"], params.get("limit", 10)):
+            yield {"node": node_item(node), "score": score}
+    elif op == "k_hop":
+        hops = graph.k_hop(params["node_id"], params.get("k", 1), params.get("direction", "out"), limit=params.get("limit"))
+        for hop in hops:
+            yield {"node": node_item(hop.node), "edge": edge_item(hop.edge) if hop.edge is not None else None, "depth": hop.depth}
+    elif op == "path":
+        for node_id in graph.find_path(params["start"], params["goal"], method=params.get("method", "bfs")):
+            yield node_item(graph.nodes[node_id])
+    elif op == "subgraph":
+        for node, edges in graph.subgraph(params["node_ids"]):
+            yield {"node": node_item(node), "edges": [edge_item(edge) for edge in edges]}
+
+
+def _digest(op: str, params: Dict[str, Any]) -> str:
+    canonical = json.dumps([op, params], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(op: str, params: Dict[str, Any], version: int, offset: int) -> str:
+    raw = json.dumps({"q": _digest(op, params), "v": version, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor: str, op: str, params: Dict[str, Any], version: int) -> int:
+    """校验游标并返回已产出的条数"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        digest, cursor_version, offset = state["q"], state["v"], int(state["o"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("无效的游标")
+    if digest != _digest(op, params):
+        raise ValueError("游标与查询不匹配")
+    if cursor_version != version:
+        raise ValueError("游标已失效：图在分页期间发生了变更，请重新查询")
+    return offset
+
+
+def paginate(
+    graph,
+    op: str,
+    params: Dict[str, Any],
+    page_size: int = 100,
+    cursor: Optional[str] = None,
+) -> Iterator[Page]:
+    """
+    逐页产出查询结果，至少产出一页（可能为空）。
+    调用方可以随时停止迭代，用最后一页的游标续查。
+    分页过程中图发生变更时抛出 ValueError。可以在工作线程中逐页推进（见 websocket_server）。
+    """
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size 必须在 1 到 {MAX_PAGE_SIZE} 之间")
+    if op not in QUERY_OPS:
+        raise ValueError(f"未知的查询类型: {op}")
+    version = graph.version
+    offset = decode_cursor(cursor, op, params, version) if cursor is not None else 0
+    results = islice(run_query(graph, op, params), offset, None)
+
+    def take(count: int) -> List[Dict[str, Any]]:
+        # 惰性遍历在图变更后继续推进会遇到 RuntimeError（字典在迭代中被修改）或 KeyError，
+        # 取数前后都检查版本，统一报告为 ValueError
+        if graph.version != version:
+            raise ValueError("图在分页期间发生了变更，请重新查询")
+        try:
+            items = list(islice(results, count))
+        except (RuntimeError, KeyError) as e:
+            if graph.version != version:
+                raise ValueError("图在分页期间发生了变更，请重新查询") from e
+            raise
+        if graph.version != version:
+            raise ValueError("图在分页期间发生了变更，请重新查询")
+        return items
+
+    # 多取一条判断是否还有下一页
+    items = take(page_size + 1)
+    while True:
+        if len(items) <= page_size:
+            yield Page(items, None, True)
+            return
+        offset += page_size
+        page, items = items[:page_size], items[page_size:]
+        yield Page(page, encode_cursor(op, params, version, offset), False)
+        items.extend(take(page_size))
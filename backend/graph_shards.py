@@ -0,0 +1,495 @@
+"""
+按课程分片的知识图谱
+
+每门课程是一个独立的 Knowledge_Graph 分片，存放在同一目录下（<课程>.xskg 或 <课程>.json），
+按需加载，常驻分片数超过上限时按 LRU 淘汰，修改过的分片在淘汰前写回磁盘。
+因此单个进程的内存只与活跃课程数有关，与课程总数无关。
+
+课程之间的先修关系作为跨分片边保存在常驻内存的 Boundary_Index 中（目录下的 boundary.json），
+其规模只与跨分片边数有关。跨分片的路径与邻域查询在 (分片键, 节点 ID) 上进行：
+分片内部沿分片自身的边扩展，经过边界节点时沿跨分片边进入其他分片。
+路径查询先在分片级别的连通关系上求出可能经过的分片，其余分片不会被加载。
+遍历期间用到的分片会被固定（pin）在内存中，不参与 LRU 淘汰，每个分片在一次遍历中最多加载一次；
+因此遍历期间常驻分片数可能暂时超过上限，遍历结束后再淘汰到上限以内。
+
+shard() 返回的图在淘汰后仍然有效：淘汰只是不再计入常驻分片，
+只要调用方还持有该图，再次 shard() 会取回同一个对象而不是从磁盘重新加载；
+淘汰后经由旧句柄的修改会被记录下来，在 flush / close 时写回。close 之后旧句柄不再被跟踪。
+"""
+import heapq
+import json
+import re
+import threading
+import weakref
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from itertools import count
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from graph_ids import new_id
+from knowledge_base import load_knowledge_graph
+from knowledge_graph import Knowledge_Graph
+
+# 全局节点引用：(分片键, 节点 ID)
+NodeRef = Tuple[str, str]
+
+BOUNDARY_FILE = "boundary.json"
+SUFFIXES = (".xskg", ".json")
+
+_SHARD_KEY_PATTERN = re.compile(r"^[\w\-]+$")
+
+
+class Cross_Edge(NamedTuple):
+    """跨分片边"""
+    id: str
+    start: NodeRef
+    end: NodeRef
+    weight: float = 1.0
+    title: Optional[str] = None
+
+
+class Boundary_Index:
+    """
+    跨分片边索引：按边界节点索引出边与入边，并维护分片之间的连通计数，
+    供路径查询在加载分片之前判断哪些分片可能位于路径上。
+    """
+
+    def __init__(self):
+        self.edges: Dict[str, Cross_Edge] = {}
+        self._out: Dict[NodeRef, Dict[str, None]] = defaultdict(dict)
+        self._in: Dict[NodeRef, Dict[str, None]] = defaultdict(dict)
+        # 分片 -> {相邻分片: 跨分片边数}
+        self._shard_out: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._shard_in: Dict[str, Dict[str, int]] = defaultdict(dict)
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def add(self, edge: Cross_Edge):
+        if edge.id in self.edges:
+            raise ValueError(f"跨分片边 ID {edge.id} 已存在")
+        if edge.start[0] == edge.end[0]:
+            raise ValueError("跨分片边的两端必须位于不同分片")
+        self.edges[edge.id] = edge
+        self._out[edge.start][edge.id] = None
+        self._in[edge.end][edge.id] = None
+        a, b = edge.start[0], edge.end[0]
+        self._shard_out[a][b] = self._shard_out[a].get(b, 0) + 1
+        self._shard_in[b][a] = self._shard_in[b].get(a, 0) + 1
+
+    def remove(self, edge_id: str) -> Cross_Edge:
+        edge = self.edges.pop(edge_id, None)
+        if edge is None:
+            raise ValueError(f"跨分片边 ID {edge_id} 不存在")
+        for index, ref in ((self._out, edge.start), (self._in, edge.end)):
+            del index[ref][edge_id]
+            if not index[ref]:
+                del index[ref]
+        a, b = edge.start[0], edge.end[0]
+        for index, key, other in ((self._shard_out, a, b), (self._shard_in, b, a)):
+            index[key][other] -= 1
+            if not index[key][other]:
+                del index[key][other]
+                if not index[key]:
+                    del index[key]
+        return edge
+
+    def out_edges(self, ref: NodeRef) -> List[Cross_Edge]:
+        ids = self._out.get(ref)
+        return [self.edges[edge_id] for edge_id in ids] if ids else []
+
+    def in_edges(self, ref: NodeRef) -> List[Cross_Edge]:
+        ids = self._in.get(ref)
+        return [self.edges[edge_id] for edge_id in ids] if ids else []
+
+    def remove_node(self, ref: NodeRef) -> List[Cross_Edge]:
+        """删除与节点相连的全部跨分片边"""
+        edge_ids = list(self._out.get(ref, ())) + list(self._in.get(ref, ()))
+        return [self.remove(edge_id) for edge_id in dict.fromkeys(edge_ids)]
+
+    def remove_shard(self, shard: str) -> List[Cross_Edge]:
+        """删除与分片相连的全部跨分片边"""
+        edge_ids = [edge.id for edge in self.edges.values() if shard in (edge.start[0], edge.end[0])]
+        return [self.remove(edge_id) for edge_id in edge_ids]
+
+    def reachable_shards(self, shard: str, reverse: bool = False) -> Set[str]:
+        """分片级别上从 shard 出发（reverse 为 True 时为能到达 shard）的全部分片，包括自身"""
+        index = self._shard_in if reverse else self._shard_out
+        seen = {shard}
+        queue = deque([shard])
+        while queue:
+            for other in index.get(queue.popleft(), ()):
+                if other not in seen:
+                    seen.add(other)
+                    queue.append(other)
+        return seen
+
+    def to_list(self) -> List[Dict]:
+        return [
+            {"id": edge.id, "start": list(edge.start), "end": list(edge.end), "weight": edge.weight, "title": edge.title}
+            for edge in self.edges.values()
+        ]
+
+    @classmethod
+    def from_list(cls, items: List[Dict]) -> "Boundary_Index":
+        index = cls()
+        for item in items:
+            index.add(Cross_Edge(item["id"], tuple(item["start"]), tuple(item["end"]), item.get("weight", 1.0), item.get("title")))
+        return index
+
+
+class Sharded_Knowledge_Graph:
+    """
+    分片图管理器。
+    root 为分片目录；max_shards 为常驻内存的分片数上限；
+    新建或写回的分片按 suffix 选择格式，".xskg" 为二进制快照，".json" 为 JSON。
+    """
+
+    def __init__(self, root, max_shards: int = 8, suffix: str = ".xskg"):
+        if max_shards < 1:
+            raise ValueError("max_shards 必须为正整数")
+        if suffix not in SUFFIXES:
+            raise ValueError(f"不支持的分片格式: {suffix}")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_shards = max_shards
+        self.suffix = suffix
+        self._lock = threading.RLock()
+        self._shards: "OrderedDict[str, Knowledge_Graph]" = OrderedDict()
+        self._listeners: Dict[str, Callable] = {}
+        self._dirty: Set[str] = set()
+        self._pins: Dict[str, int] = {}
+        # 已淘汰但调用方仍持有的分片；淘汰后又被修改的分片在 _orphans 中保留强引用，直到写回
+        self._detached: "weakref.WeakValueDictionary[str, Knowledge_Graph]" = weakref.WeakValueDictionary()
+        self._orphans: Dict[str, Knowledge_Graph] = {}
+        self.loads = 0
+        self.evictions = 0
+
+        boundary_path = self.root / BOUNDARY_FILE
+        if boundary_path.exists():
+            self.boundary = Boundary_Index.from_list(json.loads(boundary_path.read_text(encoding="utf-8")))
+        else:
+            self.boundary = Boundary_Index()
+        self._boundary_dirty = False
+
+    # ---------- 分片加载与淘汰 ----------
+
+    def _check_key(self, key: str):
+        if not _SHARD_KEY_PATTERN.match(key) or key == Path(BOUNDARY_FILE).stem:
+            raise ValueError(f"非法的分片键: {key}")
+
+    def _shard_path(self, key: str) -> Optional[Path]:
+        for suffix in SUFFIXES:
+            path = self.root / f"{key}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    def shard_keys(self) -> List[str]:
+        """磁盘与内存中的全部分片键"""
+        keys = {path.stem for suffix in SUFFIXES for path in self.root.glob(f"*{suffix}") if path.name != BOUNDARY_FILE}
+        with self._lock:
+            keys.update(self._shards)
+        return sorted(keys)
+
+    def resident(self) -> List[str]:
+        """当前常驻内存的分片键，按最近使用从旧到新排列"""
+        with self._lock:
+            return list(self._shards)
+
+    def has_shard(self, key: str) -> bool:
+        with self._lock:
+            return key in self._shards or self._shard_path(key) is not None
+
+    def shard(self, key: str, create: bool = False) -> Knowledge_Graph:
+        """取得分片，必要时从磁盘加载；create 为 True 时分片不存在则新建空图"""
+        with self._lock:
+            graph = self._shards.get(key)
+            if graph is not None:
+                self._shards.move_to_end(key)
+                return graph
+            self._check_key(key)
+            graph = self._orphans.pop(key, None)
+            detached = self._detached.pop(key, None)
+            graph = graph if graph is not None else detached
+            if graph is not None:
+                # 取回淘汰后仍被持有的同一个对象，其监听器一直保留着
+                self._shards[key] = graph
+                self._shrink()
+                return graph
+            path = self._shard_path(key)
+            if path is not None:
+                graph = load_knowledge_graph(path)
+                self.loads += 1
+            elif create:
+                graph = Knowledge_Graph()
+                self._dirty.add(key)
+            else:
+                raise ValueError(f"分片 {key} 不存在")
+            self._attach(key, graph)
+            self._shards[key] = graph
+            self._shrink()
+            return graph
+
+    def _shrink(self):
+        """按 LRU 淘汰未被固定的分片，直到常驻分片数不超过上限"""
+        while len(self._shards) > self.max_shards:
+            key = next((key for key in self._shards if key not in self._pins), None)
+            if key is None:
+                return
+            self._evict(key)
+
+    def _attach(self, key: str, graph: Knowledge_Graph):
+        # 监听器只弱引用图，避免 _detached 中的图因循环引用而无法及时释放
+        graph_ref = weakref.ref(graph)
+
+        def on_change(event: str, obj):
+            with self._lock:
+                self._dirty.add(key)
+                if self._shards.get(key) is not graph_ref():
+                    self._orphans[key] = graph_ref()
+                if event == "remove_node":
+                    if self.boundary.remove_node((key, obj.id)):
+                        self._boundary_dirty = True
+
+        self._listeners[key] = on_change
+        graph.subscribe(on_change)
+
+    def _detach(self, key: str, graph: Knowledge_Graph):
+        """不再跟踪分片的旧句柄"""
+        listener = self._listeners.pop(key, None)
+        if listener is not None:
+            graph.unsubscribe(listener)
+        self._detached.pop(key, None)
+        self._orphans.pop(key, None)
+
+    def _save_shard(self, key: str, graph: Knowledge_Graph):
+        path = self.root / f"{key}{self.suffix}"
+        tmp = path.with_name(path.name + ".tmp")
+        if self.suffix == ".xskg":
+            from graph_snapshot import save_snapshot
+            save_snapshot(graph, tmp)
+        else:
+            tmp.write_text(graph.model_dump_json(), encoding="utf-8")
+        tmp.replace(path)
+        # 另一种格式的旧文件会在下次加载时被优先读到，需要删除
+        for suffix in SUFFIXES:
+            if suffix != self.suffix:
+                (self.root / f"{key}{suffix}").unlink(missing_ok=True)
+
+    def _evict(self, key: str):
+        graph = self._shards.pop(key)
+        if key in self._dirty:
+            self._save_shard(key, graph)
+            self._dirty.discard(key)
+        self._detached[key] = graph
+        self.evictions += 1
+
+    def evict(self, key: str):
+        """主动淘汰分片，修改过的分片先写回磁盘"""
+        with self._lock:
+            if key in self._shards:
+                self._evict(key)
+
+    def drop_shard(self, key: str):
+        """删除分片及其文件，连同相关的跨分片边"""
+        with self._lock:
+            graph = self._shards.pop(key, None)
+            for handles in (self._orphans, self._detached):
+                if graph is None:
+                    graph = handles.get(key)
+            if graph is not None:
+                self._detach(key, graph)
+            self._dirty.discard(key)
+            for suffix in SUFFIXES:
+                (self.root / f"{key}{suffix}").unlink(missing_ok=True)
+            if self.boundary.remove_shard(key):
+                self._boundary_dirty = True
+
+    def flush(self):
+        """把修改过的分片与跨分片边写回磁盘"""
+        with self._lock:
+            for key in list(self._dirty):
+                self._save_shard(key, self._shards[key] if key in self._shards else self._orphans[key])
+            self._dirty.clear()
+            self._orphans.clear()
+            if self._boundary_dirty:
+                path = self.root / BOUNDARY_FILE
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_text(json.dumps(self.boundary.to_list(), ensure_ascii=False), encoding="utf-8")
+                tmp.replace(path)
+                self._boundary_dirty = False
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            for key in list(self._shards):
+                self._evict(key)
+            for key, graph in list(self._detached.items()):
+                self._detach(key, graph)
+
+    # ---------- 按分片键路由的查询 ----------
+
+    def get_node(self, ref: NodeRef):
+        key, node_id = ref
+        return self.shard(key).get_node(node_id)
+
+    def find_nodes_by_name(self, key: str, name: str):
+        return self.shard(key).find_nodes_by_name(name)
+
+    def search_nodes(self, key: str, query: str, limit: int = 10):
+        return self.shard(key).search_nodes(query, limit)
+
+    # ---------- 跨分片边 ----------
+
+    def _check_ref(self, ref: NodeRef):
+        if self.shard(ref[0]).get_node(ref[1]) is None:
+            raise ValueError(f"节点 {ref[0]}/{ref[1]} 不存在")
+
+    def add_cross_edge(
+        self,
+        start: NodeRef,
+        end: NodeRef,
+        weight: float = 1.0,
+        title: Optional[str] = None,
+        id: Optional[str] = None,
+    ) -> Cross_Edge:
+        """添加跨分片边；同一分片内的边请直接使用 shard(key).add_edge"""
+        start, end = tuple(start), tuple(end)
+        self._check_ref(start)
+        self._check_ref(end)
+        with self._lock:
+            if not id:
+                # boundary.json 中的边可能由其他进程分配 ID，自动分配的 ID 冲突时重新分配
+                id = new_id()
+                while id in self.boundary.edges:
+                    id = new_id()
+            edge = Cross_Edge(id, start, end, weight, title)
+            self.boundary.add(edge)
+            self._boundary_dirty = True
+        return edge
+
+    def remove_cross_edge(self, edge_id: str) -> Cross_Edge:
+        with self._lock:
+            edge = self.boundary.remove(edge_id)
+            self._boundary_dirty = True
+        return edge
+
+    # ---------- 跨分片遍历 ----------
+
+    @contextmanager
+    def _pinned(self) -> Iterator[Callable[[str], Knowledge_Graph]]:
+        """
+        产出取分片的函数，经它取到的分片在 with 块结束前不会被淘汰；
+        同一分片只经过 shard() 一次，之后直接使用本地引用。
+        """
+        graphs: Dict[str, Knowledge_Graph] = {}
+
+        def get(key: str) -> Knowledge_Graph:
+            graph = graphs.get(key)
+            if graph is None:
+                with self._lock:
+                    self._pins[key] = self._pins.get(key, 0) + 1
+                    try:
+                        graph = graphs[key] = self.shard(key)
+                    except BaseException:
+                        self._unpin(key)
+                        raise
+            return graph
+
+        try:
+            yield get
+        finally:
+            with self._lock:
+                for key in graphs:
+                    self._unpin(key)
+                self._shrink()
+
+    def _unpin(self, key: str):
+        self._pins[key] -= 1
+        if not self._pins[key]:
+            del self._pins[key]
+
+    def _incident(self, ref: NodeRef, direction: str, get: Callable[[str], Knowledge_Graph]) -> Iterator[Tuple[str, NodeRef, float]]:
+        """按方向产出 (边 ID, 另一端节点引用, 边权)，同时包含分片内的边与跨分片边"""
+        key, node_id = ref
+        graph = get(key)
+        if direction != "in":
+            for edge in graph.get_out_edge(node_id):
+                yield edge.id, (key, edge.end_node.id), edge.weight
+            for edge in self.boundary.out_edges(ref):
+                yield edge.id, edge.end, edge.weight
+        if direction != "out":
+            for edge in graph.get_in_edge(node_id):
+                yield edge.id, (key, edge.start_node.id), edge.weight
+            for edge in self.boundary.in_edges(ref):
+                yield edge.id, edge.start, edge.weight
+
+    def k_hop(
+        self,
+        ref: NodeRef,
+        k: int,
+        direction: str = "out",
+        limit: Optional[int] = None,
+    ) -> Iterator[Tuple[NodeRef, int]]:
+        """跨分片的 k 跳邻域，按 BFS 顺序产出 (节点引用, 跳数)，包括起点本身"""
+        if direction not in ("out", "in", "both"):
+            raise ValueError(f"不支持的方向: {direction}")
+        ref = tuple(ref)
+        self._check_ref(ref)
+        with self._pinned() as get:
+            seen = {ref}
+            queue = deque([(ref, 0)])
+            produced = 0
+            while queue:
+                current, depth = queue.popleft()
+                yield current, depth
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
+                if depth >= k:
+                    continue
+                for _, other, _ in self._incident(current, direction, get):
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append((other, depth + 1))
+
+    def find_path(self, start: NodeRef, goal: NodeRef, weighted: bool = False) -> Tuple[List[NodeRef], float]:
+        """
+        跨分片最短路径，返回 (节点引用路径, 总代价)；不可达时返回 ([], inf)。
+        weighted 为 False 时每条边代价为 1。
+        只有既能从起点分片到达、又能到达终点分片的分片才会被展开。
+        """
+        start, goal = tuple(start), tuple(goal)
+        self._check_ref(start)
+        self._check_ref(goal)
+        allowed = self.boundary.reachable_shards(start[0]) & self.boundary.reachable_shards(goal[0], reverse=True)
+
+        tie = count()
+        dist: Dict[NodeRef, float] = {start: 0.0}
+        parent: Dict[NodeRef, Optional[NodeRef]] = {start: None}
+        heap = [(0.0, next(tie), start)]
+        settled: Set[NodeRef] = set()
+        with self._pinned() as get:
+            while heap:
+                d, _, current = heapq.heappop(heap)
+                if current in settled:
+                    continue
+                if current == goal:
+                    path = [current]
+                    while parent[path[-1]] is not None:
+                        path.append(parent[path[-1]])
+                    return path[::-1], d
+                settled.add(current)
+                for edge_id, other, weight in self._incident(current, "out", get):
+                    if other[0] not in allowed or other in settled:
+                        continue
+                    if weighted and weight < 0:
+                        raise ValueError(f"边 {edge_id} 的权重为负数，无法计算最短路径")
+                    new_dist = d + (weight if weighted else 1.0)
+                    if new_dist < dist.get(other, float("inf")):
+                        dist[other] = new_dist
+                        parent[other] = current
+                        heapq.heappush(heap, (new_dist, next(tie), other))
+        return [], float("inf")
@@ -0,0 +1,466 @@
+"""
+知识图谱二进制快照
+
+快照按列存储，边只保存端点节点的序号，不再像 model_dump() 那样在每条边里重复整个节点。
+文件布局（小端序，各段按 8 字节对齐）：
+
+    header   magic "XSKG" | version u32 | node_count u64 | edge_count u64 | column_count u32
+    toc      每列一项：name 16 字节 | offset u64 | length u64
+    columns  字符串列：offsets i64[n+1] | null 标记 u8[n] | UTF-8 数据
+             数值列：i64 / f64 原始数组
+
+除节点与边的属性列外，快照还保存出边 / 入边的 CSR 邻接数组，
+因此 Snapshot_Reader 可以通过 mmap 直接在文件上做只读查询，无需整体加载。
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+import graph_paths
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+
+MAGIC = b"XSKG"
+VERSION = 1
+_HEADER = struct.Struct("<4sIQQI")
+_TOC_ENTRY = struct.Struct("<16sQQ")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# 列名 -> 类型；"s" 为可空字符串列，"q" / "d" 为 int64 / float64 数组
+_COLUMNS = {
+    "node.id": "s",
+    "node.name": "s",
+    "node.title": "s",
+    "node.description": "s",
+    "node.content": "s",
+    "edge.id": "s",
+    "edge.title": "s",
+    "edge.description": "s",
+    "edge.start": "q",
+    "edge.end": "q",
+    "edge.weight": "d",
+    "out.offsets": "q",
+    "out.edges": "q",
+    "in.offsets": "q",
+    "in.edges": "q",
+}
+
+
+def _pad(length: int) -> bytes:
+    return b"\0" * (-length % 8)
+
+
+def _array_bytes(values: array) -> bytes:
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode_strings(values: List[Optional[str]]) -> bytes:
+    offsets = array("q", [0])
+    nulls = bytearray(len(values))
+    chunks = []
+    position = 0
+    for i, value in enumerate(values):
+        if value is None:
+            nulls[i] = 1
+        else:
+            data = value.encode("utf-8")
+            chunks.append(data)
+            position += len(data)
+        offsets.append(position)
+    head = _array_bytes(offsets) + bytes(nulls)
+    return head + _pad(len(head)) + b"".join(chunks)
+
+
+def _build_csr(keys: array, node_count: int):
+    offsets = array("q", bytes(8 * (node_count + 1)))
+    for key in keys:
+        offsets[key + 1] += 1
+    for v in range(node_count):
+        offsets[v + 1] += offsets[v]
+    cursor = array("q", offsets)
+    indices = array("q", bytes(8 * len(keys)))
+    for i, key in enumerate(keys):
+        indices[cursor[key]] = i
+        cursor[key] += 1
+    return offsets, indices
+
+
+def save_snapshot(graph, path) -> int:
+    """把图写成二进制快照，返回文件字节数"""
+    nodes = list(graph.nodes.values())
+    edges = list(graph.edges.values())
+    ordinal = {node.id: i for i, node in enumerate(nodes)}
+
+    starts = array("q", [ordinal[edge.start_node.id] for edge in edges])
+    ends = array("q", [ordinal[edge.end_node.id] for edge in edges])
+    out_offsets, out_edges = _build_csr(starts, len(nodes))
+    in_offsets, in_edges = _build_csr(ends, len(nodes))
+
+    columns = {
+        "node.id": _encode_strings([node.id for node in nodes]),
+        "node.name": _encode_strings([node.name for node in nodes]),
+        "node.title": _encode_strings([node.title for node in nodes]),
+        "node.description": _encode_strings([node.description for node in nodes]),
+        "node.content": _encode_strings([
+            None if node.content is None else json.dumps(node.content, ensure_ascii=False) for node in nodes
+        ]),
+        "edge.id": _encode_strings([edge.id for edge in edges]),
+        "edge.title": _encode_strings([edge.title for edge in edges]),
+        "edge.description": _encode_strings([edge.description for edge in edges]),
+        "edge.start": _array_bytes(starts),
+        "edge.end": _array_bytes(ends),
+        "edge.weight": _array_bytes(array("d", [edge.weight for edge in edges])),
+        "out.offsets": _array_bytes(out_offsets),
+        "out.edges": _array_bytes(out_edges),
+        "in.offsets": _array_bytes(in_offsets),
+        "in.edges": _array_bytes(in_edges),
+    }
+
+    header = _HEADER.pack(MAGIC, VERSION, len(nodes), len(edges), len(columns))
+    position = len(header) + _TOC_ENTRY.size * len(columns)
+    position += -position % 8
+    toc = []
+    for name, data in columns.items():
+        toc.append(_TOC_ENTRY.pack(name.encode("ascii"), position, len(data)))
+        position += len(data) + (-len(data) % 8)
+
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(b"".join(toc))
+        f.write(_pad(f.tell()))
+        for data in columns.values():
+            f.write(data)
+            f.write(_pad(len(data)))
+        return f.tell()
+
+
+class _String_Column:
+    """可空字符串列，按需解码单个元素"""
+
+    def __init__(self, buffer: memoryview, count: int):
+        offsets_end = 8 * (count + 1)
+        self._offsets = _numeric_view(buffer[:offsets_end], "q")
+        self._nulls = buffer[offsets_end:offsets_end + count]
+        data_start = offsets_end + count
+        data_start += -data_start % 8
+        self._data = buffer[data_start:]
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self._nulls[i]:
+            return None
+        return str(self._data[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def to_list(self, count: int) -> List[Optional[str]]:
+        data = bytes(self._data)
+        offsets = self._offsets
+        return [
+            None if self._nulls[i] else data[offsets[i]:offsets[i + 1]].decode("utf-8")
+            for i in range(count)
+        ]
+
+
+def _numeric_view(buffer: memoryview, typecode: str):
+    if _LITTLE_ENDIAN:
+        return buffer.cast(typecode)
+    values = array(typecode, buffer.tobytes())
+    values.byteswap()
+    return values
+
+
+class _Node_View(Mapping):
+    """快照节点的只读映射视图"""
+
+    def __init__(self, reader: "Snapshot_Reader"):
+        self._reader = reader
+
+    def __getitem__(self, node_id: str) -> Knowledge_Node:
+        node = self._reader.get_node(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._reader._node_index()
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._reader._node_ids[i] for i in range(self._reader.node_count))
+
+    def __len__(self) -> int:
+        return self._reader.node_count
+
+
+class _Edge_View(Mapping):
+    """快照边的只读映射视图"""
+
+    def __init__(self, reader: "Snapshot_Reader"):
+        self._reader = reader
+
+    def __getitem__(self, edge_id: str) -> Knowledge_Edge:
+        edge = self._reader.get_edge(edge_id)
+        if edge is None:
+            raise KeyError(edge_id)
+        return edge
+
+    def __contains__(self, edge_id) -> bool:
+        return edge_id in self._reader._edge_index()
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._reader._edge_ids[i] for i in range(self._reader.edge_count))
+
+    def __len__(self) -> int:
+        return self._reader.edge_count
+
+
+class Snapshot_Reader:
+    """
+    通过 mmap 直接读取快照文件的只读图
+
+    提供与 Knowledge_Graph 相同的读取接口（get_node / get_out_edge / find_path 等），
+    数值列是对映射内存的零拷贝视图，字符串按需解码；
+    按 ID 查找时才会构建 ID -> 序号的字典。
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        columns = _read_columns(self._buffer)
+        self.node_count, self.edge_count = columns.pop("__counts__")
+
+        self._node_ids = _String_Column(columns["node.id"], self.node_count)
+        self._node_name = _String_Column(columns["node.name"], self.node_count)
+        self._node_title = _String_Column(columns["node.title"], self.node_count)
+        self._node_description = _String_Column(columns["node.description"], self.node_count)
+        self._node_content = _String_Column(columns["node.content"], self.node_count)
+        self._edge_ids = _String_Column(columns["edge.id"], self.edge_count)
+        self._edge_title = _String_Column(columns["edge.title"], self.edge_count)
+        self._edge_description = _String_Column(columns["edge.description"], self.edge_count)
+        self._edge_start = _numeric_view(columns["edge.start"], "q")
+        self._edge_end = _numeric_view(columns["edge.end"], "q")
+        self._edge_weight = _numeric_view(columns["edge.weight"], "d")
+        self._out_offsets = _numeric_view(columns["out.offsets"], "q")
+        self._out_edges = _numeric_view(columns["out.edges"], "q")
+        self._in_offsets = _numeric_view(columns["in.offsets"], "q")
+        self._in_edges = _numeric_view(columns["in.edges"], "q")
+
+        self._node_lookup: Optional[Dict[str, int]] = None
+        self._edge_lookup: Optional[Dict[str, int]] = None
+        self.nodes = _Node_View(self)
+        self.edges = _Edge_View(self)
+
+    def close(self):
+        # 先释放所有视图，mmap 才能关闭
+        buffer = self._buffer
+        for name in list(vars(self)):
+            if isinstance(getattr(self, name), (memoryview, _String_Column)):
+                setattr(self, name, None)
+        buffer.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _node_index(self) -> Dict[str, int]:
+        if self._node_lookup is None:
+            self._node_lookup = {node_id: i for i, node_id in enumerate(self._node_ids.to_list(self.node_count))}
+        return self._node_lookup
+
+    def _edge_index(self) -> Dict[str, int]:
+        if self._edge_lookup is None:
+            self._edge_lookup = {edge_id: i for i, edge_id in enumerate(self._edge_ids.to_list(self.edge_count))}
+        return self._edge_lookup
+
+    def _adjacent(self, ordinal: int, offsets, indices) -> List[int]:
+        return list(indices[offsets[ordinal]:offsets[ordinal + 1]])
+
+    def _materialize_node(self, ordinal: int) -> Knowledge_Node:
+        content = self._node_content[ordinal]
+        return Knowledge_Node.model_construct(
+            id=self._node_ids[ordinal],
+            name=self._node_name[ordinal],
+            title=self._node_title[ordinal],
+            description=self._node_description[ordinal],
+            content=None if content is None else json.loads(content),
+            in_edge=[self._edge_ids[e] for e in self._adjacent(ordinal, self._in_offsets, self._in_edges)],
+            out_edge=[self._edge_ids[e] for e in self._adjacent(ordinal, self._out_offsets, self._out_edges)],
+        )
+
+    def _materialize_edge(self, ordinal: int) -> Knowledge_Edge:
+        return Knowledge_Edge.model_construct(
+            id=self._edge_ids[ordinal],
+            title=self._edge_title[ordinal],
+            start_node=self._materialize_node(self._edge_start[ordinal]),
+            end_node=self._materialize_node(self._edge_end[ordinal]),
+            description=self._edge_description[ordinal],
+            weight=self._edge_weight[ordinal],
+        )
+
+    def get_node(self, node_id: str):
+        ordinal = self._node_index().get(node_id)
+        return None if ordinal is None else self._materialize_node(ordinal)
+
+    def get_edge(self, edge_id: str):
+        ordinal = self._edge_index().get(edge_id)
+        return None if ordinal is None else self._materialize_edge(ordinal)
+
+    def get_all_node(self):
+        return [self._materialize_node(i) for i in range(self.node_count)]
+
+    def get_all_edge(self):
+        return [self._materialize_edge(i) for i in range(self.edge_count)]
+
+    def get_out_edge(self, node_id: str):
+        if node_id not in self._node_index():
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        ordinal = self._node_index()[node_id]
+        return [self._materialize_edge(e) for e in self._adjacent(ordinal, self._out_offsets, self._out_edges)]
+
+    def get_in_edge(self, node_id: str):
+        if node_id not in self._node_index():
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        ordinal = self._node_index()[node_id]
+        return [self._materialize_edge(e) for e in self._adjacent(ordinal, self._in_offsets, self._in_edges)]
+
+    def get_neighbours(self, node_id: str):
+        if node_id not in self._node_index():
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        ordinal = self._node_index()[node_id]
+        neighbours = {}
+        for e in self._adjacent(ordinal, self._out_offsets, self._out_edges):
+            neighbours[self._edge_end[e]] = None
+        for e in self._adjacent(ordinal, self._in_offsets, self._in_edges):
+            neighbours[self._edge_start[e]] = None
+        neighbours.pop(ordinal, None)
+        return [self._materialize_node(v) for v in neighbours]
+
+    def find_path(
+        self,
+        start_node_id: str,
+        goal_node_id: str,
+        method: str = "bfs",
+        weight: graph_paths.WeightFn = graph_paths.default_weight,
+        heuristic: Optional[graph_paths.HeuristicFn] = None,
+    ) -> List[str]:
+        """与 Knowledge_Graph.find_path 相同；method 为 "bfs" 时使用直接在 CSR 数组上的 BFS"""
+        return graph_paths.find_path(self, start_node_id, goal_node_id, method, weight, heuristic, self._bfs_path)
+
+    def _bfs_path(self, start_node_id: str, goal_node_id: str) -> List[str]:
+        index = self._node_index()
+        if start_node_id not in index or goal_node_id not in index:
+            raise ValueError("起始或终止节点不存在")
+        if start_node_id == goal_node_id:
+            return [start_node_id]
+
+        start, goal = index[start_node_id], index[goal_node_id]
+        parent = array("q", [-1]) * self.node_count
+        parent[start] = start
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            for e in self._adjacent(current, self._out_offsets, self._out_edges):
+                neighbour = self._edge_end[e]
+                if parent[neighbour] != -1:
+                    continue
+                parent[neighbour] = current
+                if neighbour == goal:
+                    path = [goal]
+                    while path[-1] != start:
+                        path.append(parent[path[-1]])
+                    return [self._node_ids[v] for v in reversed(path)]
+                queue.append(neighbour)
+        return []
+
+
+def _read_columns(buffer) -> Dict[str, Any]:
+    if len(buffer) < _HEADER.size:
+        raise ValueError("快照文件已损坏：长度不足")
+    magic, version, node_count, edge_count, column_count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("不是知识图谱快照文件")
+    if version != VERSION:
+        raise ValueError(f"不支持的快照版本: {version}")
+
+    columns: Dict[str, Any] = {"__counts__": (node_count, edge_count)}
+    for i in range(column_count):
+        raw_name, offset, length = _TOC_ENTRY.unpack_from(buffer, _HEADER.size + i * _TOC_ENTRY.size)
+        if offset + length > len(buffer):
+            raise ValueError("快照文件已损坏：列越界")
+        columns[raw_name.rstrip(b"\0").decode("ascii")] = buffer[offset:offset + length]
+    missing = set(_COLUMNS) - set(columns)
+    if missing:
+        raise ValueError(f"快照文件缺少列: {sorted(missing)}")
+    return columns
+
+
+def load_snapshot(path) -> Knowledge_Graph:
+    """把快照完整加载为 Knowledge_Graph"""
+    with open(path, "rb") as f:
+        buffer = memoryview(f.read())
+    return _build_graph(_read_columns(buffer))
+
+
+def _build_graph(columns: Dict[str, Any]) -> Knowledge_Graph:
+    node_count, edge_count = columns["__counts__"]
+
+    node_ids = _String_Column(columns["node.id"], node_count).to_list(node_count)
+    names = _String_Column(columns["node.name"], node_count).to_list(node_count)
+    titles = _String_Column(columns["node.title"], node_count).to_list(node_count)
+    descriptions = _String_Column(columns["node.description"], node_count).to_list(node_count)
+    contents = _String_Column(columns["node.content"], node_count).to_list(node_count)
+    # 各节点的 content 拼成一个 JSON 数组一次解析，比逐个 json.loads 快得多
+    present = [content for content in contents if content is not None]
+    parsed = iter(json.loads("[" + ",".join(present) + "]"))
+    contents = [None if content is None else next(parsed) for content in contents]
+    edge_ids = _String_Column(columns["edge.id"], edge_count).to_list(edge_count)
+    edge_titles = _String_Column(columns["edge.title"], edge_count).to_list(edge_count)
+    edge_descriptions = _String_Column(columns["edge.description"], edge_count).to_list(edge_count)
+    starts = _numeric_view(columns["edge.start"], "q").tolist()
+    ends = _numeric_view(columns["edge.end"], "q").tolist()
+    weights = _numeric_view(columns["edge.weight"], "d").tolist()
+
+    out_offsets = _numeric_view(columns["out.offsets"], "q").tolist()
+    out_edges = _numeric_view(columns["out.edges"], "q").tolist()
+    in_offsets = _numeric_view(columns["in.offsets"], "q").tolist()
+    in_edges = _numeric_view(columns["in.edges"], "q").tolist()
+
+    # 快照中的数据在保存时已经校验过，这里跳过 pydantic 校验直接构造对象；
+    # 邻接列表取自 CSR 数组，与逐条 add_edge 得到的顺序相同
+    construct_node = Knowledge_Node.model_construct
+    edge_id = edge_ids.__getitem__
+    nodes = [
+        construct_node(
+            id=node_ids[i],
+            name=names[i],
+            title=titles[i],
+            description=descriptions[i],
+            content=contents[i],
+            in_edge=list(map(edge_id, in_edges[in_offsets[i]:in_offsets[i + 1]])),
+            out_edge=list(map(edge_id, out_edges[out_offsets[i]:out_offsets[i + 1]])),
+        )
+        for i in range(node_count)
+    ]
+    construct_edge = Knowledge_Edge.model_construct
+    edges = {
+        edge_ids[i]: construct_edge(
+            id=edge_ids[i],
+            title=edge_titles[i],
+            start_node=nodes[starts[i]],
+            end_node=nodes[ends[i]],
+            description=edge_descriptions[i],
+            weight=weights[i],
+        )
+        for i in range(edge_count)
+    }
+    # model_construct 会调用 model_post_init，由邻接列表一次性建好下标与索引
+    return Knowledge_Graph.model_construct(nodes={node.id: node for node in nodes}, edges=edges)
@@ -0,0 +1,116 @@
+"""
+知识图谱邻域遍历
+
+k_hop / subgraph 都是生成器：结果逐个产出，调用方拿够了直接 break 即可提前终止，
+未展开的部分不会被访问。与 graph_paths 一样只依赖图对象的公开接口
+（get_node / get_out_edge / get_in_edge），适用于所有图实现。
+图对象提供 node_ordinal / ordinal_capacity 时，k_hop 用按节点序号索引的位图记录已访问节点，
+否则退回到 ID 集合。遍历期间修改图的结果未定义。
+"""
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# 边过滤函数：返回 False 的边不会被遍历
+EdgeFilter = Callable[[object], bool]
+
+DIRECTIONS = ("out", "in", "both")
+
+
+class Hop(NamedTuple):
+    """k_hop 的一条结果：节点、到达它所经过的边（起点为 None）以及跳数"""
+    node: object
+    edge: Optional[object]
+    depth: int
+
+
+def _incident(graph, node_id: str, direction: str) -> Iterator[Tuple[object, str]]:
+    """按方向产出 (边, 另一端节点 ID)"""
+    if direction != "in":
+        for edge in graph.get_out_edge(node_id):
+            yield edge, edge.end_node.id
+    if direction != "out":
+        for edge in graph.get_in_edge(node_id):
+            yield edge, edge.start_node.id
+
+
+class _Visited:
+    """已访问节点集合：优先使用按节点序号索引的 bytearray 位图"""
+
+    def __init__(self, graph):
+        self._ordinal = getattr(graph, "node_ordinal", None)
+        if self._ordinal is not None:
+            self._bitmap = bytearray(graph.ordinal_capacity)
+        else:
+            self._ids = set()
+
+    def add(self, node_id: str) -> bool:
+        """标记节点，节点此前未被访问时返回 True"""
+        if self._ordinal is None:
+            if node_id in self._ids:
+                return False
+            self._ids.add(node_id)
+            return True
+        ordinal = self._ordinal(node_id)
+        if self._bitmap[ordinal]:
+            return False
+        self._bitmap[ordinal] = 1
+        return True
+
+
+def k_hop(
+    graph,
+    node_id: str,
+    k: int,
+    direction: str = "out",
+    edge_filter: Optional[EdgeFilter] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Hop]:
+    """
+    按 BFS 顺序逐个产出距起点 k 跳以内的节点，起点本身以 depth=0 最先产出。
+    每个节点只产出一次，edge 为 BFS 树上到达它的那条边。
+    direction: "out" 沿出边，"in" 沿入边，"both" 忽略方向。
+    limit 限制产出的节点总数（含起点）。
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"未知的遍历方向: {direction}")
+    start = graph.get_node(node_id)
+    if start is None:
+        raise ValueError(f"节点 ID {node_id} 不存在")
+    if k < 0 or (limit is not None and limit <= 0):
+        return
+
+    yield Hop(start, None, 0)
+    produced = 1
+    if limit is not None and produced >= limit:
+        return
+    visited = _Visited(graph)
+    visited.add(node_id)
+    frontier = [node_id]
+    for depth in range(1, k + 1):
+        next_frontier: List[str] = []
+        for current_id in frontier:
+            for edge, neighbour_id in _incident(graph, current_id, direction):
+                if edge_filter is not None and not edge_filter(edge):
+                    continue
+                if not visited.add(neighbour_id):
+                    continue
+                yield Hop(graph.get_node(neighbour_id), edge, depth)
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
+                next_frontier.append(neighbour_id)
+        if not next_frontier:
+            return
+        frontier = next_frontier
+
+
+def subgraph(graph, node_ids: Iterable[str]) -> Iterator[Tuple[object, List[object]]]:
+    """
+    逐个产出 (节点, 该节点指向集合内其他节点的出边)，即 node_ids 的导出子图。
+    重复的 ID 只产出一次；遇到不存在的节点时抛出 ValueError。
+    """
+    members = dict.fromkeys(node_ids)
+    for node_id in members:
+        node = graph.get_node(node_id)
+        if node is None:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        yield node, [edge for edge in graph.get_out_edge(node_id) if edge.end_node.id in members]
@@ -0,0 +1,312 @@
+"""
+知识节点向量检索
+
+- Vector_Index: 以连续 float32 矩阵保存向量（可放在 np.memmap 上），
+  支持向量化的精确 top-k 检索，以及 IVF + 乘积量化（PQ）的近似检索
+- Graph_Vector_Index: 绑定到 Knowledge_Graph，通过 subscribe 跟随节点增删，
+  新节点先记为待嵌入，下次检索时批量计算向量
+- hashing_embedding: 基于特征哈希的确定性本地嵌入，无需联网或模型文件
+
+向量在写入时做 L2 归一化，相似度为余弦相似度（即内积）。
+删除采用与末行交换的方式，矩阵始终保持紧凑。
+"""
+import os
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from graph_index import content_to_text, tokenize
+
+# 嵌入函数：输入一批文本，返回形状为 (文本数, 维度) 的矩阵
+EmbedFn = Callable[[Sequence[str]], np.ndarray]
+
+
+def hashing_embedding(dim: int = 256) -> EmbedFn:
+    """
+    特征哈希嵌入：每个检索词（见 graph_index.tokenize）按 CRC32 落入一个维度并带上正负号。
+    结果完全确定，适合离线环境与测试；语义能力仅限于词面重合。
+    """
+    def embed(texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                h = zlib.crc32(token.encode("utf-8"))
+                matrix[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+        return matrix
+
+    return embed
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd k-means，返回 (k, 维度) 的质心；空簇保留上一轮的质心"""
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(data, centroids)
+        # 按簇排序后用 reduceat 分段求和，比 np.add.at 快一个数量级
+        order = np.argsort(assign, kind="stable")
+        clusters, starts, counts = np.unique(assign[order], return_index=True, return_counts=True)
+        centroids[clusters] = np.add.reduceat(data[order], starts, axis=0) / counts[:, None]
+    return centroids
+
+
+def _nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # ||x - c||² 中 ||x||² 对所有质心相同，可省略
+    distances = data @ (-2.0 * centroids.T).astype(data.dtype)
+    distances += (centroids * centroids).sum(axis=1)
+    return distances.argmin(axis=1)
+
+
+class Vector_Index:
+    """
+    向量矩阵与 ID 的映射。
+    path 非空时矩阵放在该文件的 np.memmap 上（文件会被覆盖），由操作系统按需换页；
+    ID 映射只在内存中保存。
+    """
+
+    # train 时参与 k-means 的最大采样数
+    TRAIN_SAMPLE = 20000
+
+    def __init__(self, dim: int, path: Optional[str] = None, capacity: int = 1024):
+        self.dim = dim
+        self.path = path
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix = self._allocate(max(capacity, 1))
+        # IVF / PQ 状态，train 之后才有效
+        self._centroids: Optional[np.ndarray] = None
+        self._codebooks: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._codes = np.zeros((0, 0), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, node_id) -> bool:
+        return node_id in self._rows
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """当前全部向量（只读视图），行顺序与 ids 一致"""
+        view = self._matrix[:len(self._ids)]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if self.path is None:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        with open(self.path, "wb") as f:
+            f.truncate(capacity * self.dim * 4)
+        return np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _grow(self, needed: int):
+        capacity = len(self._matrix)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        if self.path is None:
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        else:
+            self._matrix.flush()
+            del self._matrix
+            os.truncate(self.path, capacity * self.dim * 4)
+            matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._matrix = matrix
+        if self.trained:
+            self._assign = np.resize(self._assign, capacity)
+            self._codes = np.resize(self._codes, (capacity, self._codes.shape[1]))
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray):
+        """写入一批向量，已存在的 ID 会被覆盖"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        vectors = _normalize(vectors)
+        new_ids = [node_id for node_id in dict.fromkeys(ids) if node_id not in self._rows]
+        self._grow(len(self._ids) + len(new_ids))
+        for node_id in new_ids:
+            self._rows[node_id] = len(self._ids)
+            self._ids.append(node_id)
+        rows = np.fromiter((self._rows[node_id] for node_id in ids), dtype=np.int64, count=len(ids))
+        self._matrix[rows] = vectors
+        if self.trained:
+            self._encode(rows)
+
+    def remove(self, ids: Iterable[str]):
+        """删除向量，不存在的 ID 会被忽略"""
+        for node_id in ids:
+            row = self._rows.pop(node_id, None)
+            if row is None:
+                continue
+            last = len(self._ids) - 1
+            last_id = self._ids.pop()
+            if row != last:
+                self._ids[row] = last_id
+                self._rows[last_id] = row
+                self._matrix[row] = self._matrix[last]
+                if self.trained:
+                    self._assign[row] = self._assign[last]
+                    self._codes[row] = self._codes[last]
+
+    def get(self, node_id: str) -> Optional[np.ndarray]:
+        row = self._rows.get(node_id)
+        return None if row is None else np.array(self._matrix[row])
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exact: Optional[bool] = None,
+        nprobe: int = 8,
+        rerank: int = 10,
+    ) -> List[Tuple[str, float]]:
+        """
+        返回与 query 最相似的 k 个 (ID, 余弦相似度)，按相似度降序。
+        exact 为空时：训练过 IVF / PQ 就走近似检索，否则精确检索。
+        近似检索只扫描最近的 nprobe 个倒排桶，用 PQ 估分取前 k * rerank 个候选后再精确重排。
+        """
+        n = len(self._ids)
+        if n == 0 or k <= 0:
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+        if exact is None:
+            exact = not self.trained
+        if exact:
+            candidates = np.arange(n)
+            scores = self._matrix[:n] @ query
+        else:
+            if not self.trained:
+                raise ValueError("近似检索需要先调用 train")
+            candidates = self._approximate_candidates(query, k * rerank, nprobe)
+            scores = self._matrix[candidates] @ query
+        top = min(k, len(candidates))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self._ids[candidates[i]], float(scores[i])) for i in best]
+
+    # ---------- IVF + PQ ----------
+
+    def train(self, n_lists: int = 64, n_subvectors: int = 16, n_codes: int = 256, iterations: int = 10, seed: int = 0):
+        """
+        在当前向量上训练倒排桶（k-means 质心）与残差的乘积量化码本，之后新增的向量会自动编码。
+        dim 需能被 n_subvectors 整除；数据量不足时桶数与码本大小会相应缩小。
+        """
+        n = len(self._ids)
+        if n == 0:
+            raise ValueError("没有向量，无法训练")
+        if self.dim % n_subvectors:
+            raise ValueError(f"维度 {self.dim} 不能被子向量数 {n_subvectors} 整除")
+        rng = np.random.default_rng(seed)
+        data = np.asarray(self._matrix[:n])
+        # 码本只在采样上训练，全部向量随后统一编码
+        sample = data if n <= self.TRAIN_SAMPLE else data[rng.choice(n, size=self.TRAIN_SAMPLE, replace=False)]
+        self._centroids = _kmeans(sample, min(n_lists, len(sample)), iterations, rng)
+        residuals = sample - self._centroids[_nearest(sample, self._centroids)]
+        sub_dim = self.dim // n_subvectors
+        self._codebooks = np.stack([
+            _kmeans(np.ascontiguousarray(residuals[:, j * sub_dim:(j + 1) * sub_dim]), min(n_codes, len(sample), 256), iterations, rng)
+            for j in range(n_subvectors)
+        ])
+        capacity = len(self._matrix)
+        self._assign = np.zeros(capacity, dtype=np.int32)
+        self._codes = np.zeros((capacity, n_subvectors), dtype=np.uint8)
+        self._encode(np.arange(n))
+
+    def _encode(self, rows: np.ndarray):
+        data = np.asarray(self._matrix[rows])
+        assign = _nearest(data, self._centroids)
+        residuals = data - self._centroids[assign]
+        m, _, sub_dim = self._codebooks.shape
+        self._assign[rows] = assign
+        for j in range(m):
+            self._codes[rows, j] = _nearest(np.ascontiguousarray(residuals[:, j * sub_dim:(j + 1) * sub_dim]), self._codebooks[j])
+
+    def _approximate_candidates(self, query: np.ndarray, count: int, nprobe: int) -> np.ndarray:
+        n = len(self._ids)
+        coarse = self._centroids @ query
+        probe = np.argsort(-coarse)[:nprobe]
+        rows = np.flatnonzero(np.isin(self._assign[:n], probe))
+        if len(rows) <= count:
+            return rows
+        # 内积对残差可加：q·x ≈ q·质心 + Σ_j q_j·码字_j
+        m, n_codes, sub_dim = self._codebooks.shape
+        tables = np.einsum("jcd,jd->jc", self._codebooks, query.reshape(m, sub_dim))
+        estimate = coarse[self._assign[rows]] + tables[np.arange(m), self._codes[rows]].sum(axis=1)
+        return rows[np.argpartition(-estimate, count - 1)[:count]]
+
+
+def node_embedding_text(node) -> str:
+    """参与嵌入的节点文本：名称、标题、描述与内容"""
+    parts = (node.name, node.title or "", node.description or "", content_to_text(node.content))
+    return "\n".join(part for part in parts if part)
+
+
+class Graph_Vector_Index:
+    """
+    与 Knowledge_Graph 保持同步的节点向量索引。
+    embed 默认为 hashing_embedding(dim)；换用其他嵌入模型时 dim 需与其输出一致。
+    """
+
+    def __init__(
+        self,
+        graph,
+        embed: Optional[EmbedFn] = None,
+        dim: int = 256,
+        path: Optional[str] = None,
+        batch_size: int = 256,
+    ):
+        self.graph = graph
+        self.embed = embed or hashing_embedding(dim)
+        self.batch_size = batch_size
+        self.index = Vector_Index(dim, path, capacity=max(len(graph.nodes), 1))
+        self._pending: Dict[str, None] = dict.fromkeys(graph.nodes)
+        graph.subscribe(self._on_change)
+
+    def close(self):
+        """停止跟随图的变更"""
+        self.graph.unsubscribe(self._on_change)
+
+    def _on_change(self, event: str, obj):
+        if event in ("add_node", "update_node"):
+            self._pending[obj.id] = None
+        elif event == "remove_node":
+            self._pending.pop(obj.id, None)
+            self.index.remove([obj.id])
+
+    def refresh(self, node_ids: Optional[Iterable[str]] = None):
+        """
+        计算待嵌入节点的向量；经 update_node 修改的节点会自动重新嵌入，
+        node_ids 非空时强制重新嵌入这些节点，用于节点文本被直接改写之后。
+        """
+        if node_ids is not None:
+            self._pending.update(dict.fromkeys(node_ids))
+        pending = list(self._pending)
+        for start in range(0, len(pending), self.batch_size):
+            ids = pending[start:start + self.batch_size]
+            texts = [node_embedding_text(self.graph.nodes[node_id]) for node_id in ids]
+            self.index.add(ids, self.embed(texts))
+        self._pending.clear()
+
+    def train(self, **kwargs):
+        """训练近似检索用的 IVF / PQ，参数见 Vector_Index.train"""
+        self.refresh()
+        self.index.train(**kwargs)
+
+    def search(self, query: str, k: int = 10, **kwargs) -> List[Tuple[object, float]]:
+        """按文本检索最相似的节点，返回 (节点, 相似度)；其余参数见 Vector_Index.search"""
+        self.refresh()
+        query_vector = self.embed([query])[0]
+        return [(self.graph.nodes[node_id], score) for node_id, score in self.index.search(query_vector, k, **kwargs)]
@@ -0,0 +1,205 @@
+"""
+知识图谱版本管理
+
+Versioned_Graph 维护一个已发布的只读快照：
+- 读者通过 snapshot() 取得当前快照并一直使用它，之后的写入不会影响手中的快照
+- 写者在 transaction() 中修改快照的写时复制副本（Knowledge_Graph.fork），
+  退出时整体发布为新快照；事务中抛出异常则丢弃副本，已发布的快照不受影响
+- 写者之间用锁串行，读者不加锁
+
+每次修改都追加到日志（Journal_Entry）中，可以用 replay 在另一张图上重放，
+用 Versioned_Graph.rollback 回退到指定版本，用 compact 把日志折叠进新的基准快照。
+版本号即 Knowledge_Graph.version。
+"""
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from knowledge_graph import Knowledge_Edge, Knowledge_Graph, Knowledge_Node
+
+
+class Journal_Entry(NamedTuple):
+    """
+    一条修改记录，version 为修改完成后的图版本。
+    op 与 payload 的对应关系：
+        - "add_node": 节点
+        - "add_edge": 边
+        - "remove_nodes": (被删节点列表, 随之删除的边列表)
+        - "remove_edges": 被删边列表
+        - "update_node" / "update_edge": (ID, 修改前的字段, 修改后的字段)
+    """
+    version: int
+    op: str
+    payload: Any
+
+
+def _detached(node: Knowledge_Node) -> Knowledge_Node:
+    """去掉邻接列表的节点副本，重新加入图时由 add_edge 重建邻接"""
+    return node.model_copy(update={"in_edge": [], "out_edge": []})
+
+
+def apply_entry(graph: Knowledge_Graph, entry: Journal_Entry):
+    """在 graph 上执行一条日志记录"""
+    if entry.op == "add_node":
+        graph.add_node(_detached(entry.payload))
+    elif entry.op == "add_edge":
+        graph.add_edge(entry.payload)
+    elif entry.op == "remove_nodes":
+        graph.remove_nodes(node.id for node in entry.payload[0])
+    elif entry.op == "remove_edges":
+        graph.remove_edges(edge.id for edge in entry.payload)
+    elif entry.op == "update_node":
+        graph.update_node(entry.payload[0], **entry.payload[2])
+    elif entry.op == "update_edge":
+        graph.update_edge(entry.payload[0], **entry.payload[2])
+    else:
+        raise ValueError(f"未知的日志操作: {entry.op}")
+
+
+def replay(graph: Knowledge_Graph, entries: Iterable[Journal_Entry]):
+    """按顺序在 graph 上重放日志"""
+    for entry in entries:
+        apply_entry(graph, entry)
+
+
+class Graph_Writer:
+    """事务内的写入接口，修改写时复制副本并记录日志；读取请直接使用 graph 属性"""
+
+    def __init__(self, graph: Knowledge_Graph):
+        self.graph = graph
+        self.entries: List[Journal_Entry] = []
+
+    def _record(self, op: str, payload: Any):
+        self.entries.append(Journal_Entry(self.graph.version, op, payload))
+
+    def add_node(self, node: Knowledge_Node):
+        self.graph.add_node(node)
+        self._record("add_node", node)
+
+    def add_nodes(self, nodes: Iterable[Knowledge_Node]):
+        for node in nodes:
+            self.add_node(node)
+
+    def add_edge(self, edge: Knowledge_Edge):
+        self.graph.add_edge(edge)
+        self._record("add_edge", edge)
+
+    def add_edges(self, edges: Iterable[Knowledge_Edge]):
+        for edge in edges:
+            self.add_edge(edge)
+
+    def remove_node(self, node_id: str):
+        self.remove_nodes([node_id])
+
+    def remove_nodes(self, node_ids: Iterable[str]):
+        graph = self.graph
+        node_ids = list(dict.fromkeys(node_ids))
+        nodes = [graph.nodes[node_id] for node_id in node_ids if node_id in graph.nodes]
+        edge_ids = dict.fromkeys(edge_id for node in nodes for edge_id in node.in_edge + node.out_edge)
+        edges = [graph.edges[edge_id] for edge_id in edge_ids]
+        graph.remove_nodes(node_ids)
+        self._record("remove_nodes", (nodes, edges))
+
+    def remove_edge(self, edge_id: str):
+        self.remove_edges([edge_id])
+
+    def remove_edges(self, edge_ids: Iterable[str]):
+        graph = self.graph
+        edge_ids = list(dict.fromkeys(edge_ids))
+        edges = [graph.edges[edge_id] for edge_id in edge_ids if edge_id in graph.edges]
+        graph.remove_edges(edge_ids)
+        self._record("remove_edges", edges)
+
+    def update_node(self, node_id: str, **changes):
+        node = self.graph.get_node(node_id)
+        before = {field: getattr(node, field) for field in changes} if node is not None else {}
+        self.graph.update_node(node_id, **changes)
+        self._record("update_node", (node_id, before, changes))
+
+    def update_edge(self, edge_id: str, **changes):
+        edge = self.graph.get_edge(edge_id)
+        before = {field: getattr(edge, field) for field in changes} if edge is not None else {}
+        self.graph.update_edge(edge_id, **changes)
+        self._record("update_edge", (edge_id, before, changes))
+
+
+class Versioned_Graph:
+    """写时复制的多版本知识图谱，见模块说明"""
+
+    def __init__(self, graph: Optional[Knowledge_Graph] = None):
+        graph = graph if graph is not None else Knowledge_Graph()
+        # 自己持有一个副本，调用方之后修改传入的图不会影响已发布的快照
+        self._current = graph.fork()
+        self._base_version = self._current.version
+        self._journal: List[Journal_Entry] = []
+        self._write_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._current.version
+
+    @property
+    def base_version(self) -> int:
+        """日志起点的版本，rollback 不能早于该版本"""
+        return self._base_version
+
+    @property
+    def journal(self) -> Tuple[Journal_Entry, ...]:
+        return tuple(self._journal)
+
+    def snapshot(self) -> Knowledge_Graph:
+        """当前已发布的快照，调用方只能读取，不能修改"""
+        return self._current
+
+    def _publish(self, graph: Knowledge_Graph, entries: List[Journal_Entry]):
+        # 提前建好全文索引，避免多个读者并发检索时各自惰性建索引
+        graph._flush_text_index()
+        self._journal.extend(entries)
+        self._current = graph
+
+    @contextmanager
+    def transaction(self) -> Iterator[Graph_Writer]:
+        """写事务，正常退出时发布新快照"""
+        with self._write_lock:
+            writer = Graph_Writer(self._current.fork())
+            yield writer
+            if writer.entries:
+                self._publish(writer.graph, writer.entries)
+
+    def rollback(self, version: int) -> Knowledge_Graph:
+        """
+        撤销 version 之后的全部修改并发布结果。
+        撤销本身以逆操作的形式追加到日志中，日志始终只追加不删除。
+        """
+        with self._write_lock:
+            if version < self._base_version:
+                raise ValueError(f"版本 {version} 早于日志起点 {self._base_version}，无法回滚")
+            writer = Graph_Writer(self._current.fork())
+            for entry in reversed(self._journal):
+                if entry.version <= version:
+                    break
+                if entry.op == "add_node":
+                    writer.remove_node(entry.payload.id)
+                elif entry.op == "add_edge":
+                    writer.remove_edge(entry.payload.id)
+                elif entry.op == "remove_nodes":
+                    nodes, edges = entry.payload
+                    writer.add_nodes(_detached(node) for node in nodes)
+                    writer.add_edges(edges)
+                elif entry.op == "update_node":
+                    writer.update_node(entry.payload[0], **entry.payload[1])
+                elif entry.op == "update_edge":
+                    writer.update_edge(entry.payload[0], **entry.payload[1])
+                else:
+                    writer.add_edges(entry.payload)
+            if writer.entries:
+                self._publish(writer.graph, writer.entries)
+            return self._current
+
+    def compact(self) -> Knowledge_Graph:
+        """把日志折叠进新的基准快照：清空日志，当前快照成为新的起点"""
+        with self._write_lock:
+            self._current = self._current.fork()
+            self._base_version = self._current.version
+            self._journal = []
+            return self._current
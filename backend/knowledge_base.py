@@ -0,0 +1,81 @@
+"""
+进程内共享的知识图谱句柄
+
+Agent 工具、WebSocket 查询等处都通过 get_knowledge_graph() 取得同一张图，
+并共用一个 Cached_Graph 查询缓存。
+
+首次访问时若设置了环境变量 XIESHUI_KNOWLEDGE_GRAPH，则从该路径加载：
+.xskg 为二进制快照（graph_snapshot），其余按 Knowledge_Graph 的 JSON 读取；
+否则使用一张空图。从文件加载的图在进程中常驻，发布后冻结（gc.freeze），
+之后的循环垃圾回收不再逐个扫描其中的数十万个对象；set_knowledge_graph 替换该图时解冻。
+"""
+import gc
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from graph_cache import Cached_Graph
+from knowledge_graph import Knowledge_Graph
+
+GRAPH_PATH_ENV = "XIESHUI_KNOWLEDGE_GRAPH"
+
+_lock = threading.Lock()
+_graph: Optional[Knowledge_Graph] = None
+_cached: Optional[Cached_Graph] = None
+_frozen = False  # 是否冻结了启动时加载的图
+
+
+def load_knowledge_graph(path) -> Knowledge_Graph:
+    path = Path(path)
+    if path.suffix == ".xskg":
+        from graph_snapshot import load_snapshot
+        return load_snapshot(path)
+    return Knowledge_Graph.model_validate_json(path.read_text(encoding="utf-8"))
+
+
+def _publish(graph: Knowledge_Graph):
+    """在 _lock 内调用。先建好缓存再发布 _graph，其他线程看到 _graph 时 _cached 一定可用"""
+    global _graph, _cached
+    # 提前建好全文索引，避免工具线程并发检索时各自惰性建索引
+    if hasattr(graph, "_flush_text_index"):
+        graph._flush_text_index()
+    _cached = Cached_Graph(graph)
+    _graph = graph
+
+
+def set_knowledge_graph(graph: Knowledge_Graph):
+    """替换共享的图，查询缓存随之重建"""
+    global _frozen
+    with _lock:
+        _publish(graph)
+        if _frozen:
+            # 被替换的图可能含有引用环，解冻后才能被循环回收
+            gc.unfreeze()
+            _frozen = False
+
+
+def _ensure_loaded():
+    global _frozen
+    if _graph is not None:
+        return
+    with _lock:
+        if _graph is None:
+            path = os.getenv(GRAPH_PATH_ENV)
+            if not path:
+                _publish(Knowledge_Graph())
+                return
+            _publish(load_knowledge_graph(path))
+            gc.freeze()
+            _frozen = True
+
+
+def get_knowledge_graph() -> Knowledge_Graph:
+    _ensure_loaded()
+    return _graph
+
+
+def get_cached_graph() -> Cached_Graph:
+    """共享图外包一层查询缓存，适合只读查询"""
+    _ensure_loaded()
+    return _cached
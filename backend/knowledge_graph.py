@@ -1,13 +1,16 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
-from collections import deque
-import uuid
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Optional, Dict, Any, Callable, List, Iterable, Iterator, Tuple
+import threading
+import graph_paths
+import graph_traversal
+from graph_ids import Id_Interner, new_id
+from graph_index import Attribute_Index, Text_Index, node_text
 
 
 class Knowledge_Node(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = Field(default_factory=new_id)
     name: str
-    title: str = None
+    title: Optional[str] = None
     description: Optional[str] = None  # optional的意思是可以没有，有的话变量类型就是str
     content: Optional[Any] = None
     in_edge: List[str] = []
@@ -15,21 +18,180 @@ class Knowledge_Node(BaseModel):
 
 
 class Knowledge_Edge(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
-    title: str = None
+    id: str = Field(default_factory=new_id)
+    title: Optional[str] = None
     start_node: Knowledge_Node
     end_node: Knowledge_Node
     description: Optional[str] = None
+    weight: float = 1.0  # 边权，例如学习难度，供带权路径查询使用
+
+
+# update_node / update_edge 允许修改的字段；邻接关系与端点只能通过增删边改变
+NODE_UPDATABLE_FIELDS = frozenset({"name", "title", "description", "content"})
+EDGE_UPDATABLE_FIELDS = frozenset({"title", "description", "weight"})
 
 
 class Knowledge_Graph(BaseModel):
     nodes: Dict[str, Knowledge_Node] = {}
     edges: Dict[str, Knowledge_Edge] = {}
 
+    # 边 ID 在起点 out_edge / 终点 in_edge 列表中的下标，
+    # 删除时与列表末尾交换后弹出，使单条边删除为 O(1)。
+    # 因此删除发生后 in_edge / out_edge 不再保证按插入顺序排列。
+    _out_pos: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _in_pos: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    # 二级索引，随 add_node / remove_node 同步维护。
+    # 节点加入图之后直接修改其字段不会更新索引。
+    # 全文索引的分词开销较大，新节点先记入 _text_pending，首次检索时再统一建索引。
+    _name_index: Attribute_Index = PrivateAttr(default_factory=Attribute_Index)
+    _title_index: Attribute_Index = PrivateAttr(default_factory=Attribute_Index)
+    _text_index: Text_Index = PrivateAttr(default_factory=Text_Index)
+    _text_pending: Dict[str, None] = PrivateAttr(default_factory=dict)
+    # search_nodes 可能在多个线程中并发调用（Agent 线程池），补建索引期间持有此锁，
+    # 其他线程等待补建完成后再读取 _text_index
+    _text_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    # 节点 ID 到稠密整数序号的驻留表，供 k_hop 等遍历使用位图去重
+    _node_ordinals: Id_Interner = PrivateAttr(default_factory=Id_Interner)
+
+    # 每次增删节点或边加一，供分析结果等缓存判断图是否发生变化
+    _version: int = PrivateAttr(default=0)
+
+    # 由 fork 产生的图与原图共享节点对象，集合中的节点在修改邻接列表前需要先复制；
+    # 不曾 fork 过的图为 None
+    _shared: Optional[set] = PrivateAttr(default=None)
+
+    # 变更监听器，见 subscribe
+    _listeners: List[Callable[[str, Any], None]] = PrivateAttr(default_factory=list)
+
+    # 私有属性经由 BaseModel.__getattr__ 读取，单次开销可达数微秒；
+    # 逐条增删的热点路径改为直接读取 __pydantic_private__ 字典。
+
+    def model_post_init(self, __context: Any):
+        # 与逐个 _index_node 等价，整图加载（model_validate_json、graph_snapshot）时一次建好
+        private = self.__pydantic_private__
+        out_pos, in_pos = private["_out_pos"], private["_in_pos"]
+        intern = private["_node_ordinals"].intern
+        add_name, add_title = private["_name_index"].add, private["_title_index"].add
+        text_pending = private["_text_pending"]
+        for node in self.nodes.values():
+            node_id = node.id
+            intern(node_id)
+            add_name(node.name, node_id)
+            add_title(node.title, node_id)
+            text_pending[node_id] = None
+            out_pos.update(zip(node.out_edge, range(len(node.out_edge))))
+            in_pos.update(zip(node.in_edge, range(len(node.in_edge))))
+        private["_version"] += len(self.nodes)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def ordinal_capacity(self) -> int:
+        """节点序号的上界，按序号开辟位图时使用"""
+        return self._node_ordinals.capacity
+
+    def node_ordinal(self, node_id: str) -> Optional[int]:
+        """节点的稠密整数序号，节点删除后序号会被新节点复用"""
+        return self.__pydantic_private__["_node_ordinals"].get(node_id)
+
+    def fork(self) -> "Knowledge_Graph":
+        """
+        写时复制：新图复制节点 / 边字典与各索引，但与原图共享节点和边对象。
+        任一方要修改某个节点时先复制该节点及其关联边，互不影响。
+        """
+        self._flush_text_index()
+        # 不经过 model_post_init，私有属性（索引、计数等）逐项浅拷贝自原图：
+        # 容器与提供 copy() 的索引复制一份，不可变值直接共享
+        graph = type(self)()
+        graph.nodes = dict(self.nodes)
+        graph.edges = dict(self.edges)
+        private = self.__pydantic_private__
+        private["_shared"] = set(self.nodes)
+        graph.__pydantic_private__ = {
+            key: value.copy() if hasattr(value, "copy") else value for key, value in private.items()
+        }
+        graph.__pydantic_private__["_listeners"] = []
+        graph.__pydantic_private__["_text_lock"] = threading.Lock()
+        return graph
+
+    def subscribe(self, listener: Callable[[str, Any], None]):
+        """
+        注册变更监听器，每次修改完成后以 (事件, 对象) 调用：
+        "add_node" / "update_node" / "remove_node" 传入节点，
+        "add_edge" / "update_edge" / "remove_edge" 传入边（更新事件传入修改后的对象）。
+        删除节点时先逐条通知关联边的删除，再通知节点删除。fork 出的新图不继承监听器。
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str, Any], None]):
+        self._listeners.remove(listener)
+
+    def _notify(self, event: str, obj: Any):
+        for listener in self.__pydantic_private__["_listeners"]:
+            listener(event, obj)
+
+    def _own_node(self, node_id: str) -> Knowledge_Node:
+        """
+        取出可以原地修改的节点，必要时先复制。
+        边对象内嵌端点节点，复制节点时关联边也换成指向新节点的副本，
+        避免 edge.start_node / end_node 仍指向与 fork 出的图共享的旧节点。
+        """
+        node = self.nodes[node_id]
+        shared = self.__pydantic_private__["_shared"]
+        if shared and node_id in shared:
+            shared.discard(node_id)
+            node = node.model_copy(update={"in_edge": list(node.in_edge), "out_edge": list(node.out_edge)})
+            self.nodes[node_id] = node
+            for edge_id in dict.fromkeys(node.out_edge + node.in_edge):
+                edge = self.edges.get(edge_id)  # 正在删除的边已不在 edges 中
+                if edge is None:
+                    continue
+                update = {}
+                if edge.start_node.id == node_id:
+                    update["start_node"] = node
+                if edge.end_node.id == node_id:
+                    update["end_node"] = node
+                self.edges[edge_id] = edge.model_copy(update=update)
+        return node
+
+    def _index_node(self, node: Knowledge_Node):
+        private = self.__pydantic_private__
+        private["_node_ordinals"].intern(node.id)
+        private["_name_index"].add(node.name, node.id)
+        private["_title_index"].add(node.title, node.id)
+        private["_text_pending"][node.id] = None
+        private["_version"] += 1
+
+    def _unindex_node(self, node: Knowledge_Node):
+        private = self.__pydantic_private__
+        private["_node_ordinals"].release(node.id)
+        private["_name_index"].remove(node.name, node.id)
+        private["_title_index"].remove(node.title, node.id)
+        if private["_text_pending"].pop(node.id, 0) is not None:
+            private["_text_index"].remove(node.id)
+        private["_version"] += 1
+
+    def _flush_text_index(self):
+        private = self.__pydantic_private__
+        with private["_text_lock"]:
+            pending = private["_text_pending"]
+            text_index = private["_text_index"]
+            for node_id in pending:
+                node = self.nodes[node_id]
+                text_index.add(node_id, node_text(node.description, node.content))
+            pending.clear()
+
     def add_node(self, node: Knowledge_Node):
         if node.id in self.nodes:
             raise ValueError(f"节点 ID {node.id} 已存在")
         self.nodes[node.id] = node
+        self._index_node(node)
+        if self.__pydantic_private__["_listeners"]:
+            self._notify("add_node", node)
 
     def add_edge(self, edge: Knowledge_Edge):
         if edge.start_node.id not in self.nodes:
@@ -39,9 +201,89 @@ class Knowledge_Graph(BaseModel):
         if edge.id in self.edges:
             raise ValueError(f"节点 ID {edge.id} 已存在")
 
+        start_node = self._own_node(edge.start_node.id)
+        end_node = self._own_node(edge.end_node.id)
+        # 端点统一指向图中的节点对象。调用方传入的边可能与其他图共享（例如日志中的边），
+        # 不能原地修改，端点不一致时存入副本
+        if edge.start_node is not start_node or edge.end_node is not end_node:
+            edge = edge.model_copy(update={"start_node": start_node, "end_node": end_node})
         self.edges[edge.id] = edge
-        edge.start_node.out_edge.append(edge.id)
-        edge.end_node.in_edge.append(edge.id)
+        private = self.__pydantic_private__
+        private["_out_pos"][edge.id] = len(start_node.out_edge)
+        start_node.out_edge.append(edge.id)
+        private["_in_pos"][edge.id] = len(end_node.in_edge)
+        end_node.in_edge.append(edge.id)
+        private["_version"] += 1
+        if private["_listeners"]:
+            self._notify("add_edge", edge)
+
+    def add_nodes(self, nodes: Iterable[Knowledge_Node]):
+        for node in nodes:
+            self.add_node(node)
+
+    def update_node(self, node_id: str, **changes) -> Knowledge_Node:
+        """修改节点的 name / title / description / content，同步维护索引，返回修改后的节点"""
+        if node_id not in self.nodes:
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        unknown = set(changes) - NODE_UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"不能修改的节点字段: {sorted(unknown)}")
+        node = self._own_node(node_id)
+        private = self.__pydantic_private__
+        if "name" in changes:
+            private["_name_index"].remove(node.name, node_id)
+            node.name = changes["name"]
+            private["_name_index"].add(node.name, node_id)
+        if "title" in changes:
+            private["_title_index"].remove(node.title, node_id)
+            node.title = changes["title"]
+            private["_title_index"].add(node.title, node_id)
+        if "description" in changes or "content" in changes:
+            if private["_text_pending"].pop(node_id, 0) is not None:
+                private["_text_index"].remove(node_id)
+            node.description = changes.get("description", node.description)
+            node.content = changes.get("content", node.content)
+            private["_text_pending"][node_id] = None
+        private["_version"] += 1
+        if private["_listeners"]:
+            self._notify("update_node", node)
+        return node
+
+    def update_edge(self, edge_id: str, **changes) -> Knowledge_Edge:
+        """
+        修改边的 title / description / weight，返回修改后的边。
+        边对象可能与 fork 出的图共享，因此替换为修改后的副本而不是原地修改。
+        """
+        if edge_id not in self.edges:
+            raise ValueError(f"边 ID {edge_id} 不存在")
+        unknown = set(changes) - EDGE_UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"不能修改的边字段: {sorted(unknown)}")
+        edge = self.edges[edge_id] = self.edges[edge_id].model_copy(update=changes)
+        private = self.__pydantic_private__
+        private["_version"] += 1
+        if private["_listeners"]:
+            self._notify("update_edge", edge)
+        return edge
+
+    def add_edge_records(self, records: Iterable[Any]):
+        """
+        按端点 ID 批量添加边，直接引用图中已有的节点对象。
+        records 中的每一项需要提供 id / title / start_id / end_id / description / weight 属性，
+        且已经过校验（例如 graph_io.Edge_Record），这里不再重复校验。
+        """
+        for record in records:
+            for node_id in (record.start_id, record.end_id):
+                if node_id not in self.nodes:
+                    raise ValueError(f"节点 ID {node_id} 不存在")
+            self.add_edge(Knowledge_Edge.model_construct(
+                id=record.id,
+                title=record.title,
+                start_node=self.nodes[record.start_id],
+                end_node=self.nodes[record.end_id],
+                description=record.description,
+                weight=record.weight,
+            ))
 
     def get_node(self, node_id: str):
         return self.nodes.get(node_id)
@@ -49,6 +291,19 @@ class Knowledge_Graph(BaseModel):
     def get_edge(self, edge_id: str):
         return self.edges.get(edge_id)
 
+    def find_nodes_by_name(self, name: str) -> List[Knowledge_Node]:
+        """按 name 精确查找节点"""
+        return [self.nodes[node_id] for node_id in self._name_index.get(name)]
+
+    def find_nodes_by_title(self, title: str) -> List[Knowledge_Node]:
+        """按 title 精确查找节点"""
+        return [self.nodes[node_id] for node_id in self._title_index.get(title)]
+
+    def search_nodes(self, query: str, limit: int = 10) -> List[Tuple[Knowledge_Node, float]]:
+        """在 description / content 中全文检索，返回按相关度降序排列的 (节点, 分数)"""
+        self._flush_text_index()
+        return [(self.nodes[node_id], score) for node_id, score in self._text_index.search(query, limit)]
+
     def get_all_node(self):
         node_list = list(self.nodes.values())
         return node_list
@@ -75,93 +330,142 @@ class Knowledge_Graph(BaseModel):
         if node_id not in self.nodes:
             raise ValueError(f"节点 ID {node_id} 不存在")
         node = self.nodes[node_id]
-        node_list = []
-        for edge_id in node.in_edge:
-            edge = self.edges[edge_id]
-            node_list.append(edge.start_node.id)
-            node_list.append(edge.end_node.id)
+        neighbours = {}
         for edge_id in node.out_edge:
-            edge = self.edges[edge_id]
-            node_list.append(edge.start_node.id)
-            node_list.append(edge.end_node.id)
-
-        node_list = list(set(node_list))
-        node_list.remove(node.id)
-        new_node_list = [self.nodes[node_id] for node_id in node_list]
-        return new_node_list
+            neighbours[self.edges[edge_id].end_node.id] = None
+        for edge_id in node.in_edge:
+            neighbours[self.edges[edge_id].start_node.id] = None
+        neighbours.pop(node_id, None)
+        return [self.nodes[neighbour_id] for neighbour_id in neighbours]
 
-    def get_out_neighbours(self,node_id:str):
+    def get_out_neighbours(self, node_id: str) -> List[str]:
+        """出边终点的 ID，去重；只有存在自环时才包含节点自身"""
         if node_id not in self.nodes:
             raise ValueError(f"节点 ID {node_id} 不存在")
         node = self.nodes[node_id]
-        node_list = []
-        for edge_id in node.out_edge:
-            edge = self.edges[edge_id]
-            node_list.append(edge.start_node.id)
-            node_list.append(edge.end_node.id)
+        return list(dict.fromkeys(self.edges[edge_id].end_node.id for edge_id in node.out_edge))
+
+    def k_hop(
+        self,
+        node_id: str,
+        k: int,
+        direction: str = "out",
+        edge_filter: Optional[graph_traversal.EdgeFilter] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[graph_traversal.Hop]:
+        """惰性产出 k 跳邻域内的 (节点, 到达边, 跳数)，详见 graph_traversal.k_hop"""
+        return graph_traversal.k_hop(self, node_id, k, direction, edge_filter, limit)
+
+    def subgraph(self, node_ids: Iterable[str]) -> Iterator[Tuple[Knowledge_Node, List[Knowledge_Edge]]]:
+        """惰性产出 node_ids 导出子图中的 (节点, 集合内出边)"""
+        return graph_traversal.subgraph(self, node_ids)
+
+    @staticmethod
+    def _swap_remove(edge_list: List[str], positions: Dict[str, int], edge_id: str):
+        """把 edge_id 与列表末尾元素交换后弹出，O(1)"""
+        pos = positions.pop(edge_id)
+        last_id = edge_list.pop()
+        if last_id != edge_id:
+            edge_list[pos] = last_id
+            positions[last_id] = pos
+
+    def _detach_edge(self, edge_id: str, removed_node_ids=()):
+        """删除一条边，并从仍然存在的端点邻接列表中摘除"""
+        edge = self.edges.pop(edge_id)
+        start_id, end_id = edge.start_node.id, edge.end_node.id
+        private = self.__pydantic_private__
+        out_pos, in_pos = private["_out_pos"], private["_in_pos"]
+        if start_id in removed_node_ids:
+            out_pos.pop(edge_id, None)
+        else:
+            self._swap_remove(self._own_node(start_id).out_edge, out_pos, edge_id)
+        if end_id in removed_node_ids:
+            in_pos.pop(edge_id, None)
+        else:
+            self._swap_remove(self._own_node(end_id).in_edge, in_pos, edge_id)
+        private["_version"] += 1
+        if private["_listeners"]:
+            self._notify("remove_edge", edge)
 
-        node_list = list(set(node_list))
-        return node_list
-    
     def remove_node(self, node_id: str):
-        if node_id not in self.nodes:
-            raise ValueError(f"节点 ID {node_id} 不存在")
-        node = self.nodes[node_id]
-        for edge_id in node.in_edge:
-            edge = self.edges[edge_id]
-            edge.start_node.out_edge.remove(edge_id)
-            del self.edges[edge_id]
+        self.remove_nodes([node_id])
 
-        for edge_id in node.out_edge:
-            edge = self.edges[edge_id]
-            edge.end_node.in_edge.remove(edge_id)
-            del self.edges[edge_id]
+    def remove_nodes(self, node_ids: Iterable[str]):
+        """
+        批量删除节点及其关联边，复杂度 O(被删节点的度数之和)。
+        任一节点不存在时抛出 ValueError，且图保持不变。
+        """
+        node_ids = list(dict.fromkeys(node_ids))
+        for node_id in node_ids:
+            if node_id not in self.nodes:
+                raise ValueError(f"节点 ID {node_id} 不存在")
 
-        del self.nodes[node_id]
+        removed = set(node_ids)
+        for node_id in node_ids:
+            node = self.nodes[node_id]
+            # 自环同时出现在 in_edge 与 out_edge 中，第二次遇到时已被删除
+            for edge_id in node.in_edge + node.out_edge:
+                if edge_id in self.edges:
+                    self._detach_edge(edge_id, removed)
+
+        for node_id in node_ids:
+            node = self.nodes.pop(node_id)
+            self._unindex_node(node)
+            if self.__pydantic_private__["_listeners"]:
+                self._notify("remove_node", node)
 
     def remove_edge(self,edge_id:str):
         if edge_id not in self.edges:
             raise ValueError(f'节点 ID {edge_id} 不存在')
-            
-        edge = self.edges[edge_id]
-        edge.start_node.out_edge.remove(edge_id)
-        edge.end_node.in_edge.remove(edge_id)
-        del self.edges[edge_id]
-
-    def find_path(self, start_node_id: str, goal_node_id: str) -> List[str]:
-        if start_node_id not in self.nodes or goal_node_id not in self.nodes:
-            raise ValueError("起始或终止节点不存在")
-        
-        if start_node_id == goal_node_id:
-            return [start_node_id]
-        
-        queue = deque()
-        queue.append(start_node_id)
-        parent = {start_node_id: None}
-        
-        while queue:
-            current_id = queue.popleft()
-            
-            if current_id == goal_node_id:
-                path = []
-                while current_id is not None:
-                    path.append(current_id)
-                    current_id = parent[current_id]
-                return path[::-1]
-            
-            neighbors = []
-            node = self.nodes[current_id]
-            for edge_id in node.out_edge:
-                edge = self.edges[edge_id]
-                neighbors.append(edge.end_node.id)
-            
-            for neighbor_id in neighbors:
-                if neighbor_id not in parent:
-                    parent[neighbor_id] = current_id
-                    queue.append(neighbor_id)
-        
-        return []  
-                
+        self._detach_edge(edge_id)
+
+    def remove_edges(self, edge_ids: Iterable[str]):
+        """
+        批量删除边，每条边 O(1)。
+        任一边不存在时抛出 ValueError，且图保持不变。
+        """
+        edge_ids = list(dict.fromkeys(edge_ids))
+        for edge_id in edge_ids:
+            if edge_id not in self.edges:
+                raise ValueError(f'节点 ID {edge_id} 不存在')
+        for edge_id in edge_ids:
+            self._detach_edge(edge_id)
+
+    def find_path(
+        self,
+        start_node_id: str,
+        goal_node_id: str,
+        method: str = "bfs",
+        weight: graph_paths.WeightFn = graph_paths.default_weight,
+        heuristic: Optional[graph_paths.HeuristicFn] = None,
+    ) -> List[str]:
+        """
+        查找从起点到终点的最短路径，找不到时返回空列表。
+        method:
+            - "bfs": 按跳数的双向 BFS
+            - "dijkstra": 按边权（默认 Knowledge_Edge.weight）的最短路径
+            - "astar": 带 heuristic 的 A* 搜索
+        """
+        return graph_paths.find_path(self, start_node_id, goal_node_id, method, weight, heuristic)
+
+    def find_k_shortest_paths(
+        self,
+        start_node_id: str,
+        goal_node_id: str,
+        k: int,
+        weight: graph_paths.WeightFn = graph_paths.default_weight,
+    ) -> List[Tuple[List[str], float]]:
+        """Yen 算法求前 k 条无环最短路径，返回 (路径, 总权重) 列表"""
+        return graph_paths.k_shortest_paths(self, start_node_id, goal_node_id, k, weight)
+
+    def find_paths(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        weight: Optional[graph_paths.WeightFn] = None,
+    ) -> List[List[str]]:
+        """批量查找最短路径，起点相同的查询共享搜索；weight 为空时按跳数计算"""
+        return graph_paths.batch_shortest_paths(self, pairs, weight)
+
     
 if __name__ == '__main__':
     user_1 = Knowledge_Node(name="dht", content="a student of hit")
@@ -1,13 +1,22 @@
-from typing import Any, Dict, Generator
+from typing import Any, Dict, Generator, Optional, Set
 from langgraph.types import Interrupt
 from langchain_core.messages import AIMessage, ToolMessage
 from models import ChatResponsePayload, ChatResponseContent, QuestionRequestPayload
-from utils.message_utils import send_text_msg, send_agent_msg, send_stop_msg
+from utils.message_utils import send_text_msg, send_agent_msg, send_stop_msg, THINKING_MSG, TOOL_CALLING_MSG
 
 class AgentResponseHandler:
     """
     处理 LangGraph 的流式输出，并将其转换为 ChatResponsePayload。
+    已经以 text_delta 逐段发送过的 AI 消息不再重复发送完整文本。
     """
+    def __init__(self):
+        self.streamed_ids: Set[str] = set()
+
+    def mark_streamed(self, message_id: Optional[str]):
+        """记录已经以增量方式发送过内容的消息 ID"""
+        if message_id is not None:
+            self.streamed_ids.add(message_id)
+
     def handle_stream_output(self, stream_output: Dict[str, Any]) -> Generator[ChatResponsePayload, None, None]:
         """
         处理 LangGraph 的单个流式输出步骤。
@@ -42,9 +51,9 @@ class AgentResponseHandler:
 
             # 发送节点状态消息
             if node_name == "agent":
-                yield send_agent_msg("thinking", "Agent 正在思考...", current_node="agent")
+                yield THINKING_MSG
             elif node_name == "tools":
-                yield send_agent_msg("tool_calling", "Agent 正在调用工具...", current_node="tools")
+                yield TOOL_CALLING_MSG
 
             # 检查节点输出中是否有消息
             if isinstance(node_output, dict) and "messages" in node_output:
@@ -54,7 +63,10 @@ class AgentResponseHandler:
                 print(f"DEBUG: latest_message type: {type(latest_message)}")
                 print(f"DEBUG: latest_message content: {latest_message.content}")
 
-                if isinstance(latest_message, AIMessage):
+                if isinstance(latest_message, AIMessage) and latest_message.id in self.streamed_ids:
+                    # 文本已经以增量方式发送，完整消息只写入检查点
+                    continue
+                elif isinstance(latest_message, AIMessage):
                     # 如果是 AI 的文本响应
                     content_to_send = str(latest_message.content) if not isinstance(latest_message.content, str) else latest_message.content
                     print(f"DEBUG: Yielding text message: {content_to_send}")
@@ -1,13 +1,18 @@
-from typing import Annotated, TypedDict, List, Any, Dict, Optional, Generator
+from typing import Annotated, TypedDict, List, Any, AsyncGenerator, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.types import Command
+from langchain_core.messages import AIMessageChunk
 from langchain_core.runnables import RunnableConfig
-from langchain_core.tools import BaseTool
-from utils.message_utils import send_text_msg, send_agent_msg, send_stop_msg
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.tools import BaseTool, StructuredTool
+from utils.message_utils import send_text_msg, send_agent_msg, send_stop_msg, send_delta_msg
+from utils.stream_coalescer import Delta_Coalescer
 from models import ChatMessage, ChatResponsePayload, ChatResponseContent, QuestionRequestPayload, AgentStatusContent
 from ..llm_manager import llm_manager
 from .agent_message_converter import convert_chat_messages_to_langchain_messages
@@ -15,6 +20,29 @@ from .agent_response_handler import AgentResponseHandler
 
 logger = logging.getLogger(__name__)
 
+# 只有同步实现的工具在这个线程池中执行，避免阻塞事件循环，
+# 也不占用 asyncio.to_thread 等使用的默认线程池
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="agent-tool")
+
+# 流式输出时 text_delta 的合并窗口：攒满这么多字符，或第一个 token 等待这么久后发送
+STREAM_MAX_CHARS = 48
+STREAM_MAX_DELAY = 0.05
+
+def with_thread_pool(tool: BaseTool) -> BaseTool:
+    """
+    为只有同步实现的 StructuredTool 补上异步实现：在 TOOL_EXECUTOR 中执行原函数。
+    run_in_executor 会复制当前上下文，interrupt 等依赖 LangGraph 运行配置的调用在线程中同样可用。
+    已有异步实现的工具原样返回。
+    """
+    if not isinstance(tool, StructuredTool) or tool.coroutine is not None or tool.func is None:
+        return tool
+    func = tool.func
+
+    async def coroutine(*args, **kwargs):
+        return await run_in_executor(TOOL_EXECUTOR, func, *args, **kwargs)
+
+    return tool.model_copy(update={"coroutine": coroutine})
+
 class AgentState(TypedDict):
     """
     定义 Agent 的状态。
@@ -31,13 +59,17 @@ class MainAgentGraph:
     主 Agent 图，使用 LangGraph 构建。
     负责管理 Agent 的决策流，包括调用 LLM 进行思考和调用工具。
     """
-    def __init__(self, tools: List[BaseTool]):
+    def __init__(self, tools: List[BaseTool], streaming: bool = True):
         """
         初始化 MainAgentGraph。
         Args:
             tools: 从 MCP 服务器获取的 LangChain 工具列表。
+            streaming: 是否把 LLM 输出逐 token 转发给客户端（合并为 text_delta 消息）。
         """
-        self.langchain_tools = tools
+        self.streaming = streaming
+        self.langchain_tools = [with_thread_pool(tool) for tool in tools]
+        self.tool_node = ToolNode(self.langchain_tools)
+        self._llm = None  # 绑定了工具的 LLM，首次调用 agent_node 时创建
         
         # 构建 LangGraph 状态图
         graph_builder = StateGraph(AgentState)
@@ -68,9 +100,9 @@ class MainAgentGraph:
         # 编译图，并设置检查点（用于保存和恢复 Agent 状态）
         self.graph = graph_builder.compile(checkpointer=MemorySaver())
 
-    def agent_node(self, state: AgentState):
+    async def agent_node(self, state: AgentState):
         """
-        Agent 节点：负责 LLM 的思考和决策。
+        Agent 节点：负责 LLM 的思考和决策，异步调用 LLM，等待期间不阻塞事件循环。
         Args:
             state: 当前 Agent 的状态，包含消息历史。
         Returns:
@@ -79,10 +111,13 @@ class MainAgentGraph:
         try:
             # 获取 LLM 实例并绑定工具
             # LLM 会根据消息历史和可用工具，决定是生成文本响应还是调用工具。
-            llm = llm_manager.get_llm("gemini-2.5-flash")
+            if self._llm is None:
+                llm = llm_manager.get_llm("gemini-2.5-flash", streaming=self.streaming)
+                self._llm = llm.bind_tools(self.langchain_tools) if self.langchain_tools else llm
+            llm = self._llm
             
             # 调用 LLM 处理当前消息历史
-            response = llm.invoke(state["messages"])
+            response = await llm.ainvoke(state["messages"])
             
             logger.info(f"Agent node response: {response}")
             
@@ -92,9 +127,9 @@ class MainAgentGraph:
             logger.error(f"Error in agent_node: {e}", exc_info=True)
             raise # 重新抛出异常，由上层调用者处理
 
-    def custom_tool_node(self, state: AgentState):
+    async def custom_tool_node(self, state: AgentState):
         """
-        工具节点：负责执行 Agent 决策调用的工具。
+        工具节点：负责执行 Agent 决策调用的工具，同一轮的多个工具调用并发执行。
         Args:
             state: 当前 Agent 的状态，包含工具调用请求。
         Returns:
@@ -103,7 +138,7 @@ class MainAgentGraph:
         try:
             # 使用 ToolNode 执行工具调用
             # ToolNode 会解析 LLM 的工具调用请求，并执行相应的工具。
-            tool_output = ToolNode(self.langchain_tools).invoke(state)
+            tool_output = await self.tool_node.ainvoke(state)
             
             logger.info(f"Tool node output: {tool_output}")
             
@@ -113,7 +148,7 @@ class MainAgentGraph:
             logger.error(f"Error in custom_tool_node: {e}", exc_info=True)
             raise # 重新抛出异常，由上层调用者处理
 
-    def process_chat_request(self, history: List[ChatMessage], current_text: str, current_image_paths: List[str], thread_id: str = "default_thread", resume_data: Optional[Dict[str, Any]] = None) -> Generator[ChatResponsePayload, None, None]:
+    async def process_chat_request(self, history: List[ChatMessage], current_text: str, current_image_paths: List[str], thread_id: str = "default_thread", resume_data: Optional[Dict[str, Any]] = None) -> AsyncGenerator[ChatResponsePayload, None]:
         """
         处理聊天请求，并以流式方式返回 Agent 的响应。
         Args:
@@ -145,12 +180,68 @@ class MainAgentGraph:
         # 迭代 LangGraph 的 stream 输出
         # LangGraph 会逐步执行图中的节点，并流式返回状态更新。
         response_handler = AgentResponseHandler()
-        for s in self.graph.stream(stream_input, config=config):
-            logger.info(f"LangGraph stream step output: {s}")
-            yield from response_handler.handle_stream_output(s)
-        
+        if not self.streaming:
+            async for s in self.graph.astream(stream_input, config=config):
+                logger.info(f"LangGraph stream step output: {s}")
+                for response_payload in response_handler.handle_stream_output(s):
+                    yield response_payload
+        else:
+            async for response_payload in self._stream_with_deltas(stream_input, config, response_handler):
+                yield response_payload
+
         yield send_stop_msg() # 任务结束，发送停止消息
 
+    async def _stream_with_deltas(self, stream_input: Any, config: RunnableConfig, response_handler: AgentResponseHandler) -> AsyncGenerator[ChatResponsePayload, None]:
+        """
+        同时订阅 LangGraph 的 "updates" 与 "messages" 流：
+        agent 节点的 token 经 Delta_Coalescer 合并后作为 text_delta 发送，
+        节点完成时的状态更新照常交给 AgentResponseHandler。
+        节点返回的仍是完整消息，检查点中保存的消息不受流式输出影响。
+        """
+        coalescer = Delta_Coalescer(STREAM_MAX_CHARS, STREAM_MAX_DELAY)
+        stream = self.graph.astream(stream_input, config=config, stream_mode=["updates", "messages"]).__aiter__()
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(stream.__anext__())
+                # 缓冲区有文本时最多等待到它的发送期限，LLM 停顿期间已收到的文本不会滞留
+                done, _ = await asyncio.wait({pending}, timeout=coalescer.time_left())
+                if not done:
+                    text = coalescer.flush()
+                    if text:
+                        yield send_delta_msg(text)
+                    continue
+                try:
+                    mode, data = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+
+                if mode == "messages":
+                    chunk, metadata = data
+                    if metadata.get("langgraph_node") == "agent" and isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str):
+                        response_handler.mark_streamed(chunk.id)
+                        text = coalescer.push(chunk.content)
+                        if text:
+                            yield send_delta_msg(text)
+                    continue
+
+                logger.info(f"LangGraph stream step output: {data}")
+                text = coalescer.flush()
+                if text:
+                    yield send_delta_msg(text)
+                for response_payload in response_handler.handle_stream_output(data):
+                    yield response_payload
+
+            text = coalescer.flush()
+            if text:
+                yield send_delta_msg(text)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
 async def create_main_agent_graph() -> MainAgentGraph:
     """
     异步创建 MainAgentGraph 实例
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from .utils.api_key_loader import load_api_key
@@ -8,10 +8,15 @@ from .utils.api_key_loader import load_api_key
 class LLMManager:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
-        self.models: Dict[str, BaseChatModel] = {}
+        self.models: Dict[Tuple[str, bool], BaseChatModel] = {}
 
-    def get_llm(self, model_name: str) -> BaseChatModel:
-        if model_name not in self.models:
+    def get_llm(self, model_name: str, streaming: bool = False) -> BaseChatModel:
+        """
+        获取模型实例。streaming 为 True 时模型以流式方式请求 API，
+        在 LangGraph 的 "messages" 流模式下可以逐 token 取得输出；ainvoke 的返回值仍是完整消息。
+        """
+        key = (model_name, streaming)
+        if key not in self.models:
             model_config = self.config.get(model_name)
             if not model_config:
                 raise ValueError(f"Model '{model_name}' not found in config")
@@ -29,15 +34,16 @@ class LLMManager:
             if not base_url:
                 raise ValueError(f"Model '{model_name}' has no base_url defined in config")
 
-            self.models[model_name] = ChatOpenAI(
+            self.models[key] = ChatOpenAI(
                 model=model_config.get("model"),
                 temperature=model_config.get("temperature", 0.7),
                 base_url=base_url,
                 api_key=api_key,
-                disable_streaming=True,
+                streaming=streaming,
+                disable_streaming=not streaming,
             )
 
-        return self.models[model_name]
+        return self.models[key]
 
 llm_config = {
     "deepseek-r1": {
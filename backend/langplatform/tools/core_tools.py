@@ -5,8 +5,10 @@ sys.path.append(str(Path(__file__).parent))
 # 导入工具模块以注册工具
 from attempt_completion import attempt_completion
 from question_request import question_tool
+from graph_tools import graph_tools
 
 tools = [
     attempt_completion,
     question_tool,
+    *graph_tools,
 ]
\ No newline at end of file
@@ -0,0 +1,90 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+from langchain_core.tools import tool
+
+from knowledge_base import get_cached_graph, get_knowledge_graph
+from langplatform.utils.graph_lookup import lookup_text, neighbourhood_text, path_text, search_text
+
+# 单次工具调用最多处理的查询数，避免一次返回过长的结果
+MAX_BATCH = 20
+
+
+def _edge_weight(edge) -> float:
+    return edge.weight
+
+
+class GraphLookupSchema(BaseModel):
+    """按节点 ID 或名称批量查询知识点详情。"""
+    refs: List[str] = Field(
+        description="节点 ID 或知识点名称列表，一次可查询多个。",
+        examples=[["二叉树", "链表"]],
+        min_length=1,
+        max_length=MAX_BATCH,
+    )
+
+
+@tool("graph_lookup", args_schema=GraphLookupSchema)
+def graph_lookup(refs: List[str]) -> str:
+    """按节点 ID 或名称批量查询知识点详情。"""
+    return lookup_text(get_knowledge_graph(), refs)
+
+
+class GraphSearchSchema(BaseModel):
+    """在知识图谱中按关键词批量全文检索知识点。"""
+    queries: List[str] = Field(
+        description="检索语句列表，每条分别检索。",
+        examples=[["二叉树遍历", "动态规划 背包"]],
+        min_length=1,
+        max_length=MAX_BATCH,
+    )
+    limit: int = Field(default=5, ge=1, le=20, description="每条检索返回的最多结果数。")
+
+
+@tool("graph_search", args_schema=GraphSearchSchema)
+def graph_search(queries: List[str], limit: int = 5) -> str:
+    """在知识图谱中按关键词批量全文检索知识点。"""
+    return search_text(get_cached_graph(), queries, limit)
+
+
+class GraphNeighbourhoodSchema(BaseModel):
+    """批量获取知识点周围的关联知识（前置、后续等），以紧凑文本返回。"""
+    refs: List[str] = Field(
+        description="中心知识点的节点 ID 或名称列表。",
+        examples=[["二叉搜索树"]],
+        min_length=1,
+        max_length=MAX_BATCH,
+    )
+    hops: int = Field(default=1, ge=0, le=3, description="向外扩展的最大跳数。")
+    budget: int = Field(default=300, ge=20, le=2000, description="每个知识点结果的 token 上限。")
+
+
+@tool("graph_neighbourhood", args_schema=GraphNeighbourhoodSchema)
+def graph_neighbourhood(refs: List[str], hops: int = 1, budget: int = 300) -> str:
+    """批量获取知识点周围的关联知识（前置、后续等），以紧凑文本返回。"""
+    return neighbourhood_text(get_knowledge_graph(), refs, hops, budget)
+
+
+class PathQuery(BaseModel):
+    start: str = Field(description="起点的节点 ID 或名称。", examples=["数组"])
+    goal: str = Field(description="终点的节点 ID 或名称。", examples=["红黑树"])
+
+
+class GraphPathSchema(BaseModel):
+    """批量查询知识点之间的最短学习路径。"""
+    pairs: List[PathQuery] = Field(
+        description="起点与终点对的列表，起点相同的查询会共享一次搜索。",
+        min_length=1,
+        max_length=MAX_BATCH,
+    )
+    weighted: bool = Field(default=False, description="为 true 时按边权（学习难度）计算，否则按步数计算。")
+
+
+@tool("graph_path", args_schema=GraphPathSchema)
+def graph_path(pairs: List[PathQuery], weighted: bool = False) -> str:
+    """批量查询知识点之间的最短学习路径。"""
+    pairs = [PathQuery.model_validate(pair) for pair in pairs]
+    return path_text(get_cached_graph(), [(pair.start, pair.goal) for pair in pairs], _edge_weight if weighted else None)
+
+
+graph_tools = [graph_lookup, graph_search, graph_neighbourhood, graph_path]
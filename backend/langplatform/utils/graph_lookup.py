@@ -0,0 +1,102 @@
+"""
+知识图谱查询工具的文本输出
+
+graph_tools 中的 LangChain 工具只负责参数校验，查询与格式化都在这里完成，
+不依赖 LangChain，可以单独测试。工具在 Agent 的线程池中并发执行，
+这里的函数都只读取图；子图序列化器按图共用一个，见 shared_serializer。
+"""
+import threading
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from graph_index import content_to_text
+from langplatform.utils.graph_prompt import Graph_Prompt_Serializer
+
+_serializer_lock = threading.Lock()
+_serializer: Optional[Graph_Prompt_Serializer] = None
+
+
+def resolve(graph, ref: str):
+    """按节点 ID 或名称查找节点，名称重复时取第一个"""
+    node = graph.get_node(ref)
+    if node is not None:
+        return node
+    matches = graph.find_nodes_by_name(ref)
+    return matches[0] if matches else None
+
+
+def brief(node, limit: int = 80) -> str:
+    title = f"（{node.title}）" if node.title else ""
+    description = " ".join((node.description or "").split())
+    if len(description) > limit:
+        description = description[:limit] + "…"
+    return f"{node.name}{title} [id={node.id}]" + (f": {description}" if description else "")
+
+
+def sections(queries: Sequence[str], results: Sequence[str]) -> str:
+    return "\n".join(f"[{i}] {query}\n{result}" for i, (query, result) in enumerate(zip(queries, results), 1))
+
+
+def shared_serializer(graph) -> Graph_Prompt_Serializer:
+    """
+    返回 graph 的共用序列化器，片段缓存在多次调用之间保留。
+    共享的图被替换后，旧图的序列化器取消订阅，为新图重新创建。
+    """
+    global _serializer
+    with _serializer_lock:
+        if _serializer is None or _serializer.graph is not graph:
+            if _serializer is not None:
+                _serializer.close()
+            _serializer = Graph_Prompt_Serializer(graph)
+        return _serializer
+
+
+def lookup_text(graph, refs: List[str]) -> str:
+    results = []
+    for ref in refs:
+        node = resolve(graph, ref)
+        if node is None:
+            results.append("未找到")
+            continue
+        detail = brief(node, limit=300)
+        if node.content is not None:
+            detail += f"\n内容: {content_to_text(node.content)[:300]}"
+        results.append(detail)
+    return sections(refs, results)
+
+
+def search_text(graph, queries: List[str], limit: int = 5) -> str:
+    results = []
+    for query in queries:
+        hits = graph.search_nodes(query, limit)
+        results.append("\n".join(f"- {brief(node)} (score={score:.2f})" for node, score in hits) or "无结果")
+    return sections(queries, results)
+
+
+def neighbourhood_text(graph, refs: List[str], hops: int = 1, budget: int = 300) -> str:
+    serializer = shared_serializer(graph)
+    results = []
+    for ref in refs:
+        node = resolve(graph, ref)
+        results.append(serializer.render([node.id], budget, max_hops=hops) if node is not None else "未找到")
+    return sections(refs, results)
+
+
+def path_text(graph, pairs: List[Tuple[str, str]], weight: Optional[Callable] = None) -> str:
+    """graph 需要提供 find_paths（例如 Cached_Graph），起点相同的查询共享一次搜索"""
+    labels = []
+    resolved = []
+    for start_ref, goal_ref in pairs:
+        labels.append(f"{start_ref} -> {goal_ref}")
+        start, goal = resolve(graph, start_ref), resolve(graph, goal_ref)
+        resolved.append((start.id, goal.id) if start is not None and goal is not None else None)
+
+    valid = [pair for pair in resolved if pair is not None]
+    paths = iter(graph.find_paths(valid, weight=weight))
+    results = []
+    for pair in resolved:
+        if pair is None:
+            results.append("起点或终点不存在")
+            continue
+        path = next(paths)
+        results.append(" -> ".join(graph.nodes[node_id].name for node_id in path) if path else "不可达")
+    return sections(labels, results)
@@ -0,0 +1,182 @@
+"""
+把知识图谱的局部子图序列化为注入提示词的文本，并控制 token 预算。
+
+从种子节点出发按相关度逐步扩展：跳数越少越优先，同一跳数内中心度越高越优先
+（默认使用度数，也可以传入 Graph_Analytics.pagerank() 等得分）。
+每输出一个节点，同时输出它与已输出节点之间的边，保证边引用的节点都在上下文中。
+下一个片段放不下时立即停止。
+
+支持两种格式：
+- "text": 面向阅读的列表，例如 "- 二叉树（数据结构）: 每个节点最多两个子节点"
+- "triples": 三元组，例如 "(二叉树, 先修, 二叉搜索树)"
+
+节点与边的渲染结果按 ID 缓存，通过 Knowledge_Graph.subscribe 在对象变更时失效。
+"""
+import heapq
+import re
+from itertools import count
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from graph_index import content_to_text
+
+# 计数函数：返回一段文本占用的 token 数
+TokenCounter = Callable[[str], int]
+
+FORMATS = ("text", "triples")
+
+_CJK_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿぀-ヿ가-힯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    不依赖分词器的 token 估算：中日韩字符按 1 个 token 计，其余字符按 4 个字符 1 个 token 计。
+    对常见的 BPE 分词器偏保守，可以换成真实分词器的计数函数。
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+class Graph_Prompt_Serializer:
+    """
+    子图到提示词的序列化器。
+    max_hops 限制从种子出发的最大跳数；max_chars 限制单个节点描述与内容的长度。
+    """
+
+    def __init__(
+        self,
+        graph,
+        format: str = "text",
+        count_tokens: TokenCounter = estimate_tokens,
+        max_hops: int = 2,
+        max_chars: int = 200,
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"不支持的格式: {format}")
+        self.graph = graph
+        self.format = format
+        self.count_tokens = count_tokens
+        self.max_hops = max_hops
+        self.max_chars = max_chars
+        # 节点 ID -> (片段, token 数)；边 ID -> (起点名称, 终点名称, 片段, token 数)
+        self._node_cache: Dict[str, Tuple[str, int]] = {}
+        self._edge_cache: Dict[str, Tuple[str, str, str, int]] = {}
+        if hasattr(graph, "subscribe"):
+            graph.subscribe(self._on_change)
+
+    def close(self):
+        if hasattr(self.graph, "unsubscribe"):
+            self.graph.unsubscribe(self._on_change)
+
+    def _on_change(self, event: str, obj):
+        if event.endswith("_node"):
+            self._node_cache.pop(obj.id, None)
+        else:
+            self._edge_cache.pop(obj.id, None)
+
+    # ---------- 片段渲染 ----------
+
+    def _render_node(self, node) -> str:
+        detail = "；".join(
+            _clip(part, self.max_chars)
+            for part in (node.description or "", content_to_text(node.content))
+            if part
+        )
+        if self.format == "triples":
+            head = f"({node.name}, 标题, {node.title})\n" if node.title else ""
+            return head + (f"({node.name}, 说明, {detail})" if detail else f"({node.name})")
+        title = f"（{node.title}）" if node.title else ""
+        return f"- {node.name}{title}" + (f": {detail}" if detail else "")
+
+    def _render_edge(self, edge, start_name: str, end_name: str) -> str:
+        relation = edge.title or "相关"
+        if self.format == "triples":
+            return f"({start_name}, {relation}, {end_name})"
+        note = f"（{_clip(edge.description, self.max_chars)}）" if edge.description else ""
+        return f"  {start_name} --{relation}--> {end_name}{note}"
+
+    def _node_fragment(self, node) -> Tuple[str, int]:
+        cached = self._node_cache.get(node.id)
+        if cached is None:
+            text = self._render_node(node)
+            cached = self._node_cache[node.id] = (text, self.count_tokens(text) + 1)  # +1 计入换行
+        return cached
+
+    def _edge_fragment(self, edge, start_name: str, end_name: str) -> Tuple[str, int]:
+        cached = self._edge_cache.get(edge.id)
+        # 端点改名后需要重新渲染
+        if cached is None or cached[0] != start_name or cached[1] != end_name:
+            text = self._render_edge(edge, start_name, end_name)
+            cached = self._edge_cache[edge.id] = (start_name, end_name, text, self.count_tokens(text) + 1)
+        return cached[2], cached[3]
+
+    # ---------- 扩展与输出 ----------
+
+    def _centrality(self, node_id: str, scores: Optional[Dict[str, float]]) -> float:
+        if scores is not None:
+            return scores.get(node_id, 0.0)
+        node = self.graph.nodes[node_id]
+        return len(node.in_edge) + len(node.out_edge)
+
+    def stream(
+        self,
+        seeds: Iterable[str],
+        budget: int,
+        scores: Optional[Dict[str, float]] = None,
+        max_hops: Optional[int] = None,
+    ) -> Iterator[str]:
+        """逐个产出片段（不含换行），累计 token 数不超过 budget；max_hops 为空时使用构造时的设置"""
+        graph = self.graph
+        if max_hops is None:
+            max_hops = self.max_hops
+        tie = count()
+        heap: List[Tuple[int, float, int, str]] = []
+        queued: Set[str] = set()
+        for node_id in dict.fromkeys(seeds):
+            if node_id not in graph.nodes:
+                raise ValueError(f"节点 ID {node_id} 不存在")
+            heapq.heappush(heap, (0, -self._centrality(node_id, scores), next(tie), node_id))
+            queued.add(node_id)
+
+        emitted: Dict[str, str] = {}  # 已输出节点 ID -> 名称
+        used = 0
+        while heap:
+            depth, _, _, node_id = heapq.heappop(heap)
+            node = graph.nodes[node_id]
+            text, tokens = self._node_fragment(node)
+            if used + tokens > budget:
+                return
+            used += tokens
+            emitted[node_id] = node.name
+            yield text
+
+            # 自环同时出现在出边与入边中，按边 ID 去重
+            incident = {edge.id: edge for edge in graph.get_out_edge(node_id)}
+            for edge in graph.get_in_edge(node_id):
+                incident.setdefault(edge.id, edge)
+            for edge in incident.values():
+                start_id, end_id = edge.start_node.id, edge.end_node.id
+                other_id = end_id if start_id == node_id else start_id
+                if other_id in emitted:
+                    text, tokens = self._edge_fragment(edge, emitted[start_id], emitted[end_id])
+                    if used + tokens > budget:
+                        return
+                    used += tokens
+                    yield text
+                elif other_id not in queued and depth < max_hops:
+                    queued.add(other_id)
+                    heapq.heappush(heap, (depth + 1, -self._centrality(other_id, scores), next(tie), other_id))
+
+    def render(
+        self,
+        seeds: Iterable[str],
+        budget: int,
+        scores: Optional[Dict[str, float]] = None,
+        max_hops: Optional[int] = None,
+    ) -> str:
+        """把 stream 的结果拼接为一段文本"""
+        return "\n".join(self.stream(seeds, budget, scores, max_hops))
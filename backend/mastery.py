@@ -0,0 +1,268 @@
+"""
+学生知识掌握度叠加层
+
+掌握度保存为一个 学生 × 知识点 的 float32 稠密矩阵，取值范围 [0, 1]，未学习过为 0。
+学生 ID 与节点 ID 分别经 Id_Interner 映射为行号与列号，行列容量按需倍增。
+path 非空时矩阵放在该文件的 np.memmap 上（文件会被覆盖），扩容时按行分块拷贝，
+不会把整个矩阵读入内存；ID 映射只在内存中保存。
+
+所有更新与统计都是对整批学生 / 节点的向量化操作，例如：
+
+    overlay.update(["s1", "s2"], ["二叉树", "二叉树"], [0.8, 0.4], alpha=0.3)
+    overlay.decay(elapsed=7, half_life=30)
+    overlay.class_summary(class_student_ids)
+    overlay.weakest_on_path("s1", "数组", "红黑树")
+
+节点从图中删除时对应的列会被清零并回收。
+"""
+import os
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from graph_ids import Id_Interner
+
+# 扩容与统计时每次处理的行数
+CHUNK_ROWS = 4096
+
+
+class Class_Summary(NamedTuple):
+    """班级统计，各数组与 node_ids 按下标一一对应"""
+    node_ids: List[str]
+    mean: np.ndarray
+    std: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    struggling: np.ndarray  # 掌握度低于阈值的学生比例
+
+
+class Mastery_Overlay:
+    """
+    graph 为掌握度所依附的知识图谱，用于校验节点、查询路径并在节点删除时回收列。
+    student_capacity / node_capacity 为初始行列容量。
+    """
+
+    def __init__(
+        self,
+        graph,
+        path: Optional[str] = None,
+        student_capacity: int = 64,
+        node_capacity: Optional[int] = None,
+    ):
+        self.graph = graph
+        self.path = path
+        self._students = Id_Interner()
+        self._nodes = Id_Interner()
+        shape = (max(student_capacity, 1), max(node_capacity or len(graph.nodes), 1))
+        self._matrix = self._allocate(shape, self.path)
+        if hasattr(graph, "subscribe"):
+            graph.subscribe(self._on_change)
+
+    def close(self):
+        if hasattr(self.graph, "unsubscribe"):
+            self.graph.unsubscribe(self._on_change)
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(学生数, 知识点数)，不含空闲行列"""
+        return len(self._students), len(self._nodes)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """底层矩阵的只读视图，行列下标见 student_row / node_column"""
+        view = self._matrix[:self._students.capacity, :self._nodes.capacity]
+        view.flags.writeable = False
+        return view
+
+    def student_row(self, student_id: str) -> Optional[int]:
+        return self._students.get(student_id)
+
+    def node_column(self, node_id: str) -> Optional[int]:
+        return self._nodes.get(node_id)
+
+    # ---------- 存储 ----------
+
+    @staticmethod
+    def _allocate(shape: Tuple[int, int], path: Optional[str]) -> np.ndarray:
+        if path is None:
+            return np.zeros(shape, dtype=np.float32)
+        with open(path, "wb") as f:
+            f.truncate(shape[0] * shape[1] * 4)
+        return np.memmap(path, dtype=np.float32, mode="r+", shape=shape)
+
+    def _grow(self, rows: int, cols: int):
+        old_rows, old_cols = self._matrix.shape
+        if rows <= old_rows and cols <= old_cols:
+            return
+        new_rows, new_cols = old_rows, old_cols
+        while new_rows < rows:
+            new_rows *= 2
+        while new_cols < cols:
+            new_cols *= 2
+
+        used_rows, used_cols = self._students.capacity, self._nodes.capacity
+        target_path = None if self.path is None else self.path + ".tmp"
+        matrix = self._allocate((new_rows, new_cols), target_path)
+        for begin in range(0, used_rows, CHUNK_ROWS):
+            end = min(begin + CHUNK_ROWS, used_rows)
+            matrix[begin:end, :used_cols] = self._matrix[begin:end, :used_cols]
+        if self.path is not None:
+            matrix.flush()
+            del matrix
+            self._matrix.flush()
+            del self._matrix
+            os.replace(target_path, self.path)
+            matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(new_rows, new_cols))
+        self._matrix = matrix
+
+    def _on_change(self, event: str, obj):
+        if event == "remove_node":
+            col = self._nodes.get(obj.id)
+            if col is not None:
+                self._matrix[:, col] = 0.0
+                self._nodes.release(obj.id)
+
+    # ---------- ID 到下标 ----------
+
+    def _student_rows(self, student_ids: Sequence[str], create: bool) -> np.ndarray:
+        if create:
+            rows = np.fromiter((self._students.intern(s) for s in student_ids), dtype=np.intp, count=len(student_ids))
+            self._grow(self._students.capacity, 1)
+            return rows
+        rows = [self._students.get(s) for s in student_ids]
+        return np.array([-1 if row is None else row for row in rows], dtype=np.intp)
+
+    def _node_columns(self, node_ids: Sequence[str], create: bool) -> np.ndarray:
+        if create:
+            for node_id in node_ids:
+                if node_id not in self.graph.nodes:
+                    raise ValueError(f"节点 ID {node_id} 不存在")
+            cols = np.fromiter((self._nodes.intern(n) for n in node_ids), dtype=np.intp, count=len(node_ids))
+            self._grow(1, self._nodes.capacity)
+            return cols
+        cols = [self._nodes.get(n) for n in node_ids]
+        return np.array([-1 if col is None else col for col in cols], dtype=np.intp)
+
+    # ---------- 更新 ----------
+
+    def update(
+        self,
+        student_ids: Sequence[str],
+        node_ids: Sequence[str],
+        values: Union[Sequence[float], np.ndarray],
+        alpha: Optional[float] = None,
+    ):
+        """
+        批量写入 (学生, 知识点, 掌握度) 三元组，三个序列长度相同。
+        alpha 为空时直接覆盖；否则按指数滑动平均 m = (1 - alpha) * m + alpha * value 融合新的测评结果。
+        同一批中重复的 (学生, 知识点) 以最后一条为准。结果截断到 [0, 1]。
+        """
+        values = np.asarray(values, dtype=np.float32)
+        if not (len(student_ids) == len(node_ids) == len(values)):
+            raise ValueError("student_ids、node_ids 与 values 的长度必须相同")
+        if alpha is not None and not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha 必须在 (0, 1] 之间")
+        rows = self._student_rows(student_ids, create=True)
+        cols = self._node_columns(node_ids, create=True)
+        if alpha is not None:
+            values = (1.0 - alpha) * self._matrix[rows, cols] + alpha * values
+        self._matrix[rows, cols] = np.clip(values, 0.0, 1.0)
+
+    def decay(self, elapsed: float, half_life: float, student_ids: Optional[Sequence[str]] = None):
+        """
+        遗忘衰减：经过 elapsed 时间后掌握度乘以 0.5 ** (elapsed / half_life)，两者单位相同。
+        student_ids 为空时衰减全部学生。
+        """
+        if half_life <= 0:
+            raise ValueError("half_life 必须为正数")
+        factor = np.float32(0.5 ** (elapsed / half_life))
+        if student_ids is None:
+            for begin in range(0, self._students.capacity, CHUNK_ROWS):
+                self._matrix[begin:begin + CHUNK_ROWS] *= factor
+            return
+        rows = self._student_rows(student_ids, create=False)
+        rows = rows[rows >= 0]
+        self._matrix[rows] *= factor
+
+    def remove_student(self, student_id: str):
+        row = self._students.get(student_id)
+        if row is not None:
+            self._matrix[row] = 0.0
+            self._students.release(student_id)
+
+    # ---------- 查询 ----------
+
+    def get(self, student_id: str, node_ids: Sequence[str]) -> np.ndarray:
+        """学生在各知识点上的掌握度，未记录的学生或知识点为 0"""
+        result = np.zeros(len(node_ids), dtype=np.float32)
+        row = self._students.get(student_id)
+        if row is None:
+            return result
+        cols = self._node_columns(node_ids, create=False)
+        known = cols >= 0
+        result[known] = self._matrix[row, cols[known]]
+        return result
+
+    def class_summary(
+        self,
+        student_ids: Sequence[str],
+        node_ids: Optional[Sequence[str]] = None,
+        threshold: float = 0.6,
+    ) -> Class_Summary:
+        """
+        班级看板统计：按知识点计算一组学生掌握度的均值、标准差、最小值、最大值，
+        以及低于 threshold 的学生比例。node_ids 为空时统计所有记录过的知识点。
+        未记录的学生按全 0 计入。
+        """
+        if not student_ids:
+            raise ValueError("student_ids 不能为空")
+        if node_ids is None:
+            node_ids = [key for key in map(self._nodes.key, range(self._nodes.capacity)) if key is not None]
+        cols = self._node_columns(node_ids, create=False)
+        known = cols >= 0
+        rows = self._student_rows(student_ids, create=False)
+        rows = np.sort(rows)
+
+        n = len(node_ids)
+        total = np.zeros(n, dtype=np.float64)
+        squares = np.zeros(n, dtype=np.float64)
+        minimum = np.full(n, np.inf, dtype=np.float64)
+        maximum = np.full(n, -np.inf, dtype=np.float64)
+        below = np.zeros(n, dtype=np.int64)
+        for begin in range(0, len(rows), CHUNK_ROWS):
+            chunk_rows = rows[begin:begin + CHUNK_ROWS]
+            block = np.zeros((len(chunk_rows), n), dtype=np.float32)
+            present = chunk_rows >= 0
+            block[np.ix_(present, known)] = self._matrix[np.ix_(chunk_rows[present], cols[known])]
+            total += block.sum(axis=0)
+            squares += np.square(block, dtype=np.float64).sum(axis=0)
+            np.minimum(minimum, block.min(axis=0), out=minimum)
+            np.maximum(maximum, block.max(axis=0), out=maximum)
+            below += (block < threshold).sum(axis=0)
+
+        count = len(rows)
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+        return Class_Summary(list(node_ids), mean, std, minimum, maximum, below / count)
+
+    def weakest_on_path(
+        self,
+        student_id: str,
+        start_node_id: str,
+        goal_node_id: str,
+        k: int = 3,
+        method: str = "bfs",
+    ) -> List[Tuple[str, float]]:
+        """
+        沿 graph.find_path(start, goal) 给出的学习路径，返回学生掌握度最低的 k 个先修知识点
+        (节点 ID, 掌握度)，按掌握度升序、同分按路径顺序排列；不包括终点本身，不可达时返回空列表。
+        """
+        path = self.graph.find_path(start_node_id, goal_node_id, method=method)
+        prerequisites = path[:-1]
+        if not prerequisites:
+            return []
+        scores = self.get(student_id, prerequisites)
+        order = np.argsort(scores, kind="stable")[:k]
+        return [(prerequisites[i], float(scores[i])) for i in order]
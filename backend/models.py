@@ -1,6 +1,6 @@
 from extensions import db
-from pydantic import BaseModel
-from typing import Union, List, Dict, Any, Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Annotated, Union, List, Dict, Any, Literal, Optional
 
 class User(db.Model):
     id = db.Column(db.String(20), primary_key=True)  # 学号/ID
@@ -58,7 +58,7 @@ class ChatResponseContent(BaseModel):
     agent_status_content: Optional[AgentStatusContent] = None # For agent_status
 
 class ChatResponsePayload(BaseModel):
-    type: str # "text", "agent_status", "stop", "question_request"
+    type: str # "text", "text_delta", "agent_status", "stop", "question_request"
     content: ChatResponseContent
 
 class ImageUploadRequestPayload(BaseModel):
@@ -69,15 +69,136 @@ class ImageUploadResponsePayload(BaseModel):
     status: str
     message: str
     image_path: Optional[str] = None
+    upload_id: Optional[str] = None # 分块上传时对应的上传 ID
+
+class ImageUploadBeginPayload(BaseModel):
+    filename: str
+    size: int # 文件字节数
+    sha256: str # 文件内容的 SHA-256（十六进制），用于校验与续传
+
+class ImageUploadReadyPayload(BaseModel):
+    upload_id: str # 十六进制；二进制帧头中使用对应的 16 字节，帧格式见 chunked_upload
+    offset: int # 服务端已收到的字节数，客户端从这里开始发送
+    chunk_size: int # 建议的块大小
+
+class ImageUploadProgressPayload(BaseModel):
+    upload_id: str
+    offset: int # 服务端已收到的字节数；出错时为期望的下一块偏移量
+    status: str = "success" # "success" or "error"
+    message: Optional[str] = None
+
+class ImageUploadCancelPayload(BaseModel):
+    upload_id: str
+
+class GraphSubscribeRequestPayload(BaseModel):
+    action: str = "subscribe" # "subscribe" or "unsubscribe"
+    interval: float = 0.05 # 合并增量的时间窗（秒）
+
+class GraphSubscribeResponsePayload(BaseModel):
+    status: str
+    message: str
+    version: Optional[int] = None # 订阅开始时的图版本，客户端先按此版本拉取全图
+
+class GraphDeltaPayload(BaseModel):
+    version: int # 应用本批增量后的图版本
+    resync: bool = False # 为 True 时增量已被丢弃，客户端需要重新拉取全图
+    deltas: List[Dict[str, Any]] = []
+
+class GraphQueryRequestPayload(BaseModel):
+    query_id: str # 客户端生成，用于关联响应与取消
+    op: str # "lookup", "search", "k_hop", "path", "subgraph"，参数见 graph_query
+    params: Dict[str, Any] = {}
+    page_size: int = 100
+    cursor: Optional[str] = None # 续查时传入上一页的游标
+    max_pages: Optional[int] = None # 推送这么多页后暂停，为空时推送到结束
+
+class GraphQueryCancelPayload(BaseModel):
+    query_id: str
+
+class GraphQueryResponsePayload(BaseModel):
+    query_id: str
+    status: str # "success", "cancelled" or "error"
+    items: List[Dict[str, Any]] = []
+    cursor: Optional[str] = None # 下一页的游标，最后一页为 None
+    done: bool = False
+    message: Optional[str] = None
+
+class CancelRequestPayload(BaseModel):
+    request_id: str # 要取消的请求 ID
+
+class CancelResponsePayload(BaseModel):
+    status: str
+    message: str
+    request_id: str
 
 class WebSocketMessage(BaseModel):
+    """服务端发送的消息；payload 可以直接放 pydantic 模型或字典，由 utils.json_codec 编码，不做校验"""
     type: str
-    payload: Union[
-        AuthRequestPayload,
-        AuthResponsePayload,
-        ChatRequestPayload,
-        ChatResponsePayload,
-        ImageUploadRequestPayload,
-        ImageUploadResponsePayload,
-        Dict[str, Any] # Fallback for unknown or generic payloads
-    ]
\ No newline at end of file
+    request_id: Optional[str] = None # 客户端提供的请求 ID，服务端在该请求的每个响应帧中原样返回
+    payload: Any = {}
+
+# 客户端发送的消息：按 type 区分的联合类型，一次校验同时完成 JSON 解析、消息类型判断与 payload 校验
+class _InboundMessage(BaseModel):
+    request_id: Optional[str] = None
+
+class AuthRequestMessage(_InboundMessage):
+    type: Literal["auth_request"]
+    payload: AuthRequestPayload
+
+class ChatRequestMessage(_InboundMessage):
+    type: Literal["chat_request"]
+    payload: ChatRequestPayload
+
+class ImageUploadRequestMessage(_InboundMessage):
+    type: Literal["image_upload_request"]
+    payload: ImageUploadRequestPayload
+
+class HealthCheckMessage(_InboundMessage):
+    type: Literal["health_check"]
+    payload: Dict[str, Any] = {}
+
+class ImageUploadBeginMessage(_InboundMessage):
+    type: Literal["image_upload_begin"]
+    payload: ImageUploadBeginPayload
+
+class ImageUploadCancelMessage(_InboundMessage):
+    type: Literal["image_upload_cancel"]
+    payload: ImageUploadCancelPayload
+
+class GraphSubscribeMessage(_InboundMessage):
+    type: Literal["graph_subscribe"]
+    payload: GraphSubscribeRequestPayload = GraphSubscribeRequestPayload()
+
+class GraphQueryMessage(_InboundMessage):
+    type: Literal["graph_query"]
+    payload: GraphQueryRequestPayload
+
+class GraphQueryCancelMessage(_InboundMessage):
+    type: Literal["graph_query_cancel"]
+    payload: GraphQueryCancelPayload
+
+class CancelMessage(_InboundMessage):
+    type: Literal["cancel"]
+    payload: CancelRequestPayload
+
+InboundMessage = Annotated[
+    Union[
+        AuthRequestMessage,
+        ChatRequestMessage,
+        ImageUploadRequestMessage,
+        ImageUploadBeginMessage,
+        ImageUploadCancelMessage,
+        HealthCheckMessage,
+        GraphSubscribeMessage,
+        GraphQueryMessage,
+        GraphQueryCancelMessage,
+        CancelMessage,
+    ],
+    Field(discriminator="type"),
+]
+
+inbound_message_adapter = TypeAdapter(InboundMessage)
+
+def parse_inbound_message(data: Union[str, bytes]) -> InboundMessage:
+    """解析并校验客户端发来的一帧，失败时抛出 pydantic.ValidationError"""
+    return inbound_message_adapter.validate_json(data)
@@ -0,0 +1,397 @@
+import json
+import sqlite3
+from collections import deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator, Iterable
+
+import graph_paths
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    content TEXT
+);
+CREATE TABLE IF NOT EXISTS edges (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    start_id TEXT NOT NULL REFERENCES nodes(id),
+    end_id TEXT NOT NULL REFERENCES nodes(id),
+    description TEXT,
+    weight REAL NOT NULL DEFAULT 1.0
+);
+CREATE INDEX IF NOT EXISTS idx_edges_start ON edges(start_id);
+CREATE INDEX IF NOT EXISTS idx_edges_end ON edges(end_id);
+"""
+
+
+class _Node_View(Mapping):
+    """节点表的只读映射视图，len / in / 迭代均直接查询数据库"""
+
+    def __init__(self, graph: "SQLite_Knowledge_Graph"):
+        self._graph = graph
+
+    def __getitem__(self, node_id: str) -> Knowledge_Node:
+        node = self._graph.get_node(node_id)
+        if node is None:
+            raise KeyError(node_id)
+        return node
+
+    def __contains__(self, node_id) -> bool:
+        return self._graph._has_node(node_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self._graph._conn.execute("SELECT id FROM nodes ORDER BY rowid"))
+
+    def __len__(self) -> int:
+        return self._graph._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+
+class _Edge_View(Mapping):
+    """边表的只读映射视图，len / in / 迭代均直接查询数据库"""
+
+    def __init__(self, graph: "SQLite_Knowledge_Graph"):
+        self._graph = graph
+
+    def __getitem__(self, edge_id: str) -> Knowledge_Edge:
+        edge = self._graph.get_edge(edge_id)
+        if edge is None:
+            raise KeyError(edge_id)
+        return edge
+
+    def __contains__(self, edge_id) -> bool:
+        return self._graph._has_edge(edge_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self._graph._conn.execute("SELECT id FROM edges ORDER BY rowid"))
+
+    def __len__(self) -> int:
+        return self._graph._conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+
+class SQLite_Knowledge_Graph:
+    """
+    基于 SQLite 的持久化知识图谱
+
+    与 Knowledge_Graph 提供相同的接口，节点与边分别存放在 nodes / edges 表中：
+    - 打开数据库时不会反序列化整张图，所有读取接口按需查询
+    - 每次写入都是一个独立事务，以 WAL 模式增量提交，无需整体重写快照
+    - 大量写入可以放进 batch() 中合并为一个事务
+
+    读取接口返回的 Knowledge_Node / Knowledge_Edge 均为按需物化的副本，
+    修改它们不会写回数据库。
+    """
+
+    def __init__(self, path: str, synchronous: str = "FULL"):
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._batch_depth = 0
+
+        self.nodes = _Node_View(self)
+        self.edges = _Edge_View(self)
+
+    def close(self):
+        self._conn.close()
+
+    def _migrate(self):
+        """为旧版本创建的数据库补齐新增的列"""
+        edge_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(edges)")}
+        if "weight" not in edge_columns:
+            self._conn.execute("ALTER TABLE edges ADD COLUMN weight REAL NOT NULL DEFAULT 1.0")
+
+    # ---------- 与 pydantic 模型互转 ----------
+
+    @classmethod
+    def from_graph(cls, graph: Knowledge_Graph, path: str) -> "SQLite_Knowledge_Graph":
+        """把内存中的 Knowledge_Graph 写入数据库"""
+        store = cls(path)
+        with store.batch():
+            for node in graph.nodes.values():
+                store.add_node(node)
+            for edge in graph.edges.values():
+                store.add_edge(edge)
+        return store
+
+    def to_graph(self) -> Knowledge_Graph:
+        """完整加载为内存中的 Knowledge_Graph"""
+        graph = Knowledge_Graph()
+        for row in self._conn.execute("SELECT id, name, title, description, content FROM nodes ORDER BY rowid"):
+            graph.add_node(self._row_to_node(row, [], []))
+        for edge_id, title, start_id, end_id, description, weight in self._conn.execute(
+            "SELECT id, title, start_id, end_id, description, weight FROM edges ORDER BY rowid"
+        ):
+            graph.add_edge(Knowledge_Edge.model_construct(
+                id=edge_id,
+                title=title,
+                start_node=graph.nodes[start_id],
+                end_node=graph.nodes[end_id],
+                description=description,
+                weight=weight,
+            ))
+        return graph
+
+    # ---------- 事务 ----------
+
+    @contextmanager
+    def batch(self):
+        """把多次写入合并为一个事务，支持嵌套；异常时整体回滚"""
+        if self._batch_depth == 0:
+            self._conn.execute("BEGIN")
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.execute("ROLLBACK")
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self._conn.execute("COMMIT")
+
+    @contextmanager
+    def _inserting(self):
+        """
+        写入前的重复检查看不到其他进程随后写入的同一 ID（例如两个进程分配到重叠的 ID），
+        这种冲突由主键约束在插入时拒绝，与检查失败一样报 ValueError，事务整体回滚
+        """
+        try:
+            with self.batch():
+                yield
+        except sqlite3.IntegrityError as error:
+            raise ValueError(f"ID 已存在: {error}") from error
+
+    # ---------- 写入 ----------
+
+    def add_node(self, node: Knowledge_Node):
+        if self._has_node(node.id):
+            raise ValueError(f"节点 ID {node.id} 已存在")
+        content = None if node.content is None else json.dumps(node.content, ensure_ascii=False)
+        with self._inserting():
+            self._conn.execute(
+                "INSERT INTO nodes (id, name, title, description, content) VALUES (?, ?, ?, ?, ?)",
+                (node.id, node.name, node.title, node.description, content),
+            )
+
+    def add_edge(self, edge: Knowledge_Edge):
+        if not self._has_node(edge.start_node.id):
+            raise ValueError(f"节点 ID {edge.start_node.id} 不存在")
+        elif not self._has_node(edge.end_node.id):
+            raise ValueError(f"节点 ID {edge.end_node.id} 不存在")
+        if self._has_edge(edge.id):
+            raise ValueError(f"节点 ID {edge.id} 已存在")
+        with self._inserting():
+            self._conn.execute(
+                "INSERT INTO edges (id, title, start_id, end_id, description, weight) VALUES (?, ?, ?, ?, ?, ?)",
+                (edge.id, edge.title, edge.start_node.id, edge.end_node.id, edge.description, edge.weight),
+            )
+
+    def add_nodes(self, nodes: Iterable[Knowledge_Node]):
+        """批量写入节点，整批在一个事务中提交"""
+        nodes = list(nodes)
+        existing = self._existing("nodes", [node.id for node in nodes])
+        seen = set()
+        for node in nodes:
+            if node.id in existing or node.id in seen:
+                raise ValueError(f"节点 ID {node.id} 已存在")
+            seen.add(node.id)
+        with self._inserting():
+            self._conn.executemany(
+                "INSERT INTO nodes (id, name, title, description, content) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (node.id, node.name, node.title, node.description,
+                     None if node.content is None else json.dumps(node.content, ensure_ascii=False))
+                    for node in nodes
+                ],
+            )
+
+    def add_edge_records(self, records: Iterable[Any]):
+        """按端点 ID 批量写入边，records 的字段约定见 Knowledge_Graph.add_edge_records"""
+        records = list(records)
+        endpoints = {node_id for record in records for node_id in (record.start_id, record.end_id)}
+        existing_nodes = self._existing("nodes", list(endpoints))
+        existing_edges = self._existing("edges", [record.id for record in records])
+        seen = set()
+        for record in records:
+            for node_id in (record.start_id, record.end_id):
+                if node_id not in existing_nodes:
+                    raise ValueError(f"节点 ID {node_id} 不存在")
+            if record.id in existing_edges or record.id in seen:
+                raise ValueError(f"节点 ID {record.id} 已存在")
+            seen.add(record.id)
+        with self._inserting():
+            self._conn.executemany(
+                "INSERT INTO edges (id, title, start_id, end_id, description, weight) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (record.id, record.title, record.start_id, record.end_id, record.description, record.weight)
+                    for record in records
+                ],
+            )
+
+    def remove_node(self, node_id: str):
+        self.remove_nodes([node_id])
+
+    def remove_nodes(self, node_ids: Iterable[str]):
+        node_ids = list(dict.fromkeys(node_ids))
+        for node_id in node_ids:
+            if not self._has_node(node_id):
+                raise ValueError(f"节点 ID {node_id} 不存在")
+        with self.batch():
+            for node_id in node_ids:
+                self._conn.execute("DELETE FROM edges WHERE start_id = ? OR end_id = ?", (node_id, node_id))
+                self._conn.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
+
+    def remove_edge(self, edge_id: str):
+        self.remove_edges([edge_id])
+
+    def remove_edges(self, edge_ids: Iterable[str]):
+        edge_ids = list(dict.fromkeys(edge_ids))
+        for edge_id in edge_ids:
+            if not self._has_edge(edge_id):
+                raise ValueError(f'节点 ID {edge_id} 不存在')
+        with self.batch():
+            self._conn.executemany("DELETE FROM edges WHERE id = ?", [(edge_id,) for edge_id in edge_ids])
+
+    # ---------- 查询辅助 ----------
+
+    def _existing(self, table: str, ids: List[str]) -> set:
+        """返回 ids 中已存在于 table 的部分，分块查询以避开 SQLite 参数数量上限"""
+        found = set()
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(row[0] for row in self._conn.execute(f"SELECT id FROM {table} WHERE id IN ({placeholders})", chunk))
+        return found
+
+    def _has_node(self, node_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM nodes WHERE id = ?", (node_id,)).fetchone() is not None
+
+    def _has_edge(self, edge_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM edges WHERE id = ?", (edge_id,)).fetchone() is not None
+
+    def _edge_ids_by(self, column: str, node_id: str) -> List[str]:
+        rows = self._conn.execute(f"SELECT id FROM edges WHERE {column} = ? ORDER BY rowid", (node_id,))
+        return [row[0] for row in rows]
+
+    def _row_to_node(self, row, in_edge: List[str], out_edge: List[str]) -> Knowledge_Node:
+        node_id, name, title, description, content = row
+        return Knowledge_Node.model_construct(
+            id=node_id,
+            name=name,
+            title=title,
+            description=description,
+            content=None if content is None else json.loads(content),
+            in_edge=in_edge,
+            out_edge=out_edge,
+        )
+
+    def _load_edges(self, where: str, params) -> List[Knowledge_Edge]:
+        rows = self._conn.execute(
+            f"SELECT id, title, start_id, end_id, description, weight FROM edges WHERE {where} ORDER BY rowid", params
+        ).fetchall()
+        # 同一批边共享端点对象，避免重复查询
+        node_cache: Dict[str, Knowledge_Node] = {}
+        edges = []
+        for edge_id, title, start_id, end_id, description, weight in rows:
+            for node_id in (start_id, end_id):
+                if node_id not in node_cache:
+                    node_cache[node_id] = self.get_node(node_id)
+            edges.append(Knowledge_Edge.model_construct(
+                id=edge_id,
+                title=title,
+                start_node=node_cache[start_id],
+                end_node=node_cache[end_id],
+                description=description,
+                weight=weight,
+            ))
+        return edges
+
+    # ---------- 读取 ----------
+
+    def get_node(self, node_id: str):
+        row = self._conn.execute(
+            "SELECT id, name, title, description, content FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._row_to_node(row, self._edge_ids_by("end_id", node_id), self._edge_ids_by("start_id", node_id))
+
+    def get_edge(self, edge_id: str):
+        edges = self._load_edges("id = ?", (edge_id,))
+        return edges[0] if edges else None
+
+    def get_all_node(self):
+        return [self.get_node(node_id) for node_id in self.nodes]
+
+    def get_all_edge(self):
+        return self._load_edges("1", ())
+
+    def get_out_edge(self, node_id: str):
+        if not self._has_node(node_id):
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        return self._load_edges("start_id = ?", (node_id,))
+
+    def get_in_edge(self, node_id: str):
+        if not self._has_node(node_id):
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        return self._load_edges("end_id = ?", (node_id,))
+
+    def get_neighbours(self, node_id: str):
+        if not self._has_node(node_id):
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        rows = self._conn.execute(
+            "SELECT end_id FROM edges WHERE start_id = ? UNION SELECT start_id FROM edges WHERE end_id = ?",
+            (node_id, node_id),
+        )
+        return [self.get_node(row[0]) for row in rows if row[0] != node_id]
+
+    def get_out_neighbours(self, node_id: str):
+        if not self._has_node(node_id):
+            raise ValueError(f"节点 ID {node_id} 不存在")
+        rows = self._conn.execute("SELECT DISTINCT end_id FROM edges WHERE start_id = ?", (node_id,))
+        return [row[0] for row in rows]
+
+    def find_path(
+        self,
+        start_node_id: str,
+        goal_node_id: str,
+        method: str = "bfs",
+        weight: graph_paths.WeightFn = graph_paths.default_weight,
+        heuristic: Optional[graph_paths.HeuristicFn] = None,
+    ) -> List[str]:
+        """与 Knowledge_Graph.find_path 相同；method 为 "bfs" 时使用逐层查询出边的 BFS"""
+        return graph_paths.find_path(self, start_node_id, goal_node_id, method, weight, heuristic, self._bfs_path)
+
+    def _bfs_path(self, start_node_id: str, goal_node_id: str) -> List[str]:
+        if not self._has_node(start_node_id) or not self._has_node(goal_node_id):
+            raise ValueError("起始或终止节点不存在")
+
+        if start_node_id == goal_node_id:
+            return [start_node_id]
+
+        # 逐层展开，每个被访问的节点只查询一次出边
+        parent: Dict[str, Optional[str]] = {start_node_id: None}
+        queue = deque([start_node_id])
+        while queue:
+            current_id = queue.popleft()
+            for (neighbour_id,) in self._conn.execute(
+                "SELECT end_id FROM edges WHERE start_id = ? ORDER BY rowid", (current_id,)
+            ).fetchall():
+                if neighbour_id in parent:
+                    continue
+                parent[neighbour_id] = current_id
+                if neighbour_id == goal_node_id:
+                    path = [neighbour_id]
+                    while parent[path[-1]] is not None:
+                        path.append(parent[path[-1]])
+                    return path[::-1]
+                queue.append(neighbour_id)
+
+        return []
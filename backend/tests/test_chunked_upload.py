@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from chunked_upload import Upload_Manager, encode_chunk
+
+
+DATA = bytes(range(256)) * 40  # 10240 字节
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+async def _send(manager, state, start, end, chunk=4096):
+    done = False
+    for offset in range(start, end, chunk):
+        upload_id, parsed_offset, data = manager.parse_chunk(encode_chunk(state.upload_id, offset, DATA[offset:min(offset + chunk, end)]))
+        done = await manager.write_chunk(upload_id, parsed_offset, data)
+    return done
+
+
+def test_upload_resume_and_verify(tmp_path):
+    async def scenario():
+        manager = Upload_Manager(str(tmp_path))
+        state = await manager.begin("conn-1", "photo.png", len(DATA), DIGEST)
+        assert state.received == 0
+        assert not await _send(manager, state, 0, 6000)
+
+        # 偏移量不连续时拒绝，已写入的数据保留
+        with pytest.raises(ValueError):
+            await manager.write_chunk(state.upload_id, 8000, DATA[8000:9000])
+        assert state.received == 6000
+
+        # 连接断开后续传
+        await manager.release("conn-1")
+        assert len(manager) == 0
+        resumed = await manager.begin("conn-2", "photo.png", len(DATA), DIGEST)
+        assert resumed.received == 6000
+        assert await _send(manager, resumed, 6000, len(DATA))
+        assert len(manager) == 0
+        with open(resumed.final_path, "rb") as f:
+            assert f.read() == DATA
+        assert not os.path.exists(resumed.part_path)
+
+    asyncio.run(scenario())
+
+
+def test_hash_mismatch_and_abort(tmp_path):
+    async def scenario():
+        manager = Upload_Manager(str(tmp_path))
+        state = await manager.begin("conn", "a.png", len(DATA), hashlib.sha256(b"other").hexdigest())
+        with pytest.raises(ValueError):
+            await _send(manager, state, 0, len(DATA))
+        assert os.listdir(tmp_path) == []
+
+        state = await manager.begin("conn", "a.png", len(DATA), DIGEST)
+        await _send(manager, state, 0, 4096)
+        with pytest.raises(ValueError):
+            await manager.write_chunk(state.upload_id, 4096, DATA[4096:] + b"extra")
+        await manager.abort(state.upload_id, "conn")
+        assert os.listdir(tmp_path) == []
+        with pytest.raises(ValueError):
+            await manager.write_chunk(state.upload_id, 4096, DATA[4096:])
+
+    asyncio.run(scenario())
+
+
+def test_limits(tmp_path):
+    async def scenario():
+        manager = Upload_Manager(str(tmp_path), max_size=len(DATA), max_active=3, max_per_owner=2)
+        digests = [hashlib.sha256(bytes([i])).hexdigest() for i in range(4)]
+        for bad in [("../x.png", 10, DIGEST), ("x.png", len(DATA) + 1, DIGEST), ("x.png", 10, "abc")]:
+            with pytest.raises(ValueError):
+                await manager.begin("a", *bad)
+
+        await manager.begin("a", "0.png", 10, digests[0])
+        with pytest.raises(ValueError):
+            await manager.begin("b", "0.png", 10, digests[0])  # 同一文件正在上传
+        await manager.begin("a", "1.png", 10, digests[1])
+        with pytest.raises(ValueError):
+            await manager.begin("a", "2.png", 10, digests[2])  # 单个连接的上限
+        await manager.begin("b", "2.png", 10, digests[2])
+        with pytest.raises(ValueError):
+            await manager.begin("c", "3.png", 10, digests[3])  # 总数上限
+        await manager.release("a")
+        await manager.begin("c", "3.png", 10, digests[3])
+        assert len(manager) == 2
+
+    asyncio.run(scenario())
+
+
+def test_abort_during_final_write(tmp_path):
+    async def scenario():
+        manager = Upload_Manager(str(tmp_path))
+        state = await manager.begin("conn", "a.png", len(DATA), DIGEST)
+        await _send(manager, state, 0, 8192)
+        write = asyncio.create_task(manager.write_chunk(state.upload_id, 8192, DATA[8192:]))
+        await asyncio.sleep(0)  # 让写入任务进入线程池
+        abort = asyncio.create_task(manager.abort(state.upload_id, "conn"))
+        results = await asyncio.gather(write, abort, return_exceptions=True)
+        assert results[0] is True  # 最后一块已经在写入，上传完成
+        assert isinstance(results[1], ValueError)
+        assert len(manager) == 0
+
+    asyncio.run(scenario())
+
+
+def test_finish_failure_keeps_upload(tmp_path, monkeypatch):
+    async def scenario():
+        manager = Upload_Manager(str(tmp_path))
+        state = await manager.begin("conn", "a.png", len(DATA), DIGEST)
+        replace = os.replace
+
+        def failing_replace(src, dst):
+            monkeypatch.setattr(os, "replace", replace)
+            raise OSError("磁盘已满")
+
+        monkeypatch.setattr(os, "replace", failing_replace)
+        with pytest.raises(OSError):
+            await _send(manager, state, 0, len(DATA))
+        assert manager.get(state.upload_id) is state and state.received == len(DATA)
+
+        # 从 received（等于 size）发送空数据块完成上传
+        assert await manager.write_chunk(state.upload_id, len(DATA), b"")
+        with open(state.final_path, "rb") as f:
+            assert f.read() == DATA
+
+    asyncio.run(scenario())
@@ -0,0 +1,174 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from compact_graph import Compact_Knowledge_Graph
+
+
+@pytest.fixture
+def setup_graph():
+    graph = Knowledge_Graph()
+    nodes = [Knowledge_Node(name=name, id=f"node{name}") for name in "ABCD"]
+    for node in nodes:
+        graph.add_node(node)
+    node_a, node_b, node_c, node_d = nodes
+    graph.add_edge(Knowledge_Edge(start_node=node_a, end_node=node_b, id="edgeAB", title="ab"))
+    graph.add_edge(Knowledge_Edge(start_node=node_b, end_node=node_c, id="edgeBC"))
+    graph.add_edge(Knowledge_Edge(start_node=node_a, end_node=node_c, id="edgeAC"))
+    graph.add_edge(Knowledge_Edge(start_node=node_c, end_node=node_d, id="edgeCD"))
+    return Compact_Knowledge_Graph.from_graph(graph)
+
+
+def test_from_graph_and_to_graph_round_trip(setup_graph):
+    graph = setup_graph.to_graph()
+    assert set(graph.nodes) == {"nodeA", "nodeB", "nodeC", "nodeD"}
+    assert set(graph.edges) == {"edgeAB", "edgeBC", "edgeAC", "edgeCD"}
+    assert graph.get_node("nodeA").out_edge == ["edgeAB", "edgeAC"]
+    assert graph.get_edge("edgeAB").title == "ab"
+    assert graph.find_path("nodeA", "nodeD") == ["nodeA", "nodeC", "nodeD"]
+
+
+def test_find_path_methods(setup_graph):
+    avoid_ac = lambda edge: 10.0 if edge.id == "edgeAC" else 1.0
+    assert setup_graph.find_path("nodeA", "nodeD", method="bfs") == ["nodeA", "nodeC", "nodeD"]
+    assert setup_graph.find_path("nodeA", "nodeD", method="dijkstra", weight=avoid_ac) == ["nodeA", "nodeB", "nodeC", "nodeD"]
+    assert setup_graph.find_path("nodeA", "nodeD", method="astar", weight=avoid_ac, heuristic=lambda a, b: 0.0) == [
+        "nodeA", "nodeB", "nodeC", "nodeD",
+    ]
+    with pytest.raises(ValueError, match="heuristic"):
+        setup_graph.find_path("nodeA", "nodeD", method="astar")
+
+
+def test_get_node_and_edge(setup_graph):
+    node = setup_graph.get_node("nodeA")
+    assert node.name == "A"
+    assert node.out_edge == ["edgeAB", "edgeAC"]
+    assert setup_graph.get_node("nonExistent") is None
+
+    edge = setup_graph.get_edge("edgeBC")
+    assert edge.start_node.id == "nodeB"
+    assert edge.end_node.id == "nodeC"
+    assert setup_graph.get_edge("nonExistent") is None
+
+
+def test_duplicate_and_missing_ids_raise_error(setup_graph):
+    with pytest.raises(ValueError, match="节点 ID nodeA 已存在"):
+        setup_graph.add_node(Knowledge_Node(name="A", id="nodeA"))
+    missing = Knowledge_Node(name="X", id="nonExistent")
+    with pytest.raises(ValueError, match="节点 ID nonExistent 不存在"):
+        setup_graph.add_edge(Knowledge_Edge(start_node=missing, end_node=setup_graph.get_node("nodeA")))
+    with pytest.raises(ValueError, match="节点 ID nonExistent 不存在"):
+        setup_graph.get_out_edge("nonExistent")
+
+
+def test_in_out_edges_and_neighbours(setup_graph):
+    assert [edge.id for edge in setup_graph.get_out_edge("nodeA")] == ["edgeAB", "edgeAC"]
+    assert {edge.id for edge in setup_graph.get_in_edge("nodeC")} == {"edgeBC", "edgeAC"}
+    assert {node.id for node in setup_graph.get_neighbours("nodeB")} == {"nodeA", "nodeC"}
+
+
+def test_remove_node_and_edge(setup_graph):
+    setup_graph.remove_node("nodeB")
+    assert setup_graph.get_node("nodeB") is None
+    assert "edgeAB" not in setup_graph.edges
+    assert "edgeBC" not in setup_graph.edges
+    assert setup_graph.get_node("nodeA").out_edge == ["edgeAC"]
+    assert len(setup_graph.nodes) == 3
+    assert len(setup_graph.edges) == 2
+
+    # 墓碑不再保留被删除节点与边的属性
+    assert setup_graph._node_name[1] is None and setup_graph._node_title[1] is None
+    assert setup_graph._edge_title[0] is None
+
+    setup_graph.remove_edge("edgeCD")
+    assert setup_graph.get_node("nodeD").in_edge == []
+    with pytest.raises(ValueError, match="节点 ID edgeCD 不存在"):
+        setup_graph.remove_edge("edgeCD")
+
+
+def test_rebuild_after_many_mutations():
+    graph = Compact_Knowledge_Graph()
+    graph.REBUILD_MIN_PENDING = 4
+    nodes = [Knowledge_Node(name=str(i), id=f"n{i}") for i in range(50)]
+    for node in nodes:
+        graph.add_node(node)
+    for i in range(49):
+        graph.add_edge(Knowledge_Edge(start_node=nodes[i], end_node=nodes[i + 1], id=f"e{i}"))
+    graph.remove_node("n10")
+    graph._rebuild()
+
+    assert len(graph.nodes) == 49
+    assert len(graph.edges) == 47
+    assert graph.find_path("n0", "n9") == [f"n{i}" for i in range(10)]
+    assert graph.find_path("n0", "n20") == []
+    assert graph.find_path("n11", "n13") == ["n11", "n12", "n13"]
+
+
+def test_reads_do_not_renumber_nodes(setup_graph):
+    setup_graph.REBUILD_MIN_PENDING = 1
+    setup_graph.remove_node("nodeB")  # 写入时压缩，序号重新分配
+    ordinal = setup_graph.node_ordinal("nodeD")
+    setup_graph._pending_count = 100  # 超过阈值，但只有写入才会触发重建
+    assert setup_graph.get_node("nodeD").in_edge == ["edgeCD"]
+    assert setup_graph.find_path("nodeA", "nodeD") == ["nodeA", "nodeC", "nodeD"]
+    assert setup_graph.node_ordinal("nodeD") == ordinal and setup_graph._pending_count == 100
+    setup_graph.remove_edge("edgeAC")
+    assert setup_graph._pending_count == 0
+
+
+def test_k_hop_uses_node_ordinals(setup_graph):
+    from graph_traversal import k_hop
+    assert [hop.node.id for hop in k_hop(setup_graph, "nodeA", 2)] == ["nodeA", "nodeB", "nodeC", "nodeD"]
+    assert setup_graph.get_out_neighbours("nodeA") == ["nodeB", "nodeC"]
+
+
+def test_api_parity_with_knowledge_graph():
+    from pydantic import BaseModel
+
+    public = lambda graph: {name for name in dir(graph) if not name.startswith("_")} - set(dir(BaseModel))
+    assert public(Knowledge_Graph()) <= public(Compact_Knowledge_Graph())
+
+    reference = Knowledge_Graph()
+    nodes = [
+        Knowledge_Node(id="a", name="数组", title="线性表", description="连续内存中的元素序列"),
+        Knowledge_Node(id="b", name="链表", title="线性表", description="通过指针串联的节点"),
+        Knowledge_Node(id="c", name="树", description="层次结构"),
+        Knowledge_Node(id="d", name="图", content={"定义": "顶点与边的集合"}),
+    ]
+    reference.add_nodes(nodes)
+    for start, end, weight in [("a", "b", 1.0), ("b", "c", 1.0), ("a", "c", 3.0), ("c", "d", 1.0)]:
+        reference.add_edge(Knowledge_Edge(id=start + end, start_node=nodes["abcd".index(start)],
+                                          end_node=nodes["abcd".index(end)], weight=weight))
+    compact = Compact_Knowledge_Graph.from_graph(reference)
+    events = {id(graph): [] for graph in (reference, compact)}
+    for graph in (reference, compact):
+        graph.subscribe(lambda event, obj, log=events[id(graph)]: log.append((event, obj.id)))
+
+    for graph in (reference, compact):
+        graph.update_node("b", name="单链表", description="每个节点保存下一个节点的指针")
+        graph.update_edge("ab", weight=2.0)
+        graph.remove_node("c")
+        graph.add_node(Knowledge_Node(id="e", name="堆", title="线性表"))
+        graph.add_edge(Knowledge_Edge(id="be", start_node=graph.nodes["b"], end_node=graph.nodes["e"]))
+    assert events[id(reference)] == events[id(compact)]
+
+    ids = lambda found: [node.id for node in found]
+    assert ids(compact.find_nodes_by_name("单链表")) == ids(reference.find_nodes_by_name("单链表")) == ["b"]
+    assert compact.find_nodes_by_name("链表") == []
+    assert ids(compact.find_nodes_by_title("线性表")) == ids(reference.find_nodes_by_title("线性表"))
+    assert [(node.id, score) for node, score in compact.search_nodes("指针")] == \
+        [(node.id, score) for node, score in reference.search_nodes("指针")]
+    assert compact.get_edge("ab").weight == 2.0
+    assert [(hop.node.id, hop.depth) for hop in compact.k_hop("a", 2, direction="both")] == \
+        [(hop.node.id, hop.depth) for hop in reference.k_hop("a", 2, direction="both")]
+    assert [(node.id, ids(edges)) for node, edges in compact.subgraph(["a", "b", "e"])] == \
+        [(node.id, ids(edges)) for node, edges in reference.subgraph(["a", "b", "e"])]
+    assert compact.find_k_shortest_paths("a", "e", 2) == reference.find_k_shortest_paths("a", "e", 2)
+    assert compact.find_paths([("a", "e"), ("e", "a")]) == reference.find_paths([("a", "e"), ("e", "a")])
+    with pytest.raises(ValueError):
+        compact.update_node("a", id="x")
+
+    # fork 出的图与原图互不影响
+    forked = compact.fork()
+    forked.update_node("a", name="动态数组")
+    forked.add_edge(Knowledge_Edge(id="ea", start_node=forked.nodes["e"], end_node=forked.nodes["a"]))
+    assert compact.get_node("a").name == "数组" and "ea" not in compact.edges
+    assert compact.get_node("e").out_edge == [] and forked.get_node("e").out_edge == ["ea"]
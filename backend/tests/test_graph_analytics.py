@@ -0,0 +1,84 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from compact_graph import Compact_Knowledge_Graph
+from graph_analytics import Graph_Analytics
+
+
+def build_graph(edges, names="ABCDE"):
+    graph = Knowledge_Graph()
+    nodes = {name: Knowledge_Node(name=name, id=name) for name in names}
+    graph.add_nodes(nodes.values())
+    for start, end in edges:
+        graph.add_edge(Knowledge_Edge(start_node=nodes[start], end_node=nodes[end], id=start + end, title="先修"))
+    return graph
+
+
+def test_pagerank_ranks_hub_highest():
+    graph = build_graph([("B", "A"), ("C", "A"), ("D", "A"), ("A", "E")])
+    ranks = Graph_Analytics(graph).pagerank()
+    assert sum(ranks.values()) == pytest.approx(1.0)
+    assert max(ranks, key=ranks.get) in {"A", "E"}
+    assert ranks["A"] > ranks["B"]
+
+
+def test_degree_and_betweenness():
+    graph = build_graph([("A", "B"), ("B", "C"), ("C", "D")], names="ABCD")
+    analytics = Graph_Analytics(graph)
+    assert analytics.degree_centrality("out") == {"A": 1 / 3, "B": 1 / 3, "C": 1 / 3, "D": 0.0}
+    exact = analytics.betweenness_centrality()
+    assert exact["A"] == 0.0 and exact["D"] == 0.0
+    assert exact["B"] == pytest.approx(2 / 6)
+    assert exact["C"] == pytest.approx(2 / 6)
+    approx = analytics.betweenness_centrality(samples=2, seed=1)
+    assert set(approx) == set(exact)
+    with pytest.raises(ValueError):
+        analytics.betweenness_centrality(samples=0)
+
+
+def test_connected_components():
+    graph = build_graph([("A", "B"), ("C", "B"), ("D", "E")])
+    assert Graph_Analytics(graph).connected_components() == [["A", "B", "C"], ["D", "E"]]
+
+
+def test_topological_order_and_cycles():
+    graph = build_graph([("A", "B"), ("A", "C"), ("B", "D"), ("C", "D"), ("D", "E")])
+    analytics = Graph_Analytics(graph)
+    assert analytics.topological_order() == ["A", "B", "C", "D", "E"]
+    assert not analytics.has_cycle()
+
+    graph.add_edge(Knowledge_Edge(start_node=graph.nodes["E"], end_node=graph.nodes["B"], id="EB"))
+    assert analytics.find_cycle() in (["B", "D", "E", "B"], ["D", "E", "B", "D"], ["E", "B", "D", "E"])
+    with pytest.raises(ValueError):
+        analytics.topological_order()
+    # 只看标记为先修的边时不存在环
+    assert analytics.topological_order(edge_filter=lambda edge: edge.title == "先修") == ["A", "B", "C", "D", "E"]
+
+
+def test_results_cached_until_graph_changes():
+    graph = build_graph([("A", "B")])
+    analytics = Graph_Analytics(graph)
+    first = analytics.pagerank()
+    assert analytics.pagerank() is first
+    graph.remove_edge("AB")
+    assert analytics.pagerank() is not first
+    assert analytics.degree_centrality()["A"] == 0.0
+
+
+def test_cache_is_bounded():
+    graph = build_graph([("A", "B"), ("B", "C")])
+    analytics = Graph_Analytics(graph, max_entries=4)
+    for _ in range(20):
+        analytics.degree_centrality(edge_filter=lambda edge: True)
+    assert len(analytics._cache) == 4
+    prerequisite = analytics.topological_order()
+    assert analytics.topological_order() is prerequisite
+
+
+def test_compact_graph_supported():
+    compact = Compact_Knowledge_Graph.from_graph(build_graph([("A", "B"), ("B", "C")]))
+    analytics = Graph_Analytics(compact)
+    assert analytics.topological_order() == ["A", "D", "E", "B", "C"]
+    version = compact.version
+    compact.remove_edge("AB")
+    assert compact.version > version
+    assert len(analytics.connected_components()) == 4
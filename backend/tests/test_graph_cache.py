@@ -0,0 +1,81 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from graph_cache import Cached_Graph
+
+
+@pytest.fixture
+def cached():
+    graph = Knowledge_Graph()
+    nodes = [Knowledge_Node(name=name, id=name, description=f"{name} 的说明") for name in "ABCD"]
+    graph.add_nodes(nodes)
+    for start, end in [(0, 1), (1, 2), (2, 3)]:
+        graph.add_edge(Knowledge_Edge(start_node=nodes[start], end_node=nodes[end], id=nodes[start].id + nodes[end].id))
+    return Cached_Graph(graph, max_entries=3)
+
+
+def test_hits_and_misses(cached):
+    assert cached.find_path("A", "D") == ["A", "B", "C", "D"]
+    path = cached.find_path("A", "D")
+    path.append("X")
+    assert cached.find_path("A", "D") == ["A", "B", "C", "D"]
+    assert cached.find_path("A", "D", method="dijkstra") == ["A", "B", "C", "D"]
+    info = cached.cache_info()
+    assert (info.hits, info.misses) == (2, 2)
+    assert info.hit_rate == 0.5
+
+
+def test_invalidated_by_graph_version(cached):
+    assert [node.id for node in cached.get_neighbours("B")] == ["C", "A"]
+    cached.remove_edge("BC")
+    assert [node.id for node in cached.get_neighbours("B")] == ["A"]
+    assert cached.find_path("A", "D") == []
+    info = cached.cache_info()
+    assert info.misses == 3 and info.invalidations == 1
+
+
+def test_lru_eviction(cached):
+    for node_id in "ABCD":
+        cached.get_out_neighbours(node_id)
+    assert cached.cache_info().evictions == 1
+    cached.get_out_neighbours("D")
+    cached.get_out_neighbours("A")
+    info = cached.cache_info()
+    assert info.hits == 1 and info.misses == 5
+
+    sized = Cached_Graph(cached.graph, max_items=2)
+    sized.k_hop("A", 3)
+    sized.k_hop("B", 0)
+    assert sized.cache_info().entries == 1
+
+
+def test_search_and_passthrough(cached):
+    assert cached.search_nodes("说明")[0][0].id in "ABCD"
+    assert cached.search_nodes("说明") == cached.search_nodes("说明")
+    assert cached.get_node("A").name == "A"
+
+
+def test_concurrent_queries(cached):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def query(i):
+        node_id = "ABCD"[i % 4]
+        return list(cached.get_out_neighbours(node_id)), cached.find_path("A", node_id)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(query, range(2000)))
+    assert results[:4] == [(["B"], ["A"]), (["C"], ["A", "B"]), (["D"], ["A", "B", "C"]), ([], ["A", "B", "C", "D"])]
+    assert results[4:8] == results[:4]
+    info = cached.cache_info()
+    assert info.hits + info.misses == 4000
+    assert info.entries == 3 and info.items == sum(size for _, size in cached._entries.values())
+
+
+def test_stale_result_not_cached(cached):
+    graph = cached.graph
+
+    def mutate_then_query():
+        graph.remove_edge("CD")
+        return graph.find_path("A", "D")
+
+    assert cached._lookup(("find_path", "A", "D"), mutate_then_query) == []
+    assert cached.cache_info().entries == 0
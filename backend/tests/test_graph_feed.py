@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from graph_feed import Graph_Feed
+
+
+def _graph():
+    graph = Knowledge_Graph()
+    graph.add_nodes([Knowledge_Node(name=name, id=name) for name in "AB"])
+    return graph
+
+
+def test_coalesced_ordered_batches():
+    async def scenario():
+        graph = _graph()
+        feed = Graph_Feed(graph)
+        subscriber = feed.subscribe(interval=0.01)
+        batches = subscriber.batches()
+
+        graph.add_edge(Knowledge_Edge(start_node=graph.nodes["A"], end_node=graph.nodes["B"], id="AB"))
+        graph.add_node(Knowledge_Node(name="C", id="C"))
+        graph.update_node("C", name="C2")
+        graph.update_edge("AB", weight=2.0)
+        graph.remove_node("B")
+        batch = await asyncio.wait_for(anext(batches), 1)
+        assert batch["version"] == graph.version and not batch["resync"]
+        assert batch["deltas"] == [
+            {"op": "upsert_node", "id": "C", "name": "C2", "title": None, "description": None},
+            {"op": "remove_edge", "id": "AB"},
+            {"op": "remove_node", "id": "B"},
+        ]
+
+        subscriber.close()
+        assert len(feed) == 0
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(anext(batches), 1)
+        feed.close()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_resync():
+    async def scenario():
+        graph = _graph()
+        feed = Graph_Feed(graph)
+        slow = feed.subscribe(interval=0, max_pending=3)
+        fast = feed.subscribe(interval=0)
+        graph.add_nodes([Knowledge_Node(name=str(i), id=str(i)) for i in range(5)])
+
+        batch = await asyncio.wait_for(anext(slow.batches()), 1)
+        assert batch["resync"] and batch["deltas"] == [] and slow.dropped == 1
+        batch = await asyncio.wait_for(anext(fast.batches()), 1)
+        assert [delta["id"] for delta in batch["deltas"]] == [str(i) for i in range(5)]
+        feed.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graph_ids import ID_Allocator, Id_Interner
+from knowledge_graph import Knowledge_Node, Knowledge_Graph
+from sqlite_graph import SQLite_Knowledge_Graph
+
+
+def test_allocator_is_unique_and_fixed_width():
+    allocate = ID_Allocator(start=36 ** 8 - 2)
+    ids = [allocate() for _ in range(100000)]
+    assert len(set(ids)) == len(ids)
+    assert all(len(node_id) == 8 for node_id in ids)
+    assert ids[:3] == ["zzzzzzzy", "zzzzzzzz", "00000000"]
+
+
+def test_allocator_is_unique_across_threads():
+    allocate = ID_Allocator()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(lambda _: allocate(), range(20000)))
+    assert len(set(ids)) == len(ids)
+
+
+def test_sqlite_store_rejects_colliding_ids_at_insert(tmp_path, monkeypatch):
+    # 模拟另一个进程：从同一起点分配 ID 并写入数据库
+    path = str(tmp_path / "graph.db")
+    store = SQLite_Knowledge_Graph(path)
+    other = ID_Allocator(start=1000)
+    store.add_nodes([Knowledge_Node(id=other(), name=str(i)) for i in range(3)])
+    store.close()
+
+    allocate = ID_Allocator(start=1000)
+    store = SQLite_Knowledge_Graph(path)
+    with pytest.raises(ValueError):
+        store.add_node(Knowledge_Node(id=allocate(), name="new"))
+    # 写入前的检查与插入之间被其他进程抢先写入时，由主键约束拒绝
+    monkeypatch.setattr(store, "_existing", lambda table, ids: set())
+    with pytest.raises(ValueError):
+        store.add_nodes([Knowledge_Node(id=allocate(), name="new")])
+    assert [store.nodes[node_id].name for node_id in store.nodes] == ["0", "1", "2"]
+    store.close()
+
+
+def test_cross_edge_ids_are_reallocated_on_collision(tmp_path, monkeypatch):
+    import graph_shards
+
+    manager = graph_shards.Sharded_Knowledge_Graph(tmp_path)
+    manager.shard("a", create=True).add_node(Knowledge_Node(id="a1", name="a1"))
+    manager.shard("b", create=True).add_node(Knowledge_Node(id="b1", name="b1"))
+    taken = manager.add_cross_edge(("a", "a1"), ("b", "b1"), id=ID_Allocator(start=1000)())
+    monkeypatch.setattr(graph_shards, "new_id", ID_Allocator(start=1000))
+    edge = manager.add_cross_edge(("b", "b1"), ("a", "a1"))
+    assert edge.id != taken.id and len(manager.boundary.edges) == 2
+
+
+def test_interner_reuses_released_ordinals():
+    interner = Id_Interner()
+    assert interner.intern("a") == 0
+    assert interner.intern("b") == 1
+    assert interner.intern("a") == 0
+    interner.release("a")
+    assert "a" not in interner and interner.get("a") is None
+    assert interner.intern("c") == 0
+    assert interner.key(0) == "c"
+    assert len(interner) == 2 and interner.capacity == 2
+
+
+def test_graph_tracks_node_ordinals():
+    graph = Knowledge_Graph()
+    graph.add_nodes(Knowledge_Node(name=str(i)) for i in range(1000))
+    assert len(graph.nodes) == 1000
+    ordinals = {graph.node_ordinal(node_id) for node_id in graph.nodes}
+    assert ordinals == set(range(1000))
+    first = next(iter(graph.nodes))
+    graph.remove_node(first)
+    assert graph.node_ordinal(first) is None
+    assert graph.ordinal_capacity == 1000
@@ -0,0 +1,62 @@
+import json
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from sqlite_graph import SQLite_Knowledge_Graph
+from graph_io import bulk_load, bulk_dump
+
+
+@pytest.fixture
+def source_graph():
+    graph = Knowledge_Graph()
+    node_a = Knowledge_Node(name="A", id="nodeA", title="函数", content={"例题": ["y=x^2"]})
+    node_b = Knowledge_Node(name="B", id="nodeB", description="导数, 含逗号与\n换行")
+    node_c = Knowledge_Node(name="C", id="nodeC")
+    for node in (node_a, node_b, node_c):
+        graph.add_node(node)
+    graph.add_edge(Knowledge_Edge(start_node=node_a, end_node=node_b, id="edgeAB", weight=2.5))
+    graph.add_edge(Knowledge_Edge(start_node=node_b, end_node=node_c, id="edgeBC", title="先修"))
+    return graph
+
+
+@pytest.mark.parametrize("suffix", ["jsonl", "csv"])
+def test_dump_and_load_round_trip(source_graph, tmp_path, suffix):
+    nodes_path, edges_path = tmp_path / f"nodes.{suffix}", tmp_path / f"edges.{suffix}"
+    assert bulk_dump(source_graph, nodes_path, edges_path) == {"nodes": 3, "edges": 2}
+
+    graph = Knowledge_Graph()
+    assert bulk_load(graph, nodes_path, edges_path, batch_size=2) == {"nodes": 3, "edges": 2}
+    assert graph.get_node("nodeA").content == {"例题": ["y=x^2"]}
+    assert graph.get_node("nodeB").description == "导数, 含逗号与\n换行"
+    assert graph.get_node("nodeB").in_edge == ["edgeAB"]
+    assert graph.get_edge("edgeAB").weight == 2.5
+    assert graph.get_edge("edgeBC").title == "先修"
+    assert graph.get_edge("edgeBC").start_node is graph.get_node("nodeB")
+    assert graph.find_path("nodeA", "nodeC") == ["nodeA", "nodeB", "nodeC"]
+
+
+def test_load_into_sqlite(source_graph, tmp_path):
+    nodes_path, edges_path = tmp_path / "nodes.jsonl", tmp_path / "edges.jsonl"
+    bulk_dump(source_graph, nodes_path, edges_path)
+    store = SQLite_Knowledge_Graph(str(tmp_path / "graph.db"))
+    bulk_load(store, nodes_path, edges_path, batch_size=1)
+    assert store.find_path("nodeA", "nodeC") == ["nodeA", "nodeB", "nodeC"]
+    assert store.get_node("nodeA").content == {"例题": ["y=x^2"]}
+    with pytest.raises(ValueError, match="节点 ID nodeA 已存在"):
+        bulk_load(store, nodes_path)
+    store.close()
+
+
+def test_load_reports_invalid_records(tmp_path):
+    nodes_path = tmp_path / "nodes.jsonl"
+    nodes_path.write_text(json.dumps({"id": "n1", "name": "ok"}) + "\n" + json.dumps({"id": "n2"}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="第 2 条记录校验失败"):
+        bulk_load(Knowledge_Graph(), nodes_path)
+
+    edges_path = tmp_path / "edges.jsonl"
+    edges_path.write_text(json.dumps({"start_id": "n1", "end_id": "missing"}) + "\n", encoding="utf-8")
+    nodes_path.write_text(json.dumps({"id": "n1", "name": "ok"}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="节点 ID missing 不存在"):
+        bulk_load(Knowledge_Graph(), nodes_path, edges_path)
+
+    with pytest.raises(ValueError, match="不支持的文件格式"):
+        bulk_load(Knowledge_Graph(), tmp_path / "nodes.xml")
@@ -0,0 +1,69 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from graph_cache import Cached_Graph
+from langplatform.utils import graph_lookup
+from langplatform.utils.graph_lookup import lookup_text, neighbourhood_text, path_text, resolve, search_text
+
+
+@pytest.fixture
+def graph():
+    graph = Knowledge_Graph()
+    nodes = {
+        "array": Knowledge_Node(id="array", name="数组", description="连续内存中的元素序列"),
+        "list": Knowledge_Node(id="list", name="链表", title="数据结构", description="通过指针串联的节点"),
+        "tree": Knowledge_Node(id="tree", name="二叉树", description="每个节点最多两个子节点"),
+        "bst": Knowledge_Node(id="bst", name="二叉搜索树", description="左小右大的二叉树"),
+    }
+    graph.add_nodes(nodes.values())
+    for start, end in [("array", "list"), ("list", "tree"), ("tree", "bst")]:
+        graph.add_edge(Knowledge_Edge(id=f"{start}-{end}", start_node=nodes[start], end_node=nodes[end], title="先修"))
+    return graph
+
+
+def test_resolve_and_lookup(graph):
+    assert resolve(graph, "tree").name == "二叉树"
+    assert resolve(graph, "二叉树").id == "tree"
+    assert resolve(graph, "图") is None
+    text = lookup_text(graph, ["链表", "图"])
+    assert text.startswith("[1] 链表\n链表（数据结构） [id=list]: 通过指针串联的节点")
+    assert text.endswith("[2] 图\n未找到")
+    assert "[1] 指针\n- 链表" in search_text(Cached_Graph(graph), ["指针"])
+
+
+def test_neighbourhood_shares_serializer(graph, monkeypatch):
+    monkeypatch.setattr(graph_lookup, "_serializer", None)
+    near = neighbourhood_text(graph, ["数组"], hops=1)
+    assert "链表" in near and "二叉树" not in near
+    serializer = graph_lookup.shared_serializer(graph)
+    far = neighbourhood_text(graph, ["数组"], hops=2)
+    assert "二叉树" in far and graph_lookup.shared_serializer(graph) is serializer
+
+    # 修改图后缓存的片段随之更新；替换图时旧的序列化器取消订阅
+    graph.update_node("list", description="改写后的说明")
+    assert "改写后的说明" in neighbourhood_text(graph, ["数组"], hops=1)
+    other = Knowledge_Graph()
+    assert graph_lookup.shared_serializer(other) is not serializer
+    assert serializer._on_change not in graph._listeners
+
+
+def test_path_text(graph):
+    cached = Cached_Graph(graph)
+    text = path_text(cached, [("数组", "bst"), ("bst", "数组"), ("数组", "图")])
+    assert text == (
+        "[1] 数组 -> bst\n数组 -> 链表 -> 二叉树 -> 二叉搜索树\n"
+        "[2] bst -> 数组\n不可达\n"
+        "[3] 数组 -> 图\n起点或终点不存在"
+    )
+
+
+def test_graph_tools_use_shared_graph(graph, monkeypatch):
+    pytest.importorskip("langchain_core")
+    import knowledge_base
+    from langplatform.tools.graph_tools import graph_path, graph_tools
+
+    monkeypatch.setattr(knowledge_base, "_graph", None)
+    monkeypatch.setattr(knowledge_base, "_cached", None)
+    knowledge_base.set_knowledge_graph(graph)
+    assert [tool.name for tool in graph_tools] == ["graph_lookup", "graph_search", "graph_neighbourhood", "graph_path"]
+    result = graph_path.invoke({"pairs": [{"start": "数组", "goal": "二叉树"}], "weighted": True})
+    assert result.endswith("数组 -> 链表 -> 二叉树")
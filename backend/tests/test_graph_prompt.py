@@ -0,0 +1,60 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from langplatform.utils.graph_prompt import Graph_Prompt_Serializer, estimate_tokens
+
+
+@pytest.fixture
+def course_graph():
+    graph = Knowledge_Graph()
+    nodes = {
+        "array": Knowledge_Node(id="array", name="数组", description="连续内存中的元素序列"),
+        "list": Knowledge_Node(id="list", name="链表", title="数据结构", description="通过指针串联的节点"),
+        "tree": Knowledge_Node(id="tree", name="二叉树", description="每个节点最多两个子节点"),
+        "bst": Knowledge_Node(id="bst", name="二叉搜索树", description="左小右大的二叉树"),
+        "far": Knowledge_Node(id="far", name="红黑树", description="自平衡的二叉搜索树"),
+    }
+    graph.add_nodes(nodes.values())
+    for start, end in [("array", "list"), ("list", "tree"), ("tree", "bst"), ("bst", "far"), ("array", "tree")]:
+        graph.add_edge(Knowledge_Edge(id=f"{start}-{end}", start_node=nodes[start], end_node=nodes[end], title="先修"))
+    return graph
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("二叉树") == 3
+    assert estimate_tokens("binary tree") == 3
+
+
+def test_render_expands_by_hops_and_centrality(course_graph):
+    serializer = Graph_Prompt_Serializer(course_graph, max_hops=1)
+    scores = {"array": 0.5, "list": 0.3, "bst": 0.1, "far": 0.9}
+    lines = serializer.render(["tree"], budget=1000, scores=scores).split("\n")
+    assert lines[0] == "- 二叉树: 每个节点最多两个子节点"
+    # 一跳邻居按得分排序，红黑树超出跳数限制
+    assert [line for line in lines if line.startswith("- ")] == [
+        "- 二叉树: 每个节点最多两个子节点",
+        "- 数组: 连续内存中的元素序列",
+        "- 链表（数据结构）: 通过指针串联的节点",
+        "- 二叉搜索树: 左小右大的二叉树",
+    ]
+    assert "  数组 --先修--> 链表" in lines
+    assert not any("红黑树" in line for line in lines)
+
+
+def test_budget_stops_stream(course_graph):
+    serializer = Graph_Prompt_Serializer(course_graph, format="triples")
+    full = list(serializer.stream(["array"], budget=10000))
+    assert "(数组, 先修, 链表)" in full
+    small = list(serializer.stream(["array"], budget=30))
+    assert 0 < len(small) < len(full)
+    assert sum(estimate_tokens(fragment) + 1 for fragment in small) <= 30
+    assert list(serializer.stream(["array"], budget=1)) == []
+
+
+def test_fragment_cache_invalidated_on_change(course_graph):
+    serializer = Graph_Prompt_Serializer(course_graph, max_hops=0)
+    assert serializer.render(["tree"], 100) == "- 二叉树: 每个节点最多两个子节点"
+    course_graph.remove_node("tree")
+    course_graph.add_node(Knowledge_Node(id="tree", name="树", description="层次结构"))
+    assert serializer.render(["tree"], 100) == "- 树: 层次结构"
+    with pytest.raises(ValueError):
+        serializer.render(["missing"], 100)
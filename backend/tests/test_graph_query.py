@@ -0,0 +1,58 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from graph_query import paginate
+
+
+@pytest.fixture
+def graph():
+    graph = Knowledge_Graph()
+    nodes = [Knowledge_Node(name=f"n{i}", id=f"n{i}") for i in range(10)]
+    graph.add_nodes(nodes)
+    for i in range(1, 10):
+        graph.add_edge(Knowledge_Edge(start_node=nodes[0], end_node=nodes[i], id=f"e{i}"))
+    return graph
+
+
+def test_pages_and_cursor_resume(graph):
+    pages = list(paginate(graph, "k_hop", {"node_id": "n0", "k": 1}, page_size=4))
+    assert [len(page.items) for page in pages] == [4, 4, 2]
+    assert [page.done for page in pages] == [False, False, True]
+    assert pages[-1].cursor is None
+    assert pages[0].items[0]["node"]["id"] == "n0" and pages[0].items[0]["edge"] is None
+
+    resumed = next(paginate(graph, "k_hop", {"node_id": "n0", "k": 1}, page_size=4, cursor=pages[0].cursor))
+    assert resumed.items == pages[1].items
+
+    with pytest.raises(ValueError):
+        next(paginate(graph, "k_hop", {"node_id": "n1", "k": 1}, page_size=4, cursor=pages[0].cursor))
+    graph.remove_edge("e9")
+    with pytest.raises(ValueError):
+        next(paginate(graph, "k_hop", {"node_id": "n0", "k": 1}, page_size=4, cursor=pages[0].cursor))
+
+
+def test_graph_change_aborts_stream(graph):
+    pages = paginate(graph, "lookup", {"ids": ["n1", "n2", "missing"]}, page_size=1)
+    assert next(pages).items == [{"id": "n1", "name": "n1", "title": None, "description": None}]
+    graph.add_node(Knowledge_Node(name="x", id="x"))
+    with pytest.raises(ValueError):
+        next(pages)
+
+
+def test_graph_change_during_lazy_traversal(graph):
+    # 遍历继续推进会读到已删除的节点，应当报告为图变更而不是 KeyError / RuntimeError
+    pages = paginate(graph, "k_hop", {"node_id": "n0", "k": 1}, page_size=2)
+    assert len(next(pages).items) == 2
+    graph.remove_nodes([f"n{i}" for i in range(3, 10)])
+    with pytest.raises(ValueError, match="变更"):
+        next(pages)
+
+
+def test_invalid_queries(graph):
+    assert list(paginate(graph, "path", {"start": "n1", "goal": "n2"})) == [([], None, True)]
+    assert [item["id"] for item in next(paginate(graph, "path", {"start": "n0", "goal": "n2"})).items] == ["n0", "n2"]
+    with pytest.raises(ValueError):
+        next(paginate(graph, "drop_all", {}))
+    with pytest.raises(ValueError):
+        next(paginate(graph, "search", {}))
+    with pytest.raises(ValueError):
+        next(paginate(graph, "lookup", {"ids": []}, page_size=0))
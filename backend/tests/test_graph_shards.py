@@ -0,0 +1,102 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge
+from graph_shards import Sharded_Knowledge_Graph
+
+
+def _fill(graph, names, weight=1.0):
+    nodes = [Knowledge_Node(name=name, id=name) for name in names]
+    graph.add_nodes(nodes)
+    for a, b in zip(nodes, nodes[1:]):
+        graph.add_edge(Knowledge_Edge(start_node=a, end_node=b, id=a.id + b.id, weight=weight))
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    manager = Sharded_Knowledge_Graph(tmp_path, max_shards=2)
+    _fill(manager.shard("math", create=True), ["m1", "m2", "m3"])
+    _fill(manager.shard("cs", create=True), ["c1", "c2"])
+    _fill(manager.shard("art", create=True), ["a1", "a2"])
+    manager.add_cross_edge(("math", "m3"), ("cs", "c1"), id="x1")
+    manager.flush()
+    return manager
+
+
+def test_lru_eviction_writes_back(sharded, tmp_path):
+    assert sharded.resident() == ["math", "cs"]
+    assert sharded.get_node(("math", "m2")).name == "m2"
+    assert sharded.resident() == ["cs", "math"]
+    sharded.shard("math").add_node(Knowledge_Node(name="m4", id="m4"))
+    sharded.shard("cs")
+    sharded.shard("art")
+    assert "math" not in sharded.resident()
+
+    reopened = Sharded_Knowledge_Graph(tmp_path, max_shards=2)
+    assert reopened.get_node(("math", "m4")) is not None
+    assert len(reopened.boundary) == 1
+    assert reopened.shard_keys() == ["art", "cs", "math"]
+
+
+def test_cross_shard_path_skips_unrelated_shards(sharded):
+    sharded.evict("art")
+    loads = sharded.loads
+    path, cost = sharded.find_path(("math", "m1"), ("cs", "c2"))
+    assert path == [("math", "m1"), ("math", "m2"), ("math", "m3"), ("cs", "c1"), ("cs", "c2")]
+    assert cost == 4
+    assert "art" not in sharded.resident()
+    assert sharded.loads - loads <= 1
+    assert sharded.find_path(("cs", "c1"), ("math", "m1")) == ([], float("inf"))
+
+
+def test_cross_shard_k_hop(sharded):
+    hops = list(sharded.k_hop(("math", "m2"), 2))
+    assert hops == [(("math", "m2"), 0), (("math", "m3"), 1), (("cs", "c1"), 2)]
+    back = [ref for ref, _ in sharded.k_hop(("cs", "c1"), 1, direction="in")]
+    assert back == [("cs", "c1"), ("math", "m3")]
+
+
+def test_removing_boundary_node_drops_cross_edges(sharded):
+    sharded.shard("cs").remove_node("c1")
+    assert len(sharded.boundary) == 0
+    with pytest.raises(ValueError):
+        sharded.add_cross_edge(("cs", "c2"), ("cs", "c2"))
+    with pytest.raises(ValueError):
+        sharded.shard("../etc")
+    with pytest.raises(ValueError):
+        sharded.shard("missing")
+
+
+def test_writes_through_evicted_handle_are_kept(tmp_path):
+    manager = Sharded_Knowledge_Graph(tmp_path, max_shards=1)
+    graph = manager.shard("a", create=True)
+    graph.add_node(Knowledge_Node(name="x", id="x"))
+    manager.shard("b", create=True)
+    assert manager.resident() == ["b"]
+
+    graph.add_node(Knowledge_Node(name="y", id="y"))
+    assert manager.shard("a") is graph  # 取回同一个对象，而不是从磁盘重新加载
+    manager.shard("b")
+    graph.add_node(Knowledge_Node(name="z", id="z"))
+    manager.close()
+
+    reopened = Sharded_Knowledge_Graph(tmp_path, max_shards=1)
+    assert {"x", "y", "z"} <= set(reopened.shard("a").nodes)
+
+
+def test_traversal_pins_shards(tmp_path):
+    manager = Sharded_Knowledge_Graph(tmp_path, max_shards=1)
+    _fill(manager.shard("p", create=True), [f"p{i}" for i in range(50)])
+    _fill(manager.shard("q", create=True), [f"q{i}" for i in range(50)])
+    for i in range(0, 50, 5):
+        manager.add_cross_edge(("p", f"p{i}"), ("q", f"q{i}"))
+    manager.flush()
+
+    loads, evictions = manager.loads, manager.evictions
+    hops = list(manager.k_hop(("p", "p0"), 100, direction="both"))
+    assert len(hops) == 100
+    assert manager.loads - loads <= 2  # 每个分片最多加载一次
+    assert manager.evictions - evictions <= 2
+    assert len(manager.resident()) == 1  # 遍历结束后淘汰到上限以内
+
+    loads = manager.loads
+    path, cost = manager.find_path(("q", "q0"), ("p", "p49"))
+    assert path == [] and manager.loads - loads <= 2
@@ -0,0 +1,82 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from graph_snapshot import save_snapshot, load_snapshot, Snapshot_Reader
+
+
+@pytest.fixture
+def hub_graph():
+    graph = Knowledge_Graph()
+    hub = Knowledge_Node(name="函数", id="hub", title="核心概念", description="函数是数学的核心概念" * 20,
+                         content={"公式": ["f(x)=x^2"], "难度": 3})
+    graph.add_node(hub)
+    for i in range(50):
+        leaf = Knowledge_Node(name=f"leaf{i}", id=f"leaf{i}")
+        graph.add_node(leaf)
+        graph.add_edge(Knowledge_Edge(start_node=hub, end_node=leaf, id=f"out{i}", weight=i / 2))
+        graph.add_edge(Knowledge_Edge(start_node=leaf, end_node=hub, id=f"in{i}", title="属于"))
+    return graph
+
+
+def test_save_and_load_round_trip(hub_graph, tmp_path):
+    path = tmp_path / "graph.xskg"
+    save_snapshot(hub_graph, path)
+    graph = load_snapshot(path)
+
+    assert list(graph.nodes) == list(hub_graph.nodes)
+    assert list(graph.edges) == list(hub_graph.edges)
+    hub = graph.get_node("hub")
+    assert hub.content == {"公式": ["f(x)=x^2"], "难度": 3}
+    assert hub.title == "核心概念"
+    assert hub.out_edge == hub_graph.get_node("hub").out_edge
+    assert graph.get_edge("out3").weight == 1.5
+    assert graph.get_edge("in3").title == "属于"
+    assert graph.get_edge("in3").end_node is hub
+    assert graph.find_nodes_by_name("leaf7")[0].id == "leaf7"
+
+
+def test_loaded_graph_is_fully_usable(hub_graph, tmp_path):
+    path = tmp_path / "graph.xskg"
+    save_snapshot(hub_graph, path)
+    graph = load_snapshot(path)
+    assert graph.model_dump() == hub_graph.model_dump()
+    assert graph.search_nodes("数学")[0][0].id == "hub"
+    assert graph.node_ordinal("leaf3") is not None and graph.version > 0
+
+    # 下标表由 CSR 建好，删除与新增都能正确维护邻接列表
+    graph.remove_edges(["out0", "in49"])
+    assert graph.get_node("hub").out_edge[0] == "out49"
+    assert "in49" not in graph.get_node("hub").in_edge
+    graph.remove_node("leaf5")
+    graph.add_edge(Knowledge_Edge(start_node=graph.get_node("leaf1"), end_node=graph.get_node("leaf2"), id="x"))
+    assert graph.find_path("leaf1", "leaf2") == ["leaf1", "leaf2"]
+    assert len(graph.get_in_edge("hub")) == 48
+
+
+def test_snapshot_is_much_smaller_than_model_dump(hub_graph, tmp_path):
+    path = tmp_path / "graph.xskg"
+    size = save_snapshot(hub_graph, path)
+    assert size * 10 < len(hub_graph.model_dump_json())
+
+
+def test_mmap_reader(hub_graph, tmp_path):
+    path = tmp_path / "graph.xskg"
+    save_snapshot(hub_graph, path)
+    with Snapshot_Reader(path) as reader:
+        assert len(reader.nodes) == 51
+        assert "out49" in reader.edges
+        assert reader.get_node("missing") is None
+        assert reader.get_node("hub").content["难度"] == 3
+        assert [edge.id for edge in reader.get_out_edge("leaf1")] == ["in1"]
+        assert len(reader.get_in_edge("hub")) == 50
+        assert reader.find_path("leaf1", "leaf2") == ["leaf1", "hub", "leaf2"]
+        assert reader.find_path("hub", "leaf3", method="dijkstra") == ["hub", "leaf3"]
+        assert {node.id for node in reader.get_neighbours("leaf1")} == {"hub"}
+        with pytest.raises(ValueError, match="节点 ID missing 不存在"):
+            reader.get_out_edge("missing")
+
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "bad.xskg"
+    path.write_bytes(b"not a snapshot at all, definitely not")
+    with pytest.raises(ValueError, match="不是知识图谱快照文件"):
+        load_snapshot(path)
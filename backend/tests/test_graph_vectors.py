@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Graph
+from graph_vectors import Graph_Vector_Index, Vector_Index, hashing_embedding
+
+
+def test_hashing_embedding_is_deterministic():
+    embed = hashing_embedding(64)
+    first = embed(["二叉树的遍历", "linked list"])
+    assert first.shape == (2, 64) and first.dtype == np.float32
+    assert np.array_equal(first, embed(["二叉树的遍历", "linked list"]))
+
+
+def test_exact_search_add_and_remove(tmp_path):
+    index = Vector_Index(4, path=str(tmp_path / "vectors.f32"), capacity=2)
+    index.add(["x", "y", "z"], np.array([[1, 0, 0, 0], [0, 1, 0, 0], [1, 1, 0, 0]], dtype=np.float32))
+    assert [node_id for node_id, _ in index.search(np.array([1, 0.1, 0, 0]), k=2)] == ["x", "z"]
+    index.remove(["x"])
+    assert len(index) == 2 and "x" not in index
+    node_id, score = index.search(np.array([1, 0, 0, 0]), k=1)[0]
+    assert node_id == "z" and score == pytest.approx(np.sqrt(0.5))
+    assert index.vectors.shape == (2, 4)
+
+
+def test_approximate_search_finds_near_duplicates():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(2000, 32)).astype(np.float32)
+    index = Vector_Index(32)
+    index.add([str(i) for i in range(2000)], vectors)
+    index.train(n_lists=16, n_subvectors=8, n_codes=64)
+    hits = sum(index.search(vectors[i] + 0.01, k=1, nprobe=4)[0][0] == str(i) for i in range(50))
+    assert hits >= 45
+    index.add(["new"], vectors[:1] * -1)
+    assert index.search(-vectors[0], k=1)[0][0] == "new"
+    with pytest.raises(ValueError):
+        index.train(n_subvectors=5)
+
+
+def test_graph_vector_index_follows_graph():
+    graph = Knowledge_Graph()
+    graph.add_nodes([
+        Knowledge_Node(name="二叉树", id="tree", description="二叉树的前序、中序与后序遍历"),
+        Knowledge_Node(name="链表", id="list", description="单向链表的插入与删除"),
+    ])
+    vectors = Graph_Vector_Index(graph, dim=128)
+    assert vectors.search("二叉树遍历", k=1)[0][0].id == "tree"
+
+    graph.add_node(Knowledge_Node(name="哈希表", id="hash", description="哈希表冲突处理"))
+    assert vectors.search("哈希冲突", k=1)[0][0].id == "hash"
+    graph.remove_node("tree")
+    assert "tree" not in vectors.index
+    assert {node.id for node, _ in vectors.search("二叉树", k=5)} == {"list", "hash"}
+    vectors.close()
+    graph.add_node(Knowledge_Node(name="栈", id="stack"))
+    assert vectors.search("栈", k=5) and "stack" not in vectors.index
@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from graph_versioning import Versioned_Graph, replay
+
+
+@pytest.fixture
+def versioned():
+    graph = Knowledge_Graph()
+    nodes = [Knowledge_Node(name=name, id=name, description=f"概念{name}") for name in "ABC"]
+    graph.add_nodes(nodes)
+    graph.add_edge(Knowledge_Edge(start_node=nodes[0], end_node=nodes[1], id="AB"))
+    graph.add_edge(Knowledge_Edge(start_node=nodes[1], end_node=nodes[2], id="BC"))
+    return Versioned_Graph(graph)
+
+
+def test_snapshot_is_isolated_from_writers(versioned):
+    before = versioned.snapshot()
+    with versioned.transaction() as writer:
+        writer.remove_node("B")
+        writer.add_edge(Knowledge_Edge(start_node=writer.graph.nodes["A"], end_node=writer.graph.nodes["C"], id="AC"))
+        # 事务提交前读者看到的仍是旧快照
+        assert versioned.snapshot() is before
+
+    after = versioned.snapshot()
+    assert before.find_path("A", "C") == ["A", "B", "C"]
+    assert before.nodes["A"].out_edge == ["AB"]
+    assert after.find_path("A", "C") == ["A", "C"]
+    assert "B" not in after.nodes and "B" in before.nodes
+    assert after.version > before.version
+
+
+def test_failed_transaction_is_discarded(versioned):
+    before = versioned.snapshot()
+    with pytest.raises(RuntimeError):
+        with versioned.transaction() as writer:
+            writer.remove_node("A")
+            raise RuntimeError("中途失败")
+    assert versioned.snapshot() is before
+    assert versioned.journal == ()
+
+
+def test_rollback_and_replay(versioned):
+    base = versioned.snapshot()
+    start_version = versioned.version
+    with versioned.transaction() as writer:
+        writer.add_node(Knowledge_Node(name="D", id="D"))
+        writer.add_edge(Knowledge_Edge(start_node=writer.graph.nodes["C"], end_node=writer.graph.nodes["D"], id="CD"))
+    with versioned.transaction() as writer:
+        writer.remove_node("B")
+
+    copy = base.fork()
+    replay(copy, versioned.journal)
+    assert set(copy.nodes) == set(versioned.snapshot().nodes) == {"A", "C", "D"}
+
+    restored = versioned.rollback(start_version)
+    assert set(restored.nodes) == {"A", "B", "C"}
+    assert set(restored.edges) == {"AB", "BC"}
+    assert restored.find_path("A", "C") == ["A", "B", "C"]
+    assert len(versioned.journal) > 3
+
+    versioned.compact()
+    assert versioned.journal == ()
+    with pytest.raises(ValueError):
+        versioned.rollback(start_version)
+
+
+def test_rollback_updates(versioned):
+    base = versioned.version
+    with versioned.transaction() as writer:
+        writer.update_node("A", name="A2", description="新说明")
+        writer.update_edge("AB", weight=5.0)
+    assert versioned.snapshot().find_nodes_by_name("A2")
+
+    rolled = versioned.rollback(base)
+    assert rolled.get_node("A").name == "A" and rolled.get_node("A").description == "概念A"
+    assert rolled.get_edge("AB").weight == 1.0
+    assert not rolled.find_nodes_by_name("A2")
+
+
+def test_replay_and_rollback_leave_snapshots_unchanged():
+    versioned = Versioned_Graph(Knowledge_Graph())
+    with versioned.transaction() as writer:
+        writer.add_nodes([Knowledge_Node(name="a", id="a"), Knowledge_Node(name="b", id="b")])
+        writer.add_edge(Knowledge_Edge(start_node=writer.graph.nodes["a"], end_node=writer.graph.nodes["b"], id="ab"))
+    snap = versioned.snapshot()
+
+    other = Knowledge_Graph()
+    replay(other, versioned.journal)
+    assert snap.edges["ab"].start_node is snap.nodes["a"]
+    other.update_node("a", name="changed")
+    assert snap.edges["ab"].start_node.name == "a"
+
+    version = versioned.version
+    with versioned.transaction() as writer:
+        writer.remove_node("b")
+    current = versioned.rollback(version)
+    assert snap.edges["ab"].end_node is snap.nodes["b"]
+    assert current.edges["ab"].end_node is current.nodes["b"]
+    current.update_node("b", name="changed")
+    assert snap.edges["ab"].end_node.name == "b"
+
+
+def test_concurrent_readers_see_consistent_snapshots(versioned):
+    errors = []
+
+    def reader():
+        for _ in range(200):
+            graph = versioned.snapshot()
+            try:
+                path = graph.find_path("A", "C")
+                assert path in (["A", "B", "C"], [])
+                graph.search_nodes("概念")
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(50):
+        with versioned.transaction() as writer:
+            if "B" in writer.graph.nodes:
+                writer.remove_node("B")
+            else:
+                versioned_b = Knowledge_Node(name="B", id="B")
+                writer.add_node(versioned_b)
+                writer.add_edge(Knowledge_Edge(start_node=writer.graph.nodes["A"], end_node=versioned_b, id="AB"))
+                writer.add_edge(Knowledge_Edge(start_node=versioned_b, end_node=writer.graph.nodes["C"], id="BC"))
+    for thread in threads:
+        thread.join()
+    assert errors == []
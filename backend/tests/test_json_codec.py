@@ -0,0 +1,47 @@
+import json
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from utils import json_codec
+from utils.json_codec import Static_Frame
+
+
+class Item(BaseModel):
+    name: str
+    tags: List[str] = []
+    note: Optional[str] = None
+
+
+@pytest.fixture(params=json_codec.AVAILABLE_CODECS)
+def codec(request):
+    previous = json_codec.current_codec().name
+    yield json_codec.set_codec(request.param)
+    json_codec.set_codec(previous)
+
+
+def test_encode_frame_with_models(codec):
+    frame = json_codec.encode_frame("chat_response", {"items": [Item(name="二叉树", tags=["树"])]}, "r1")
+    assert isinstance(frame, bytes)
+    assert "二叉树".encode("utf-8") in frame  # 中文不转义
+    assert json.loads(frame) == {
+        "type": "chat_response",
+        "request_id": "r1",
+        "payload": {"items": [{"name": "二叉树", "tags": ["树"], "note": None}]},
+    }
+    assert json_codec.loads(frame) == json.loads(frame)
+
+
+def test_static_frame_matches_encode_frame(codec):
+    payload = Item(name="stop")
+    frame = Static_Frame("chat_response", payload)
+    for request_id in (None, "r1", 'quote"中文'):
+        assert json.loads(frame.render(request_id)) == json.loads(json_codec.encode_frame("chat_response", payload, request_id))
+
+
+def test_unknown_codec_and_unencodable(codec):
+    with pytest.raises(ValueError):
+        json_codec.get_codec("nope")
+    with pytest.raises(Exception):
+        json_codec.dumps({"x": object()})
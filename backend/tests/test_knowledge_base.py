@@ -0,0 +1,34 @@
+import gc
+
+import knowledge_base
+from knowledge_graph import Knowledge_Node, Knowledge_Graph
+
+
+def test_load_from_env(tmp_path, monkeypatch):
+    graph = Knowledge_Graph()
+    graph.add_node(Knowledge_Node(name="A", id="A"))
+    path = tmp_path / "graph.json"
+    path.write_text(graph.model_dump_json(), encoding="utf-8")
+
+    monkeypatch.setenv(knowledge_base.GRAPH_PATH_ENV, str(path))
+    monkeypatch.setattr(knowledge_base, "_graph", None)
+    monkeypatch.setattr(knowledge_base, "_cached", None)
+    monkeypatch.setattr(knowledge_base, "_frozen", False)
+    shared = knowledge_base.get_knowledge_graph()
+    assert shared.get_node("A").name == "A"
+    assert knowledge_base.get_knowledge_graph() is shared
+    assert knowledge_base.get_cached_graph().graph is shared
+
+    # 加载的图冻结在永久代中，替换后解冻
+    assert gc.get_freeze_count() > 0
+    knowledge_base.set_knowledge_graph(Knowledge_Graph())
+    assert gc.get_freeze_count() == 0
+
+
+def test_set_graph_rebuilds_cache(monkeypatch):
+    monkeypatch.setattr(knowledge_base, "_graph", None)
+    monkeypatch.setattr(knowledge_base, "_cached", None)
+    graph = Knowledge_Graph()
+    knowledge_base.set_knowledge_graph(graph)
+    assert knowledge_base.get_knowledge_graph() is graph
+    assert knowledge_base.get_cached_graph().graph is graph
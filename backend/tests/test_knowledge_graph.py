@@ -193,6 +193,60 @@ def test_remove_edge_nonexistent_edge_raises_error(setup_graph):
     with pytest.raises(ValueError, match="节点 ID nonExistentEdge 不存在"):
         graph.remove_edge("nonExistentEdge")
 
+def test_remove_edge_keeps_adjacency_consistent(setup_graph):
+    graph, node_a, _, node_c, _, _, _, _, _ = setup_graph
+    graph.remove_edge("edgeAB")
+    assert node_a.out_edge == ["edgeAC"]
+    graph.remove_edge("edgeAC")
+    assert node_a.out_edge == []
+    assert node_c.in_edge == ["edgeBC"]
+
+def test_remove_hub_node():
+    graph = Knowledge_Graph()
+    hub = Knowledge_Node(name="hub", id="hub")
+    graph.add_node(hub)
+    leaves = [Knowledge_Node(name=str(i), id=f"leaf{i}") for i in range(100)]
+    for i, leaf in enumerate(leaves):
+        graph.add_node(leaf)
+        graph.add_edge(Knowledge_Edge(start_node=hub, end_node=leaf, id=f"out{i}"))
+        graph.add_edge(Knowledge_Edge(start_node=leaf, end_node=hub, id=f"in{i}"))
+    graph.add_edge(Knowledge_Edge(start_node=hub, end_node=hub, id="loop"))
+    graph.add_edge(Knowledge_Edge(start_node=leaves[0], end_node=leaves[1], id="leafEdge"))
+
+    graph.remove_node("hub")
+    assert len(graph.nodes) == 100
+    assert list(graph.edges) == ["leafEdge"]
+    assert leaves[0].out_edge == ["leafEdge"]
+    assert leaves[1].in_edge == ["leafEdge"]
+    assert all(leaf.in_edge == [] for leaf in leaves[2:])
+
+def test_remove_nodes_batch(setup_graph):
+    graph, node_a, _, node_c, node_d, _, _, _, _ = setup_graph
+    graph.remove_nodes(["nodeB", "nodeD"])
+    assert set(graph.nodes) == {"nodeA", "nodeC"}
+    assert set(graph.edges) == {"edgeAC"}
+    assert node_a.out_edge == ["edgeAC"]
+    assert node_c.in_edge == ["edgeAC"]
+    assert node_c.out_edge == []
+
+def test_remove_nodes_batch_is_atomic(setup_graph):
+    graph, _, _, _, _, _, _, _, _ = setup_graph
+    with pytest.raises(ValueError, match="节点 ID nonExistent 不存在"):
+        graph.remove_nodes(["nodeA", "nonExistent"])
+    assert len(graph.nodes) == 4
+    assert len(graph.edges) == 4
+
+def test_remove_edges_batch(setup_graph):
+    graph, node_a, node_b, node_c, _, _, _, _, _ = setup_graph
+    graph.remove_edges(["edgeAB", "edgeAC", "edgeAB"])
+    assert set(graph.edges) == {"edgeBC", "edgeCD"}
+    assert node_a.out_edge == []
+    assert node_b.in_edge == []
+    assert node_c.in_edge == ["edgeBC"]
+    with pytest.raises(ValueError, match="节点 ID edgeAB 不存在"):
+        graph.remove_edges(["edgeBC", "edgeAB"])
+    assert "edgeBC" in graph.edges
+
 
 def test_find_path_direct_connection():
     """测试直接相连的两个节点"""
@@ -326,4 +380,216 @@ def test_find_path_nonexistent_nodes():
     with pytest.raises(ValueError):
         graph.find_path(node1.id, "nonexistent")
     with pytest.raises(ValueError):
-        graph.find_path("nonexistent", node1.id)
\ No newline at end of file
+        graph.find_path("nonexistent", node1.id)
+
+@pytest.fixture
+def weighted_graph():
+    """
+    A -1-> B -1-> D
+    A -5-> C -1-> D
+    A -1-> E -1-> F -1-> D
+    """
+    graph = Knowledge_Graph()
+    nodes = {name: Knowledge_Node(name=name, id=name) for name in "ABCDEF"}
+    for node in nodes.values():
+        graph.add_node(node)
+    for start, end, weight in [("A", "B", 1), ("B", "D", 1), ("A", "C", 5), ("C", "D", 1),
+                               ("A", "E", 1), ("E", "F", 1), ("F", "D", 1)]:
+        graph.add_edge(Knowledge_Edge(start_node=nodes[start], end_node=nodes[end], id=start + end, weight=weight))
+    return graph
+
+def test_find_path_dijkstra_uses_weights(weighted_graph):
+    weighted_graph.get_edge("BD").weight = 10
+    assert weighted_graph.find_path("A", "D") in (["A", "B", "D"], ["A", "C", "D"])
+    assert weighted_graph.find_path("A", "D", method="dijkstra") == ["A", "E", "F", "D"]
+    assert weighted_graph.find_path("A", "D", method="dijkstra", weight=lambda edge: 1.0) in (["A", "B", "D"], ["A", "C", "D"])
+
+def test_find_path_astar(weighted_graph):
+    path = weighted_graph.find_path("A", "D", method="astar", heuristic=lambda node_id, goal_id: 0.0)
+    assert path == ["A", "B", "D"]
+    with pytest.raises(ValueError):
+        weighted_graph.find_path("A", "D", method="astar")
+    with pytest.raises(ValueError):
+        weighted_graph.find_path("A", "D", method="unknown")
+
+def test_find_k_shortest_paths(weighted_graph):
+    paths = weighted_graph.find_k_shortest_paths("A", "D", 5)
+    assert paths == [(["A", "B", "D"], 2.0), (["A", "E", "F", "D"], 3.0), (["A", "C", "D"], 6.0)]
+    assert weighted_graph.find_k_shortest_paths("D", "A", 2) == []
+
+def test_find_paths_batch(weighted_graph):
+    results = weighted_graph.find_paths([("A", "D"), ("A", "F"), ("D", "A"), ("E", "D"), ("A", "A")])
+    assert len(results[0]) == 3
+    assert results[1] == ["A", "E", "F"]
+    assert results[2] == []
+    assert results[3] == ["E", "F", "D"]
+    assert results[4] == ["A"]
+    weighted = weighted_graph.find_paths([("A", "D"), ("A", "C")], weight=lambda edge: edge.weight)
+    assert weighted == [["A", "B", "D"], ["A", "C"]]
+    with pytest.raises(ValueError):
+        weighted_graph.find_paths([("A", "nonexistent")])
+
+
+def test_find_nodes_by_name_and_title(setup_graph):
+    graph, node_a, _, _, _, _, _, _, _ = setup_graph
+    node_a2 = Knowledge_Node(name="A", id="nodeA2", title="二次函数")
+    graph.add_node(node_a2)
+    assert graph.find_nodes_by_name("A") == [node_a, node_a2]
+    assert graph.find_nodes_by_title("二次函数") == [node_a2]
+    graph.remove_node("nodeA")
+    assert graph.find_nodes_by_name("A") == [node_a2]
+    assert graph.find_nodes_by_name("missing") == []
+
+def test_search_nodes_ranks_chinese_text():
+    graph = Knowledge_Graph()
+    quadratic = Knowledge_Node(name="二次函数", description="二次函数的图像是抛物线，顶点坐标可以由配方得到")
+    linear = Knowledge_Node(name="一次函数", description="一次函数的图像是一条直线")
+    parabola = Knowledge_Node(name="抛物线", content={"定义": "平面内到定点与定直线距离相等的点的轨迹"})
+    english = Knowledge_Node(name="derivative", description="The derivative measures the rate of change")
+    for node in (quadratic, linear, parabola, english):
+        graph.add_node(node)
+
+    results = graph.search_nodes("抛物线的顶点")
+    assert results[0][0] == quadratic
+    assert results[0][1] > results[-1][1]
+    assert [node for node, _ in graph.search_nodes("直线")][:2] == [linear, parabola] or \
+        [node for node, _ in graph.search_nodes("直线")][:2] == [parabola, linear]
+    assert graph.search_nodes("Derivative")[0][0] == english
+
+    graph.remove_node(quadratic.id)
+    assert quadratic not in [node for node, _ in graph.search_nodes("顶点")]
+    assert graph.search_nodes("xyz") == []
+
+def test_concurrent_searches_build_text_index_once():
+    from concurrent.futures import ThreadPoolExecutor
+    import sys
+    import threading
+
+    graph = Knowledge_Graph()
+    graph.add_nodes(Knowledge_Node(name=f"n{i}", id=f"n{i}", description=f"第{i}个节点 term{i % 50}") for i in range(3000))
+    expected = Knowledge_Graph.model_validate(graph.model_dump()).search_nodes("term7", 100)
+    barrier = threading.Barrier(4)
+
+    def search(_):
+        barrier.wait()
+        return graph.search_nodes("term7", 100)
+
+    # 缩短线程切换间隔，使补建索引与检索交错执行
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(search, range(4)))
+    finally:
+        sys.setswitchinterval(interval)
+    assert all(result == expected for result in results)
+
+def test_indexes_rebuilt_on_model_validate(setup_graph):
+    graph, _, _, _, _, _, _, _, _ = setup_graph
+    graph.get_node("nodeB").description = "极限与连续"
+    restored = Knowledge_Graph.model_validate(graph.model_dump())
+    assert [node.id for node in restored.find_nodes_by_name("B")] == ["nodeB"]
+    assert restored.search_nodes("极限")[0][0].id == "nodeB"
+
+
+def test_get_out_neighbours_excludes_self(setup_graph):
+    graph = setup_graph[0]
+    assert sorted(graph.get_out_neighbours("nodeA")) == ["nodeB", "nodeC"]
+    assert graph.get_out_neighbours("nodeD") == []
+
+
+def test_k_hop(setup_graph):
+    graph = setup_graph[0]
+    hops = list(graph.k_hop("nodeA", 1))
+    assert hops[0].node.id == "nodeA" and hops[0].edge is None and hops[0].depth == 0
+    assert {hop.node.id for hop in hops[1:]} == {"nodeB", "nodeC"}
+    assert [hop.depth for hop in graph.k_hop("nodeA", 2)] == [0, 1, 1, 2]
+
+    assert {hop.node.id for hop in graph.k_hop("nodeD", 2, direction="in")} == {"nodeD", "nodeC", "nodeB", "nodeA"}
+    assert {hop.node.id for hop in graph.k_hop("nodeB", 1, direction="both")} == {"nodeB", "nodeA", "nodeC"}
+
+    only_ab = list(graph.k_hop("nodeA", 3, edge_filter=lambda edge: edge.id != "edgeAC"))
+    assert [(hop.node.id, hop.edge and hop.edge.id) for hop in only_ab] == [
+        ("nodeA", None), ("nodeB", "edgeAB"), ("nodeC", "edgeBC"), ("nodeD", "edgeCD"),
+    ]
+    assert len(list(graph.k_hop("nodeA", 3, limit=2))) == 2
+    assert [hop.node.id for hop in graph.k_hop("nodeA", 3, limit=1)] == ["nodeA"]
+
+    with pytest.raises(ValueError):
+        list(graph.k_hop("nonExistent", 1))
+    with pytest.raises(ValueError):
+        list(graph.k_hop("nodeA", 1, direction="sideways"))
+
+
+def test_subgraph(setup_graph):
+    graph = setup_graph[0]
+    parts = {node.id: [edge.id for edge in edges] for node, edges in graph.subgraph(["nodeA", "nodeC", "nodeD", "nodeA"])}
+    assert parts == {"nodeA": ["edgeAC"], "nodeC": ["edgeCD"], "nodeD": []}
+
+    with pytest.raises(ValueError):
+        list(graph.subgraph(["nodeA", "nonExistent"]))
+
+
+def test_subscribe_receives_changes(setup_graph):
+    graph = setup_graph[0]
+    events = []
+    listener = lambda event, obj: events.append((event, obj.id))
+    graph.subscribe(listener)
+    graph.add_node(Knowledge_Node(name="E", id="nodeE"))
+    graph.remove_node("nodeD")
+    graph.unsubscribe(listener)
+    graph.remove_edge("edgeAB")
+    assert events == [("add_node", "nodeE"), ("remove_edge", "edgeCD"), ("remove_node", "nodeD")]
+
+
+def test_update_node_and_edge(setup_graph):
+    graph = setup_graph[0]
+    events = []
+    graph.subscribe(lambda event, obj: events.append((event, obj.id)))
+    fork = graph.fork()
+    version = graph.version
+
+    graph.update_node("nodeA", name="A2", description="更新后的说明")
+    assert graph.find_nodes_by_name("A2")[0].id == "nodeA"
+    assert graph.search_nodes("更新后的说明")[0][0].id == "nodeA"
+    edge = graph.update_edge("edgeAB", weight=3.0)
+    assert graph.get_edge("edgeAB").weight == 3.0 and edge is graph.get_edge("edgeAB")
+    assert graph.version == version + 2
+    assert events == [("update_node", "nodeA"), ("update_edge", "edgeAB")]
+
+    # fork 出的图不受影响
+    assert fork.get_node("nodeA").name != "A2"
+    assert fork.get_edge("edgeAB").weight == 1.0
+
+    with pytest.raises(ValueError):
+        graph.update_node("nodeA", in_edge=[])
+    with pytest.raises(ValueError):
+        graph.update_edge("nonExistent", weight=1.0)
+
+
+def test_fork_keeps_edge_endpoints_consistent(setup_graph):
+    graph = setup_graph[0]
+    fork = graph.fork()
+    graph.update_node("nodeB", name="B2")
+    graph.add_edge(Knowledge_Edge(start_node=fork.get_node("nodeA"), end_node=graph.get_node("nodeB"), id="edgeAB2"))
+
+    assert graph.get_edge("edgeAB").end_node is graph.get_node("nodeB")
+    assert graph.get_edge("edgeAB").end_node.name == "B2"
+    for edge in graph.get_out_edge("nodeA"):
+        assert edge.start_node is graph.get_node("nodeA")
+        assert edge.start_node.out_edge == graph.get_node("nodeA").out_edge
+    assert graph.model_dump()["edges"]["edgeAB"]["end_node"]["name"] == "B2"
+
+    # 原图的修改不影响 fork 出的图
+    assert fork.get_edge("edgeAB").end_node.name != "B2"
+    assert "edgeAB2" not in fork.get_node("nodeA").out_edge
+    assert fork.get_edge("edgeAB").start_node is fork.get_node("nodeA")
+
+
+def test_fork_copies_private_state(setup_graph):
+    graph = setup_graph[0]
+    fork = graph.fork()
+    assert set(fork.__pydantic_private__) == set(graph.__pydantic_private__)
+    assert fork.version == graph.version
+    fork.add_node(Knowledge_Node(name="X", id="nodeX"))
+    assert graph.node_ordinal("nodeX") is None and graph.find_nodes_by_name("X") == []
@@ -0,0 +1,30 @@
+import json
+import random
+
+from benchmarks.knowledge_graph_bench import GENERATORS, compare, main, run_case
+
+
+def test_generators_are_reproducible():
+    for generator in GENERATORS.values():
+        assert generator(200, random.Random(1)) == generator(200, random.Random(1))
+    edges = GENERATORS["scale_free"](100, random.Random(0))
+    assert len(edges) == 3 * 100 - 6 and all(u != v for u, v in edges)
+
+
+def test_run_case_and_compare(tmp_path):
+    result = run_case("knowledge", "tree", 300, queries=20, path_queries=5, seed=0, workdir=tmp_path)
+    assert result["ops"]["add_edge"]["count"] == result["edges"]
+    assert result["graph_mb"] > 0
+    assert compare([result], [result], threshold=0.1) == []
+
+    slower = json.loads(json.dumps(result))
+    slower["ops"]["find_path"]["p50_us"] = result["ops"]["find_path"]["p50_us"] * 3 + 1
+    assert len(compare([slower], [result], threshold=0.1)) == 1
+
+
+def test_main_writes_report(tmp_path):
+    output = tmp_path / "bench.json"
+    args = ["--sizes", "200", "--generators", "chain", "--queries", "10", "--path-queries", "2", "--no-memory"]
+    assert main(args + ["--output", str(output)]) == 0
+    assert json.loads(output.read_text(encoding="utf-8"))["results"][0]["nodes"] == 200
+    assert main(args + ["--compare", str(output), "--threshold", "100"]) == 0
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from mastery import Mastery_Overlay
+
+
+@pytest.fixture
+def graph():
+    graph = Knowledge_Graph()
+    nodes = [Knowledge_Node(name=name, id=name) for name in "ABCD"]
+    graph.add_nodes(nodes)
+    for start, end in [(0, 1), (1, 2), (2, 3)]:
+        graph.add_edge(Knowledge_Edge(start_node=nodes[start], end_node=nodes[end]))
+    return graph
+
+
+@pytest.mark.parametrize("memmap", [False, True])
+def test_update_grows_and_decays(graph, tmp_path, memmap):
+    overlay = Mastery_Overlay(graph, path=str(tmp_path / "mastery.f32") if memmap else None, student_capacity=1, node_capacity=1)
+    overlay.update(["s1", "s2", "s3"], ["A", "B", "C"], [0.5, 1.2, 0.8])
+    assert overlay.shape == (3, 3)
+    assert overlay.get("s2", ["B", "A", "D"]).tolist() == [1.0, 0.0, 0.0]
+
+    overlay.update(["s1"], ["A"], [1.0], alpha=0.5)
+    assert overlay.get("s1", ["A"])[0] == pytest.approx(0.75)
+    overlay.decay(elapsed=30, half_life=30, student_ids=["s1"])
+    assert overlay.get("s1", ["A"])[0] == pytest.approx(0.375)
+    overlay.decay(elapsed=30, half_life=30)
+    assert overlay.get("s3", ["C"])[0] == pytest.approx(0.4)
+    assert overlay.get("unknown", ["A"]).tolist() == [0.0]
+    overlay.close()
+
+    with pytest.raises(ValueError):
+        overlay.update(["s1"], ["missing"], [0.5])
+
+
+def test_class_summary(graph):
+    overlay = Mastery_Overlay(graph)
+    overlay.update(["s1", "s2", "s1", "s2"], ["A", "A", "B", "B"], [0.2, 0.8, 1.0, 1.0])
+    summary = overlay.class_summary(["s1", "s2", "s3"], ["A", "B", "D"], threshold=0.5)
+    assert summary.mean == pytest.approx([1 / 3, 2 / 3, 0.0])
+    assert summary.minimum.tolist() == [0.0, 0.0, 0.0]
+    assert summary.maximum == pytest.approx([0.8, 1.0, 0.0])
+    assert summary.struggling == pytest.approx([2 / 3, 1 / 3, 1.0])
+    assert summary.std[2] == 0.0
+    assert overlay.class_summary(["s1"]).node_ids == ["A", "B"]
+
+
+def test_weakest_on_path_and_node_removal(graph):
+    overlay = Mastery_Overlay(graph)
+    overlay.update(["s1"] * 3, ["A", "B", "C"], [0.9, 0.3, 0.6])
+    assert overlay.weakest_on_path("s1", "A", "D", k=2) == [("B", pytest.approx(0.3)), ("C", pytest.approx(0.6))]
+    assert overlay.weakest_on_path("s1", "D", "A") == []
+
+    graph.remove_node("B")
+    assert overlay.node_column("B") is None
+    graph.add_node(Knowledge_Node(name="E", id="E"))
+    overlay.update(["s2"], ["E"], [0.1])
+    assert overlay.get("s1", ["E"]).tolist() == [0.0]
+    assert np.count_nonzero(overlay.matrix) == 3
@@ -0,0 +1,83 @@
+import pytest
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+from sqlite_graph import SQLite_Knowledge_Graph
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "graph.db")
+
+
+@pytest.fixture
+def setup_store(db_path):
+    graph = Knowledge_Graph()
+    nodes = [Knowledge_Node(name=name, id=f"node{name}") for name in "ABCD"]
+    for node in nodes:
+        graph.add_node(node)
+    node_a, node_b, node_c, node_d = nodes
+    node_a.content = {"章节": 1}
+    graph.add_edge(Knowledge_Edge(start_node=node_a, end_node=node_b, id="edgeAB", title="ab"))
+    graph.add_edge(Knowledge_Edge(start_node=node_b, end_node=node_c, id="edgeBC"))
+    graph.add_edge(Knowledge_Edge(start_node=node_a, end_node=node_c, id="edgeAC"))
+    graph.add_edge(Knowledge_Edge(start_node=node_c, end_node=node_d, id="edgeCD"))
+    store = SQLite_Knowledge_Graph.from_graph(graph, db_path)
+    yield store
+    store.close()
+
+
+def test_reads(setup_store):
+    node = setup_store.get_node("nodeA")
+    assert node.content == {"章节": 1}
+    assert node.out_edge == ["edgeAB", "edgeAC"]
+    assert setup_store.get_node("nonExistent") is None
+    assert setup_store.get_edge("edgeAB").end_node.id == "nodeB"
+    assert [edge.id for edge in setup_store.get_out_edge("nodeA")] == ["edgeAB", "edgeAC"]
+    assert {edge.id for edge in setup_store.get_in_edge("nodeC")} == {"edgeBC", "edgeAC"}
+    assert {node.id for node in setup_store.get_neighbours("nodeB")} == {"nodeA", "nodeC"}
+    assert len(setup_store.nodes) == 4
+    assert "edgeCD" in setup_store.edges
+    with pytest.raises(ValueError, match="节点 ID nonExistent 不存在"):
+        setup_store.get_out_edge("nonExistent")
+
+
+def test_find_path(setup_store):
+    assert setup_store.find_path("nodeA", "nodeD") == ["nodeA", "nodeC", "nodeD"]
+    assert setup_store.find_path("nodeD", "nodeA") == []
+    with pytest.raises(ValueError):
+        setup_store.find_path("nodeA", "nonExistent")
+    avoid_ac = lambda edge: 10.0 if edge.id == "edgeAC" else 1.0
+    assert setup_store.find_path("nodeA", "nodeD", method="dijkstra", weight=avoid_ac) == ["nodeA", "nodeB", "nodeC", "nodeD"]
+    with pytest.raises(ValueError, match="未知的路径算法"):
+        setup_store.find_path("nodeA", "nodeD", method="dfs")
+
+
+def test_writes_persist_across_reopen(setup_store, db_path):
+    setup_store.remove_node("nodeB")
+    setup_store.add_node(Knowledge_Node(name="E", id="nodeE"))
+    setup_store.add_edge(Knowledge_Edge(start_node=setup_store.get_node("nodeD"), end_node=setup_store.get_node("nodeE"), id="edgeDE"))
+    setup_store.close()
+
+    reopened = SQLite_Knowledge_Graph(db_path)
+    assert set(reopened.nodes) == {"nodeA", "nodeC", "nodeD", "nodeE"}
+    assert set(reopened.edges) == {"edgeAC", "edgeCD", "edgeDE"}
+    assert reopened.find_path("nodeA", "nodeE") == ["nodeA", "nodeC", "nodeD", "nodeE"]
+    graph = reopened.to_graph()
+    assert graph.get_node("nodeA").out_edge == ["edgeAC"]
+    reopened.close()
+
+
+def test_duplicates_and_batch_rollback(setup_store):
+    with pytest.raises(ValueError, match="节点 ID nodeA 已存在"):
+        setup_store.add_node(Knowledge_Node(name="A", id="nodeA"))
+    with pytest.raises(ValueError, match="节点 ID edgeAB 已存在"):
+        setup_store.add_edge(setup_store.get_edge("edgeAB"))
+
+    with pytest.raises(RuntimeError):
+        with setup_store.batch():
+            setup_store.remove_edge("edgeAB")
+            raise RuntimeError("abort")
+    assert "edgeAB" in setup_store.edges
+
+    with pytest.raises(ValueError, match="节点 ID nonExistent 不存在"):
+        setup_store.remove_edges(["edgeAB", "nonExistent"])
+    assert "edgeAB" in setup_store.edges
@@ -0,0 +1,37 @@
+import pytest
+from utils.stream_coalescer import Delta_Coalescer
+
+
+class Fake_Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_flush_by_size_and_delay():
+    clock = Fake_Clock()
+    coalescer = Delta_Coalescer(max_chars=5, max_delay=0.1, clock=clock)
+    assert coalescer.time_left() is None
+    assert coalescer.push("ab") is None
+    assert coalescer.push("") is None
+    assert coalescer.push("cde") == "abcde"
+    assert len(coalescer) == 0
+
+    assert coalescer.push("x") is None
+    clock.now = 0.04
+    assert coalescer.time_left() == pytest.approx(0.06)
+    clock.now = 0.1
+    assert coalescer.push("y") == "xy"
+
+    assert coalescer.push("z") is None
+    assert coalescer.flush() == "z"
+    assert coalescer.flush() is None
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        Delta_Coalescer(max_chars=0)
+    with pytest.raises(ValueError):
+        Delta_Coalescer(max_delay=-1)
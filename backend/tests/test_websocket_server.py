@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("websockets")
+pytest.importorskip("flask_sqlalchemy")
+websocket_server = pytest.importorskip("websocket_server")
+
+import knowledge_base
+from knowledge_graph import Knowledge_Node, Knowledge_Edge, Knowledge_Graph
+
+
+class _Fake_Socket:
+    """按顺序产出 push 放入的帧，send 记录服务端发出的帧；close 之后迭代结束，相当于客户端断开"""
+
+    remote_address = ("127.0.0.1", 0)
+
+    def __init__(self):
+        self._inbox = asyncio.Queue()
+        self.sent = []
+
+    def push(self, type, payload=None, request_id=None):
+        self._inbox.put_nowait(json.dumps({"type": type, "request_id": request_id, "payload": payload or {}}))
+
+    def push_raw(self, message):
+        self._inbox.put_nowait(message)
+
+    def close(self):
+        self._inbox.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self._inbox.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def send(self, frame, text=False):
+        assert text
+        self.sent.append(json.loads(frame))
+
+    def frames(self, type, request_id):
+        return [frame for frame in self.sent if frame["type"] == type and frame["request_id"] == request_id]
+
+    async def frame(self, type, request_id):
+        """等待并返回第一个匹配的帧"""
+        await _until(lambda: self.frames(type, request_id))
+        return self.frames(type, request_id)[0]
+
+
+async def _until(condition, timeout=2.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@pytest.fixture
+def slow_requests(monkeypatch):
+    """把 health_check 换成一直等待的慢请求，记录开始与被取消的请求 ID"""
+    started, cancelled = [], []
+
+    async def slow_health_check(websocket):
+        request_id = websocket_server.current_request_id.get()
+        started.append(request_id)
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(request_id)
+            raise
+
+    monkeypatch.setattr(websocket_server, "handle_health_check_ws", slow_health_check)
+    return started, cancelled
+
+
+def test_concurrency_cap_and_duplicate_request_ids(slow_requests, monkeypatch):
+    started, cancelled = slow_requests
+    monkeypatch.setattr(websocket_server, "MAX_CONCURRENT_REQUESTS", 2)
+
+    async def scenario():
+        socket = _Fake_Socket()
+        handler = asyncio.create_task(websocket_server.websocket_handler(socket))
+        socket.push("health_check", request_id="r1")
+        socket.push("health_check", request_id="r1")
+        assert (await socket.frame("error", "r1"))["payload"]["message"] == "请求 ID r1 正在处理中"
+
+        socket.push("health_check", request_id="r2")
+        socket.push("health_check", request_id="r3")
+        error = await socket.frame("error", "r3")
+        assert error["payload"]["message"] == "并发请求过多，最多同时处理 2 个请求"
+        await _until(lambda: started == ["r1", "r2"])
+
+        socket.close()
+        await asyncio.wait_for(handler, 2)
+        # 断开连接时取消仍在进行的请求
+        await _until(lambda: sorted(cancelled) == ["r1", "r2"])
+
+    asyncio.run(scenario())
+
+
+def test_cancel_in_flight_request(slow_requests):
+    started, cancelled = slow_requests
+
+    async def scenario():
+        socket = _Fake_Socket()
+        handler = asyncio.create_task(websocket_server.websocket_handler(socket))
+        socket.push("health_check", request_id="slow")
+        await _until(lambda: started == ["slow"])
+
+        socket.push("cancel", {"request_id": "slow"}, request_id="c1")
+        response = await socket.frame("cancel_response", "c1")
+        assert response["payload"] == {"status": "success", "message": "请求已取消", "request_id": "slow"}
+        await _until(lambda: cancelled == ["slow"])
+
+        socket.push("cancel", {"request_id": "slow"}, request_id="c2")
+        response = await socket.frame("cancel_response", "c2")
+        assert response["payload"]["status"] == "error"
+        # 被取消的请求不再发送任何帧
+        assert not [frame for frame in socket.sent if frame["request_id"] == "slow"]
+
+        socket.close()
+        await asyncio.wait_for(handler, 2)
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def shared_graph(monkeypatch):
+    monkeypatch.setattr(knowledge_base, "_graph", None)
+    monkeypatch.setattr(knowledge_base, "_cached", None)
+    monkeypatch.setattr(websocket_server, "_graph_feed", None)
+    graph = Knowledge_Graph()
+    nodes = [Knowledge_Node(name=name, id=name) for name in "ABC"]
+    graph.add_nodes(nodes)
+    for a, b in zip(nodes, nodes[1:]):
+        graph.add_edge(Knowledge_Edge(start_node=a, end_node=b, id=a.id + b.id))
+    knowledge_base.set_knowledge_graph(graph)
+    return graph
+
+
+def test_frames_carry_request_id(shared_graph, monkeypatch):
+    async def failing_health_check(websocket):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(websocket_server, "handle_health_check_ws", failing_health_check)
+
+    async def scenario():
+        socket = _Fake_Socket()
+        handler = asyncio.create_task(websocket_server.websocket_handler(socket))
+
+        socket.push_raw(json.dumps({"type": "unknown", "request_id": "bad"}))
+        assert (await socket.frame("error", "bad"))["payload"]["message"] == "未知消息类型: unknown"
+        socket.push("health_check", request_id="boom")
+        assert (await socket.frame("error", "boom"))["payload"]["message"] == "服务器内部错误: boom"
+
+        # 分页查询的每一页都带上请求 ID
+        socket.push("graph_query", {"query_id": "q1", "op": "k_hop", "params": {"node_id": "A", "k": 2}, "page_size": 1}, request_id="q")
+        await _until(lambda: any(frame["payload"]["done"] for frame in socket.frames("graph_query_response", "q")))
+        pages = socket.frames("graph_query_response", "q")
+        assert [page["payload"]["items"][0]["node"]["id"] for page in pages] == ["A", "B", "C"]
+
+        # 订阅后的增量在后台任务中推送，仍带上发起订阅的请求 ID
+        socket.push("graph_subscribe", {"interval": 0}, request_id="sub")
+        assert (await socket.frame("graph_subscribe_response", "sub"))["payload"]["status"] == "success"
+        shared_graph.add_node(Knowledge_Node(name="D", id="D"))
+        delta = await socket.frame("graph_delta", "sub")
+        assert delta["payload"]["version"] == shared_graph.version
+        assert {frame["request_id"] for frame in socket.sent} == {"bad", "boom", "q", "sub"}
+
+        socket.close()
+        await asyncio.wait_for(handler, 2)
+
+    asyncio.run(scenario())
@@ -0,0 +1,120 @@
+"""
+WebSocket 帧的 JSON 编解码
+
+dumps 直接输出 UTF-8 字节，字符串中的中文不转义，pydantic 模型按 model_dump() 编码，
+调用方不需要先把 payload 转换为字典。可用的实现：
+
+- orjson: 安装了 orjson 时的默认实现，最快
+- pydantic: pydantic_core 自带的 Rust 编码器，无需额外依赖，也能直接编码模型
+- json: 标准库，兼容性最好，最慢
+
+默认按上面的顺序选择第一个可用的实现，也可以通过环境变量 XIESHUI_JSON_CODEC 或 set_codec() 指定。
+
+内容固定的帧（停止消息、Agent 状态等）可以用 Static_Frame 预先编码，
+发送时只需拼接 request_id，不再重复序列化。
+"""
+import json
+import os
+from typing import Any, Callable, Dict, NamedTuple, Optional, Union
+
+from pydantic import BaseModel
+import pydantic_core
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSON_Codec(NamedTuple):
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"无法编码为 JSON 的类型: {type(obj).__name__}")
+
+
+def _make_orjson() -> JSON_Codec:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+    return JSON_Codec("orjson", dumps, orjson.loads)
+
+
+def _make_pydantic() -> JSON_Codec:
+    def dumps(obj: Any) -> bytes:
+        return pydantic_core.to_json(obj)
+    return JSON_Codec("pydantic", dumps, pydantic_core.from_json)
+
+
+def _make_json() -> JSON_Codec:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps(obj: Any) -> bytes:
+        return encoder.encode(obj).encode("utf-8")
+    return JSON_Codec("json", dumps, json.loads)
+
+
+_FACTORIES: Dict[str, Callable[[], JSON_Codec]] = {"pydantic": _make_pydantic, "json": _make_json}
+if orjson is not None:
+    _FACTORIES = {"orjson": _make_orjson, **_FACTORIES}
+
+AVAILABLE_CODECS = tuple(_FACTORIES)
+
+
+def get_codec(name: Optional[str] = None) -> JSON_Codec:
+    """按名称创建编解码器，name 为空时返回第一个可用的实现"""
+    if name is None:
+        name = AVAILABLE_CODECS[0]
+    if name not in _FACTORIES:
+        raise ValueError(f"不可用的 JSON 编解码器: {name}，可选: {', '.join(AVAILABLE_CODECS)}")
+    return _FACTORIES[name]()
+
+
+_codec = get_codec(os.environ.get("XIESHUI_JSON_CODEC") or None)
+
+
+def set_codec(name: Optional[str] = None) -> JSON_Codec:
+    """切换全局使用的编解码器，已创建的 Static_Frame 不受影响"""
+    global _codec
+    _codec = get_codec(name)
+    return _codec
+
+
+def current_codec() -> JSON_Codec:
+    return _codec
+
+
+def dumps(obj: Any) -> bytes:
+    return _codec.dumps(obj)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _codec.loads(data)
+
+
+def encode_frame(type: str, payload: Any, request_id: Optional[str] = None) -> bytes:
+    """编码一帧 {"type", "request_id", "payload"}"""
+    return _codec.dumps({"type": type, "request_id": request_id, "payload": payload})
+
+
+class Static_Frame:
+    """
+    内容固定的帧：构造时编码好 type 与 payload，render() 只拼接 request_id，
+    输出与 encode_frame(type, payload, request_id) 等价（字段顺序不同）。
+    payload 在构造之后的修改不会反映到已编码的帧中。
+    """
+
+    def __init__(self, type: str, payload: Any):
+        self.type = type
+        body = _codec.dumps({"type": type, "payload": payload})
+        self._head = body[:-1] + b',"request_id":'  # 去掉末尾的 }
+        self._anonymous = body[:-1] + b',"request_id":null}'
+
+    def render(self, request_id: Optional[str] = None) -> bytes:
+        if request_id is None:
+            return self._anonymous
+        return self._head + _codec.dumps(request_id) + b"}"
@@ -48,12 +48,30 @@ def send_text_msg(text: str) -> ChatResponsePayload:
         content=ChatResponseContent(data=text)
     )
 
+@debug_output
+def send_delta_msg(text: str) -> ChatResponsePayload:
+    """
+    生成流式文本增量消息，客户端按顺序拼接同一条回复的增量
+    """
+    return ChatResponsePayload(
+        type="text_delta",
+        content=ChatResponseContent(data=text)
+    )
+
 @debug_output
 def send_stop_msg(reason: str = "normal") -> ChatResponsePayload:
     """
-    生成停止消息
+    生成停止消息，正常结束时返回共享的 STOP_MSG
     """
+    if reason == "normal":
+        return STOP_MSG
     return ChatResponsePayload(
         type="stop",
         content=ChatResponseContent(reason=reason)
-    )
\ No newline at end of file
+    )
+
+# 内容固定的消息，全局共享同一个实例，websocket_server 为它们预先编码好帧，使用方不要修改
+STOP_MSG = ChatResponsePayload(type="stop", content=ChatResponseContent(reason="normal"))
+THINKING_MSG = send_agent_msg("thinking", "Agent 正在思考...", current_node="agent")
+TOOL_CALLING_MSG = send_agent_msg("tool_calling", "Agent 正在调用工具...", current_node="tools")
+STATIC_MSGS = (STOP_MSG, THINKING_MSG, TOOL_CALLING_MSG)
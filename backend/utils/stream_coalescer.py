@@ -0,0 +1,55 @@
+import time
+from typing import Callable, Optional
+
+
+class Delta_Coalescer:
+    """
+    把 LLM 逐 token 产出的增量文本攒成较大的片段再发送，减少帧数与每帧的序列化开销。
+
+    缓冲区中的文本满 max_chars 个字符，或第一段文本已等待 max_delay 秒时应当发送。
+    push 在写入时检查这两个条件；调用方在等待下一个 token 期间
+    可以用 time_left() 作为超时，超时后调用 flush()，避免 LLM 停顿时文本滞留在缓冲区中。
+    """
+
+    def __init__(self, max_chars: int = 64, max_delay: float = 0.05, clock: Callable[[], float] = time.monotonic):
+        if max_chars < 1:
+            raise ValueError("max_chars 必须为正整数")
+        if max_delay < 0:
+            raise ValueError("max_delay 不能为负数")
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self.clock = clock
+        self._parts = []
+        self._size = 0
+        self._since: Optional[float] = None  # 缓冲区中第一段文本的写入时间
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, text: str) -> Optional[str]:
+        """写入一段增量，需要发送时返回合并后的文本，否则返回 None"""
+        if not text:
+            return None
+        if self._since is None:
+            self._since = self.clock()
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.max_chars or self.clock() - self._since >= self.max_delay:
+            return self.flush()
+        return None
+
+    def time_left(self) -> Optional[float]:
+        """距离缓冲区必须发送还剩多少秒；缓冲区为空时返回 None，表示可以无限等待"""
+        if self._since is None:
+            return None
+        return max(0.0, self.max_delay - (self.clock() - self._since))
+
+    def flush(self) -> Optional[str]:
+        """取出缓冲区中的全部文本，缓冲区为空时返回 None"""
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self._since = None
+        return text
@@ -2,23 +2,37 @@ import asyncio
 import websockets
 from typing import Any # 导入 Any
 # from websockets.server import WebSocketServerProtocol # 导入 WebSocketServerProtocol
-import json
+import itertools
 import logging
 import os
 import traceback
-from typing import Dict, Any, Set
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Set, Tuple, Union
+from pydantic import ValidationError
 
 # 从现有模块导入必要的函数和模型
 from models import (
     WebSocketMessage, AuthRequestPayload, AuthResponsePayload,
     ChatRequestPayload, ChatResponsePayload, ImageUploadRequestPayload,
-    ImageUploadResponsePayload, ChatMessage, QuestionRequestPayload, AgentStatusContent
+    ImageUploadResponsePayload, ImageUploadBeginPayload, ImageUploadReadyPayload,
+    ImageUploadProgressPayload, ImageUploadCancelPayload, ChatMessage, QuestionRequestPayload, AgentStatusContent,
+    GraphSubscribeRequestPayload, GraphSubscribeResponsePayload, GraphDeltaPayload,
+    GraphQueryRequestPayload, GraphQueryCancelPayload, GraphQueryResponsePayload,
+    CancelRequestPayload, CancelResponsePayload, InboundMessage, parse_inbound_message
 )
 from auth import register_user, login_user
 from chat_handler import route_chat
 from image_upload import handle_image_upload
+from chunked_upload import CHUNK_SIZE, Upload_Manager
+from knowledge_base import get_knowledge_graph
+from graph_feed import Graph_Feed, Feed_Subscriber
+from graph_query import paginate
+from utils import json_codec
+from utils.json_codec import Static_Frame
+from utils.message_utils import STATIC_MSGS
 from extensions import db # 导入数据库实例
 from flask import Flask # 仅用于数据库上下文
+from werkzeug.utils import secure_filename
 
 # 配置日志记录器
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -27,6 +41,25 @@ logger = logging.getLogger("websocket_server")
 # 维护所有连接的客户端
 connected_clients: Set[Any] = set()
 
+# 每个连接同时处理的请求数上限
+MAX_CONCURRENT_REQUESTS = 8
+
+# 当前请求的 ID：每条请求在独立任务中处理，任务内设置的值不会影响其他请求，
+# 由该请求派生的后台任务（如图谱订阅推送）也会继承
+current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+
+# 日志中帧内容的最大长度，完整内容只在 DEBUG 级别输出
+LOG_PREVIEW_CHARS = 200
+
+# 预先编码的固定帧：STATIC_MSGS 中的聊天消息按对象身份查找
+_static_chat_frames: Dict[int, Tuple[ChatResponsePayload, Static_Frame]] = {
+    id(msg): (msg, Static_Frame("chat_response", msg)) for msg in STATIC_MSGS
+}
+_health_check_frame = Static_Frame("health_check_response", {"status": "XieShui Service is running"})
+
+# 知识图谱变更的分发器，首个 graph_subscribe 请求到达时创建
+_graph_feed: Optional[Graph_Feed] = None
+
 # 初始化数据库 (需要一个 Flask app context)
 # 由于 websockets 服务器是独立的，我们需要手动创建和管理数据库上下文
 # 这是一个临时的 Flask app 实例，仅用于初始化 SQLAlchemy
@@ -42,18 +75,47 @@ logger.info("Database initialized for websocket server.")
 TEMP_IMAGE_DIR = 'backend/temp/images'
 os.makedirs(TEMP_IMAGE_DIR, exist_ok=True)
 
-async def send_message(websocket: Any, message: WebSocketMessage):
-    """发送 WebSocket 消息到指定客户端"""
+# 分块图片上传，上传所属的连接以 websocket 对象标识
+upload_manager = Upload_Manager(TEMP_IMAGE_DIR)
+
+def _preview(data: Union[str, bytes]) -> str:
+    if isinstance(data, bytes):
+        data = data.decode("utf-8", errors="replace")
+    return data if len(data) <= LOG_PREVIEW_CHARS else data[:LOG_PREVIEW_CHARS] + "..."
+
+async def send_frame(websocket: Any, frame: bytes):
+    """发送已编码的一帧，以文本帧发送"""
     try:
-        message_json = json.dumps(message.model_dump(), ensure_ascii=False)
-        logger.info(f"Sending message to {websocket.remote_address}: {message_json}")
-        await websocket.send(message_json)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Sending message to {websocket.remote_address}: {_preview(frame)}")
+        await websocket.send(frame, text=True)
     except websockets.exceptions.ConnectionClosedOK:
         logger.info(f"Client {websocket.remote_address} disconnected gracefully.")
     except Exception as e:
         logger.error(f"Failed to send message to {websocket.remote_address}: {e}")
         logger.error(traceback.format_exc())
 
+async def send_message(websocket: Any, message: WebSocketMessage):
+    """发送 WebSocket 消息到指定客户端，未指定 request_id 时附上当前请求的 ID"""
+    request_id = message.request_id if message.request_id is not None else current_request_id.get()
+    try:
+        frame = json_codec.encode_frame(message.type, message.payload, request_id)
+    except Exception as e:
+        logger.error(f"Failed to encode {message.type} message: {e}")
+        return
+    await send_frame(websocket, frame)
+
+async def send_static_frame(websocket: Any, frame: Static_Frame):
+    await send_frame(websocket, frame.render(current_request_id.get()))
+
+async def send_chat_response(websocket: Any, payload: ChatResponsePayload):
+    """发送一条聊天响应，STATIC_MSGS 中的固定消息直接使用预先编码的帧"""
+    static = _static_chat_frames.get(id(payload))
+    if static is not None and static[0] is payload:
+        await send_static_frame(websocket, static[1])
+    else:
+        await send_message(websocket, WebSocketMessage(type="chat_response", payload=payload))
+
 async def handle_auth_request_ws(websocket: Any, payload: AuthRequestPayload):
     """处理认证请求"""
     logger.info(f"Received auth_request: {payload.model_dump()}")
@@ -66,7 +128,7 @@ async def handle_auth_request_ws(websocket: Any, payload: AuthRequestPayload):
             else:
                 response_data = AuthResponsePayload(status="error", message="无效的认证操作")
         logger.info(f"Emitting auth_response: {response_data.model_dump()}")
-        await send_message(websocket, WebSocketMessage(type="auth_response", payload=response_data.model_dump()))
+        await send_message(websocket, WebSocketMessage(type="auth_response", payload=response_data))
     except Exception as e:
         logger.error(f"认证请求处理失败: {str(e)}")
         logger.error(traceback.format_exc())
@@ -80,8 +142,7 @@ async def handle_chat_request_ws(websocket: Any, payload: ChatRequestPayload):
 
         with _temp_app.app_context(): # 确保在数据库上下文中执行
             async for response_payload in route_chat(payload.history, payload.current_text, payload.current_image_paths, thread_id, resume_data):
-                logger.info(f"Emitting chat_response: {response_payload.model_dump()}")
-                await send_message(websocket, WebSocketMessage(type="chat_response", payload=response_payload.model_dump()))
+                await send_chat_response(websocket, response_payload)
     except Exception as e:
         logger.error(f"聊天请求处理失败: {str(e)}")
         logger.error(traceback.format_exc())
@@ -92,63 +153,330 @@ async def handle_image_upload_request_ws(websocket: Any, payload: ImageUploadReq
     try:
         response_data = handle_image_upload(payload.filename, payload.image_data)
         logger.info(f"Emitting image_upload_response: {response_data.model_dump()}")
-        await send_message(websocket, WebSocketMessage(type="image_upload_response", payload=response_data.model_dump()))
+        await send_message(websocket, WebSocketMessage(type="image_upload_response", payload=response_data))
     except Exception as e:
         logger.error(f"图片上传请求处理失败: {str(e)}")
         logger.error(traceback.format_exc())
         await send_message(websocket, WebSocketMessage(type="error", payload={"message": f"图片上传失败: {str(e)}"}))
 
+async def send_image_upload_response(websocket: Any, response_data: ImageUploadResponsePayload):
+    await send_message(websocket, WebSocketMessage(type="image_upload_response", payload=response_data))
+
+async def handle_image_upload_begin_ws(websocket: Any, payload: ImageUploadBeginPayload):
+    """开始或续传一个分块上传，之后客户端以二进制帧发送数据块"""
+    try:
+        state = await upload_manager.begin(websocket, secure_filename(payload.filename), payload.size, payload.sha256)
+    except ValueError as e:
+        await send_image_upload_response(websocket, ImageUploadResponsePayload(status="error", message=str(e)))
+        return
+    state.context = current_request_id.get() # 该上传的所有响应帧都带上发起请求的 ID
+    logger.info(f"Image upload {state.upload_id_hex} ({state.size} bytes) starts at offset {state.received}")
+    await send_message(websocket, WebSocketMessage(type="image_upload_ready", payload=ImageUploadReadyPayload(
+        upload_id=state.upload_id_hex, offset=state.received, chunk_size=CHUNK_SIZE,
+    )))
+
+async def handle_image_upload_chunk_ws(websocket: Any, frame: bytes):
+    """
+    写入一个二进制数据块。在接收循环中直接处理，同一连接的数据块按到达顺序写入；
+    写盘在线程中进行，等待写盘期间不再读取新的帧，对客户端形成背压。
+    """
+    try:
+        upload_id, offset, data = upload_manager.parse_chunk(frame)
+    except ValueError as e:
+        await send_message(websocket, WebSocketMessage(type="error", payload={"message": str(e)}))
+        return
+    state = upload_manager.get(upload_id)
+    if state is None or state.owner is not websocket:
+        await send_message(websocket, WebSocketMessage(type="image_upload_progress", payload=ImageUploadProgressPayload(
+            upload_id=upload_id.hex(), offset=0, status="error", message="上传不存在或已结束，请重新发送 image_upload_begin",
+        )))
+        return
+    token = current_request_id.set(state.context)
+    try:
+        done = await upload_manager.write_chunk(upload_id, offset, data)
+        if done:
+            logger.info(f"Image upload {state.upload_id_hex} finished: {state.final_path}")
+            await send_image_upload_response(websocket, ImageUploadResponsePayload(
+                status="success", message="图片上传成功",
+                image_path=f"/temp/images/{os.path.basename(state.final_path)}", upload_id=state.upload_id_hex,
+            ))
+        else:
+            await send_message(websocket, WebSocketMessage(type="image_upload_progress", payload=ImageUploadProgressPayload(
+                upload_id=state.upload_id_hex, offset=state.received,
+            )))
+    except ValueError as e:
+        if upload_manager.get(upload_id) is None: # 校验失败，上传已被移除
+            await send_image_upload_response(websocket, ImageUploadResponsePayload(status="error", message=str(e), upload_id=state.upload_id_hex))
+        else:
+            await send_message(websocket, WebSocketMessage(type="image_upload_progress", payload=ImageUploadProgressPayload(
+                upload_id=state.upload_id_hex, offset=state.received, status="error", message=str(e),
+            )))
+    except OSError as e:
+        # 上传保持登记，客户端从 offset 重发（offset 等于 size 时发送空数据块）
+        logger.error(f"图片写入失败: {str(e)}")
+        await send_message(websocket, WebSocketMessage(type="image_upload_progress", payload=ImageUploadProgressPayload(
+            upload_id=state.upload_id_hex, offset=state.received, status="error", message=f"图片写入失败: {str(e)}",
+        )))
+    except Exception as e:
+        # 数据块在接收循环中处理，异常不能外抛，否则会断开整个连接
+        logger.error(f"数据块处理失败: {str(e)}")
+        logger.error(traceback.format_exc())
+        await send_image_upload_response(websocket, ImageUploadResponsePayload(
+            status="error", message=f"图片上传失败: {str(e)}", upload_id=state.upload_id_hex,
+        ))
+    finally:
+        current_request_id.reset(token)
+
+async def handle_image_upload_cancel_ws(websocket: Any, payload: ImageUploadCancelPayload):
+    """放弃分块上传并删除已写入的数据"""
+    try:
+        await upload_manager.abort(bytes.fromhex(payload.upload_id), websocket)
+        response_data = ImageUploadResponsePayload(status="cancelled", message="上传已取消", upload_id=payload.upload_id)
+    except ValueError:
+        response_data = ImageUploadResponsePayload(status="error", message="上传不存在或已结束", upload_id=payload.upload_id)
+    await send_image_upload_response(websocket, response_data)
+
+def get_graph_feed() -> Graph_Feed:
+    """取得共享知识图谱的变更分发器，共享图被替换后重新创建"""
+    global _graph_feed
+    graph = get_knowledge_graph()
+    if _graph_feed is None or _graph_feed.graph is not graph:
+        if _graph_feed is not None:
+            _graph_feed.close()
+        _graph_feed = Graph_Feed(graph)
+    return _graph_feed
+
+async def stream_graph_deltas(websocket: Any, subscriber: Feed_Subscriber):
+    """持续向客户端推送合并后的图增量，直到取消订阅或连接断开"""
+    try:
+        async for batch in subscriber.batches():
+            await send_message(websocket, WebSocketMessage(type="graph_delta", payload=GraphDeltaPayload(**batch)))
+    finally:
+        subscriber.close()
+
+def start_background_task(background_tasks: Dict[str, asyncio.Task], key: str, coro) -> asyncio.Task:
+    """启动连接级的后台任务，同名的旧任务会被取消；任务结束后自动从表中移除"""
+    previous = background_tasks.pop(key, None)
+    if previous is not None:
+        previous.cancel()
+    task = asyncio.create_task(coro)
+    background_tasks[key] = task
+    task.add_done_callback(lambda t: background_tasks.pop(key) if background_tasks.get(key) is t else None)
+    return task
+
+async def handle_graph_subscribe_ws(websocket: Any, payload: GraphSubscribeRequestPayload, background_tasks: Dict[str, asyncio.Task]):
+    """处理知识图谱变更订阅请求，每个连接最多一个订阅，重复订阅会替换之前的订阅"""
+    try:
+        previous = background_tasks.pop("graph_subscribe", None)
+        if previous is not None:
+            previous.cancel()
+        if payload.action == "subscribe":
+            feed = get_graph_feed()
+            subscriber = feed.subscribe(interval=payload.interval)
+            start_background_task(background_tasks, "graph_subscribe", stream_graph_deltas(websocket, subscriber))
+            response_data = GraphSubscribeResponsePayload(status="success", message="订阅成功", version=feed.graph.version)
+        elif payload.action == "unsubscribe":
+            response_data = GraphSubscribeResponsePayload(status="success", message="已取消订阅")
+        else:
+            response_data = GraphSubscribeResponsePayload(status="error", message="无效的订阅操作")
+        logger.info(f"Emitting graph_subscribe_response: {response_data.model_dump()}")
+        await send_message(websocket, WebSocketMessage(type="graph_subscribe_response", payload=response_data))
+    except Exception as e:
+        logger.error(f"图谱订阅请求处理失败: {str(e)}")
+        logger.error(traceback.format_exc())
+        await send_message(websocket, WebSocketMessage(type="error", payload={"message": f"图谱订阅失败: {str(e)}"}))
+
+async def send_graph_query_response(websocket: Any, response_data: GraphQueryResponsePayload):
+    await send_message(websocket, WebSocketMessage(type="graph_query_response", payload=response_data))
+
+async def stream_graph_query(websocket: Any, payload: GraphQueryRequestPayload):
+    """
+    逐页推送查询结果。每页在线程中计算（路径、检索等查询可能耗时较长），不阻塞事件循环；
+    等待期间可以被取消，已经开始计算的那一页在线程中完成后丢弃。
+    """
+    cursor = payload.cursor
+    try:
+        pages = paginate(get_knowledge_graph(), payload.op, payload.params, payload.page_size, payload.cursor)
+        sent = 0
+        while True:
+            # StopIteration 不能经由 Future 传递，用 None 表示结束
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                break
+            sent += 1
+            cursor = page.cursor
+            await send_graph_query_response(websocket, GraphQueryResponsePayload(
+                query_id=payload.query_id, status="success", items=page.items, cursor=page.cursor, done=page.done,
+            ))
+            if payload.max_pages is not None and sent >= payload.max_pages:
+                break # 暂停推送，客户端用游标续查
+    except asyncio.CancelledError:
+        # 告知客户端已停止，并给出最后一页的游标
+        await send_graph_query_response(websocket, GraphQueryResponsePayload(
+            query_id=payload.query_id, status="cancelled", cursor=cursor, message="查询已取消",
+        ))
+        raise
+    except ValueError as e:
+        await send_graph_query_response(websocket, GraphQueryResponsePayload(
+            query_id=payload.query_id, status="error", done=True, message=str(e),
+        ))
+
+async def handle_graph_query_ws(websocket: Any, payload: GraphQueryRequestPayload, background_tasks: Dict[str, asyncio.Task]):
+    """处理图谱查询请求，在当前请求任务中分页推送结果；可以被 graph_query_cancel 或 cancel 中止"""
+    logger.info(f"Starting graph_query {payload.query_id}: {payload.op}")
+    key = f"graph_query:{payload.query_id}"
+    previous = background_tasks.get(key)
+    if previous is not None:
+        previous.cancel()
+    task = asyncio.current_task()
+    background_tasks[key] = task
+    try:
+        await stream_graph_query(websocket, payload)
+    finally:
+        if background_tasks.get(key) is task:
+            del background_tasks[key]
+
+async def handle_graph_query_cancel_ws(websocket: Any, payload: GraphQueryCancelPayload, background_tasks: Dict[str, asyncio.Task]):
+    """取消进行中的图谱查询，取消结果由查询任务自己发送"""
+    task = background_tasks.get(f"graph_query:{payload.query_id}")
+    if task is None or task.done():
+        await send_graph_query_response(websocket, GraphQueryResponsePayload(
+            query_id=payload.query_id, status="error", done=True, message="查询不存在或已结束",
+        ))
+        return
+    task.cancel()
+
 async def handle_health_check_ws(websocket: Any):
     """处理健康检查请求"""
     logger.info(f"Emitting health_check_response")
-    await send_message(websocket, WebSocketMessage(type="health_check_response", payload={"status": "XieShui Service is running"}))
+    await send_static_frame(websocket, _health_check_frame)
+
+async def handle_cancel_ws(websocket: Any, payload: CancelRequestPayload, in_flight: Dict[str, asyncio.Task]):
+    """取消同一连接中仍在进行的请求"""
+    task = in_flight.get(payload.request_id)
+    if task is None or task.done():
+        response_data = CancelResponsePayload(status="error", message="请求不存在或已结束", request_id=payload.request_id)
+    else:
+        task.cancel()
+        response_data = CancelResponsePayload(status="success", message="请求已取消", request_id=payload.request_id)
+    await send_message(websocket, WebSocketMessage(type="cancel_response", payload=response_data))
+
+async def dispatch_message(websocket: Any, ws_message: InboundMessage, background_tasks: Dict[str, asyncio.Task]):
+    """按消息类型调用对应的处理函数，payload 已在解析时校验过"""
+    if ws_message.type == "auth_request":
+        logger.info(f"Handling auth_request from {websocket.remote_address}")
+        await handle_auth_request_ws(websocket, ws_message.payload)
+    elif ws_message.type == "chat_request":
+        logger.info(f"Handling chat_request from {websocket.remote_address}")
+        await handle_chat_request_ws(websocket, ws_message.payload)
+    elif ws_message.type == "image_upload_request":
+        logger.info(f"Handling image_upload_request from {websocket.remote_address}")
+        await handle_image_upload_request_ws(websocket, ws_message.payload)
+    elif ws_message.type == "image_upload_begin":
+        logger.info(f"Handling image_upload_begin from {websocket.remote_address}")
+        await handle_image_upload_begin_ws(websocket, ws_message.payload)
+    elif ws_message.type == "image_upload_cancel":
+        logger.info(f"Handling image_upload_cancel from {websocket.remote_address}")
+        await handle_image_upload_cancel_ws(websocket, ws_message.payload)
+    elif ws_message.type == "health_check":
+        logger.info(f"Handling health_check from {websocket.remote_address}")
+        await handle_health_check_ws(websocket)
+    elif ws_message.type == "graph_subscribe":
+        logger.info(f"Handling graph_subscribe from {websocket.remote_address}")
+        await handle_graph_subscribe_ws(websocket, ws_message.payload, background_tasks)
+    elif ws_message.type == "graph_query":
+        logger.info(f"Handling graph_query from {websocket.remote_address}")
+        await handle_graph_query_ws(websocket, ws_message.payload, background_tasks)
+    elif ws_message.type == "graph_query_cancel":
+        logger.info(f"Handling graph_query_cancel from {websocket.remote_address}")
+        await handle_graph_query_cancel_ws(websocket, ws_message.payload, background_tasks)
+
+def describe_invalid_message(message_str: Union[str, bytes], error: ValidationError) -> Tuple[Optional[str], str]:
+    """把解析失败的原因转换为 (请求 ID, 错误信息)；消息是合法的 JSON 对象时仍返回其中的请求 ID"""
+    detail = error.errors()[0]
+    if detail["type"] == "json_invalid":
+        return None, "无效的 JSON 格式"
+    data = json_codec.loads(message_str)
+    request_id = data.get("request_id") if isinstance(data, dict) else None
+    if not isinstance(request_id, str):
+        request_id = None
+    if detail["type"] == "union_tag_invalid":
+        return request_id, f"未知消息类型: {detail['ctx']['tag']}"
+    if detail["type"] == "union_tag_not_found":
+        return request_id, "消息缺少 type 字段"
+    return request_id, f"无效的消息: {error}"
+
+async def run_request(websocket: Any, ws_message: InboundMessage, background_tasks: Dict[str, asyncio.Task]):
+    """在独立任务中处理一条请求，该任务内发送的所有帧都带上请求 ID"""
+    current_request_id.set(ws_message.request_id)
+    try:
+        await dispatch_message(websocket, ws_message, background_tasks)
+    except asyncio.CancelledError:
+        logger.info(f"Request {ws_message.request_id} from {websocket.remote_address} cancelled")
+    except Exception as e:
+        logger.error(f"WebSocket消息处理失败 for {websocket.remote_address}: {str(e)}")
+        logger.error(traceback.format_exc())
+        await send_message(websocket, WebSocketMessage(type="error", payload={"message": f"服务器内部错误: {str(e)}"}))
 
 async def websocket_handler(websocket: Any):
-    """处理单个 WebSocket 连接"""
+    """
+    处理单个 WebSocket 连接。
+    除 cancel 与分块上传的二进制数据块外，每条消息都在独立的任务中处理，慢请求不会阻塞同一连接上的其他请求；
+    同时进行的请求数超过 MAX_CONCURRENT_REQUESTS 时，新请求直接返回错误。
+    """
     connected_clients.add(websocket)
     logger.info(f"Client {websocket.remote_address} connected. Total clients: {len(connected_clients)}")
+    background_tasks: Dict[str, asyncio.Task] = {} # 该连接中可按名称取消的任务（图谱订阅、分页查询）
+    in_flight: Dict[str, asyncio.Task] = {} # 请求 ID -> 处理任务；未带请求 ID 的请求使用内部编号
+    anonymous_ids = itertools.count()
     try:
-        # 模拟 Flask-SocketIO 的 connect 事件
-        # app.logger.info("Client connected")
-        # 在连接建立后，可以发送一些初始消息或进行认证
-        # 或者等待前端发送认证消息
-
         async for message_str in websocket:
-            logger.info(f"Received message from {websocket.remote_address}: {message_str}")
+            if isinstance(message_str, bytes):
+                # 二进制帧只用于分块上传的数据块
+                await handle_image_upload_chunk_ws(websocket, message_str)
+                continue
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Received message from {websocket.remote_address}: {_preview(message_str)}")
             try:
-                data = json.loads(message_str)
-                ws_message = WebSocketMessage.model_validate(data)
-                logger.info(f"Parsed WebSocketMessage type: {ws_message.type}")
-
-                if ws_message.type == "auth_request":
-                    logger.info(f"Handling auth_request from {websocket.remote_address}")
-                    await handle_auth_request_ws(websocket, AuthRequestPayload.model_validate(ws_message.payload))
-                elif ws_message.type == "chat_request":
-                    logger.info(f"Handling chat_request from {websocket.remote_address}")
-                    await handle_chat_request_ws(websocket, ChatRequestPayload.model_validate(ws_message.payload))
-                elif ws_message.type == "image_upload_request":
-                    logger.info(f"Handling image_upload_request from {websocket.remote_address}")
-                    await handle_image_upload_request_ws(websocket, ImageUploadRequestPayload.model_validate(ws_message.payload))
-                elif ws_message.type == "health_check":
-                    logger.info(f"Handling health_check from {websocket.remote_address}")
-                    await handle_health_check_ws(websocket)
-                else:
-                    logger.info(f"Emitting error for unknown message type: {ws_message.type}")
-                    await send_message(websocket, WebSocketMessage(type="error", payload={"message": f"未知消息类型: {ws_message.type}"}))
-
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON received from {websocket.remote_address}: {message_str}")
-                await send_message(websocket, WebSocketMessage(type="error", payload={"message": "无效的 JSON 格式"}))
-            except Exception as e:
-                logger.error(f"WebSocket消息处理失败 for {websocket.remote_address}: {str(e)}")
-                logger.error(traceback.format_exc())
-                await send_message(websocket, WebSocketMessage(type="error", payload={"message": f"服务器内部错误: {str(e)}"}))
+                ws_message = parse_inbound_message(message_str)
+            except ValidationError as e:
+                request_id, error = describe_invalid_message(message_str, e)
+                logger.error(f"WebSocket消息解析失败 for {websocket.remote_address}: {error}")
+                await send_message(websocket, WebSocketMessage(type="error", payload={"message": error}, request_id=request_id))
+                continue
+
+            request_id = ws_message.request_id
+            if ws_message.type == "cancel":
+                # cancel 直接在接收循环中处理，并发已满时也能取消
+                token = current_request_id.set(request_id)
+                try:
+                    await handle_cancel_ws(websocket, ws_message.payload, in_flight)
+                finally:
+                    current_request_id.reset(token)
+                continue
+
+            error = None
+            if len(in_flight) >= MAX_CONCURRENT_REQUESTS:
+                error = f"并发请求过多，最多同时处理 {MAX_CONCURRENT_REQUESTS} 个请求"
+            elif request_id is not None and request_id in in_flight:
+                error = f"请求 ID {request_id} 正在处理中"
+            if error is not None:
+                await send_message(websocket, WebSocketMessage(type="error", payload={"message": error}, request_id=request_id))
+                continue
+
+            key = request_id if request_id is not None else f"#{next(anonymous_ids)}"
+            task = asyncio.create_task(run_request(websocket, ws_message, background_tasks))
+            in_flight[key] = task
+            task.add_done_callback(lambda t, key=key: in_flight.pop(key, None))
     except websockets.exceptions.ConnectionClosedOK:
         logger.info(f"Client {websocket.remote_address} disconnected gracefully.")
     except Exception as e:
         logger.error(f"WebSocket connection error for {websocket.remote_address}: {e}")
         logger.error(traceback.format_exc())
     finally:
+        for task in list(in_flight.values()) + list(background_tasks.values()):
+            task.cancel()
+        await upload_manager.release(websocket) # 保留未完成上传的 .part 文件，重新连接后可以续传
         connected_clients.remove(websocket)
         logger.info(f"Client {websocket.remote_address} disconnected. Total clients: {len(connected_clients)}")
 